@@ -0,0 +1,296 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from loguru import logger
+
+from .delivery import get_delivery_queue
+from .enums.exchange import Exchange
+from .enums.pairs import Pairs
+from .enums.signal import Signal
+from .storage import data_path
+
+# transitions into these signals are pushed to subscribed chats
+ALERT_SIGNALS: Set[Signal] = {
+    Signal.Buy,
+    Signal.Sell,
+    Signal.BuyMore,
+    Signal.SellMore,
+}
+
+
+@dataclass(frozen=True)
+class Transition:
+    exchange: str
+    symbol: str
+    previous: Signal
+    signal: Signal
+
+
+def subscription_target(target: str) -> str:
+    """
+    Normalize a subscription target: a pair name (e.g. "usdt") or a
+    symbol written with or without separators (e.g. "BTC-USDT", "btcusdt")
+    """
+    target = target.strip()
+    if target.lower() in list(Pairs):
+        return target.lower()
+    return re.sub(r"[-/_]", "", target).upper()
+
+
+def format_transitions(transitions: List[Transition]) -> str:
+    exchange: str = transitions[0].exchange
+    lines = [
+        f"{re.sub(r'[-/_]', '', t.symbol)}: {t.previous} → {t.signal}"
+        for t in transitions
+    ]
+    return f"🔔 [{exchange.upper()}] CDC Action Zone V3 \n\n" + "\n".join(lines)
+
+
+class AlertStore:
+    """
+    Persist the last signal of every (exchange, symbol) and the chat
+    subscriptions in SQLite tables
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signals ("
+                " exchange TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " signal TEXT,"
+                " PRIMARY KEY (exchange, symbol)"
+                ")"
+            )
+            # target is a pair or a symbol, see `subscription_target`
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS subscriptions ("
+                " chat_id TEXT NOT NULL,"
+                " exchange TEXT NOT NULL,"
+                " target TEXT NOT NULL,"
+                " PRIMARY KEY (chat_id, exchange, target)"
+                ")"
+            )
+
+    def load_signals(self) -> Dict[Tuple[str, str], Optional[Signal]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT exchange, symbol, signal FROM signals"
+            ).fetchall()
+        return {
+            (exchange, symbol): None if signal is None else Signal(signal)
+            for exchange, symbol, signal in rows
+        }
+
+    def save_signals(self, signals: Mapping[Tuple[str, str], Optional[Signal]]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO signals (exchange, symbol, signal)"
+                " VALUES (?, ?, ?)",
+                [
+                    (exchange, symbol, None if signal is None else str(signal))
+                    for (exchange, symbol), signal in signals.items()
+                ],
+            )
+
+    def load_subscriptions(self) -> List[Tuple[str, str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT chat_id, exchange, target FROM subscriptions"
+            ).fetchall()
+
+    def subscribe(self, chat_id: str, exchange: str, target: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO subscriptions (chat_id, exchange, target)"
+                " VALUES (?, ?, ?)",
+                (chat_id, exchange, target),
+            )
+
+    def unsubscribe(self, chat_id: str, exchange: str, target: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM subscriptions"
+                " WHERE chat_id = ? AND exchange = ? AND target = ?",
+                (chat_id, exchange, target),
+            )
+
+
+class AlertEngine:
+    """
+    Push signal transitions to subscribed chats.
+
+    The last signal of every (exchange, symbol) is kept in memory and in
+    `store`. After every refresh the new signals are diffed against the
+    kept ones and only the transitions into `ALERT_SIGNALS` are routed
+    through the subscription index to the chats subscribed to their
+    symbol or pair, one message per chat. Routing and delivery cost
+    grows with the number of transitions, not with the number of
+    symbols times subscribers. Callers refresh the signals of closed
+    bars, which change once per bar, so a price swinging around a
+    threshold on the live bar does not alert on every swing
+
+    Arguments
+    ---------
+    store: Optional[AlertStore]
+        Store signals and subscriptions are persisted to. Kept in
+        memory only if None
+    """
+
+    def __init__(self, store: Optional[AlertStore] = None) -> None:
+        self.store: Optional[AlertStore] = store
+        self._lock = threading.Lock()
+        self._signals: Dict[Tuple[str, str], Optional[Signal]] = (
+            {} if store is None else store.load_signals()
+        )
+        # (exchange, target) to subscribed chats
+        self._subscribers: Dict[Tuple[str, str], Set[str]] = {}
+        if store is not None:
+            for chat_id, exchange, target in store.load_subscriptions():
+                self._subscribers.setdefault((exchange, target), set()).add(chat_id)
+        self._bot: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(
+        self, bot: Any, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> None:
+        """
+        Deliver alerts with `bot` through the delivery queue of `loop`
+        (default to the running loop). Refreshes on other threads hand
+        their alerts over to `loop`
+        """
+        self._bot = bot
+        self._loop = asyncio.get_running_loop() if loop is None else loop
+
+    def subscribe(self, chat_id: Any, exchange: Exchange, target: str) -> str:
+        target = subscription_target(target)
+        with self._lock:
+            self._subscribers.setdefault((exchange, target), set()).add(str(chat_id))
+        if self.store is not None:
+            self.store.subscribe(str(chat_id), exchange, target)
+        return target
+
+    def unsubscribe(self, chat_id: Any, exchange: Exchange, target: str) -> bool:
+        """Remove a subscription and return whether it existed"""
+        target = subscription_target(target)
+        with self._lock:
+            chats = self._subscribers.get((exchange, target), set())
+            if str(chat_id) not in chats:
+                return False
+            chats.discard(str(chat_id))
+        if self.store is not None:
+            self.store.unsubscribe(str(chat_id), exchange, target)
+        return True
+
+    def subscriptions(self, chat_id: Any) -> List[Tuple[str, str]]:
+        """(exchange, target) subscribed by `chat_id`, ordered"""
+        with self._lock:
+            return sorted(
+                key for key, chats in self._subscribers.items() if str(chat_id) in chats
+            )
+
+    def diff(
+        self, exchange: Exchange, signals: Mapping[str, Optional[Signal]]
+    ) -> List[Transition]:
+        """
+        Keep `signals` of `exchange` and return the transitions into
+        `ALERT_SIGNALS` from a previously known signal
+        """
+        transitions: List[Transition] = []
+        changed: Dict[Tuple[str, str], Optional[Signal]] = {}
+        with self._lock:
+            for symbol, signal in signals.items():
+                key = (exchange, symbol)
+                seen: bool = key in self._signals
+                previous = self._signals.get(key)
+                if seen and previous == signal:
+                    continue
+                self._signals[key] = changed[key] = signal
+                if previous is not None and signal in ALERT_SIGNALS:
+                    transitions.append(Transition(exchange, symbol, previous, signal))
+        if self.store is not None and len(changed) > 0:
+            self.store.save_signals(changed)
+        return transitions
+
+    def route(
+        self, exchange: Exchange, pair: Pairs, transitions: List[Transition]
+    ) -> Dict[str, List[Transition]]:
+        """Transitions of `pair` market each subscribed chat receives"""
+        routes: Dict[str, List[Transition]] = {}
+        with self._lock:
+            pair_chats = set(self._subscribers.get((exchange, pair), ()))
+            for transition in transitions:
+                target = subscription_target(transition.symbol)
+                chats = pair_chats | self._subscribers.get((exchange, target), set())
+                for chat_id in chats:
+                    routes.setdefault(chat_id, []).append(transition)
+        return routes
+
+    def refresh(
+        self,
+        exchange: Exchange,
+        pair: Pairs,
+        signals: Mapping[str, Optional[Signal]],
+    ) -> Dict[str, List[Transition]]:
+        """
+        Diff fresh `signals` of `pair` market, send the transitions to
+        their subscribers and return what each chat is sent
+        """
+        transitions = self.diff(exchange, signals)
+        if len(transitions) == 0:
+            return {}
+        routes = self.route(exchange, pair, transitions)
+        logger.info(
+            f"{len(transitions)} {exchange} signal transitions for {len(routes)} chats"
+        )
+        if len(routes) > 0:
+            self._notify(
+                {chat_id: format_transitions(t) for chat_id, t in routes.items()}
+            )
+        return routes
+
+    def _notify(self, messages: Dict[str, str]) -> None:
+        if self._bot is None or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._send(messages)
+        else:
+            # refreshed on a worker thread, deliver from the bot's loop
+            self._loop.call_soon_threadsafe(self._send, messages)
+
+    def _send(self, messages: Dict[str, str]) -> None:
+        queue = get_delivery_queue()
+        for chat_id, text in messages.items():
+            queue.send_message(self._bot, chat_id, text)
+
+
+_alert_engine: Optional[AlertEngine] = None
+
+
+def get_alert_engine() -> AlertEngine:
+    """
+    Return the shared alert engine persisted at `ALERT_STORE_PATH`
+    (default to `<DATA_DIR>/alerts.sqlite`). Setting `ALERT_STORE_PATH`
+    to an empty string keeps signals and subscriptions in memory only
+    """
+    global _alert_engine
+    if _alert_engine is None:
+        path: Optional[str] = os.getenv("ALERT_STORE_PATH")
+        if path is None:
+            path = data_path("alerts.sqlite")
+        store = AlertStore(path) if path != "" else None
+        _alert_engine = AlertEngine(store)
+    return _alert_engine
@@ -3,14 +3,16 @@ import os
 import re
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 from pandas import Series
 from requests.models import Response
 
+from .http_client import get_http_client
+from .storage import data_path
+
 
 class CoinGecko:
     base_url: str = "https://api.coingecko.com"
@@ -18,7 +20,7 @@ class CoinGecko:
     @staticmethod
     def get_btc_dominance():
         url: str = f"{CoinGecko.base_url}/api/v3/global"
-        response = requests.get(url)
+        response = get_http_client().get(url)
         data = json.loads(response.text)
         return data["data"]["market_cap_percentage"]["btc"]
 
@@ -42,22 +44,34 @@ class CoinGlassAPI:
         return datetime.utcfromtimestamp(int(str(unix_time)[:-3]))
 
     @staticmethod
-    def get_open_interest(fill_na: bool = True):
+    def get_open_interest_points(fill_na: bool = True) -> pd.DataFrame:
+        """Open interest history with one column per exchange"""
         url: str = f"{CoinGlassAPI.base_url}/api/openInterest/v3/chart?symbol=BTC&timeType=0&exchangeName=&type=0"
-        r = os.popen(f'curl -X GET "{url}"').read()
-        data = json.loads(r)["data"]
+        response: Response = get_http_client().get(url, headers=CoinGlassAPI.headers)
+        data = json.loads(response.text)["data"]
 
-        aggregated_oi = {}
-        for exchange, oi_data in data["dataMap"].items():
-            oi_data = pd.Series(
-                oi_data,
-                index=[CoinGlassAPI.format_unix_time(d) for d in data["dateList"]],
-                name=f"{exchange} Open Interest",
-            )
-            if fill_na:
-                oi_data = oi_data.fillna(0)
-            aggregated_oi[exchange.lower().strip()] = oi_data
-        return aggregated_oi
+        # millisecond timestamps truncated to seconds like `format_unix_time`
+        index = pd.to_datetime(
+            np.asarray(data["dateList"], dtype=np.int64) // 1000, unit="s"
+        )
+        points = pd.DataFrame(
+            {
+                exchange.lower().strip(): np.asarray(oi_data, dtype=float)
+                for exchange, oi_data in data["dataMap"].items()
+            },
+            index=index,
+        )
+        if fill_na:
+            points = points.fillna(0)
+        return points
+
+    @staticmethod
+    def get_open_interest(fill_na: bool = True):
+        points = CoinGlassAPI.get_open_interest_points(fill_na)
+        return {
+            exchange: points[exchange].rename(f"{exchange} Open Interest")
+            for exchange in points.columns
+        }
 
 
 class TheBlockAPI:
@@ -83,7 +97,7 @@ class TheBlockAPI:
         current_time: int = int(time.time())
         url: str = f"{TheBlockAPI.base_url}/dashboard/markets_futures_aggregatedopeninterestofbitcoinfutures_daily_bybt.json?v={current_time}"
 
-        response: Response = requests.get(
+        response: Response = get_http_client().get(
             url,
             headers=TheBlockAPI.headers,
         )
@@ -104,33 +118,146 @@ class TheBlockAPI:
         return aggregated_oi
 
 
+def balanced_json(text: str, start: int) -> str:
+    """JSON object of `text` opening at `start`, up to its closing brace"""
+    depth: int = 0
+    in_string: bool = False
+    i: int = start
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+        i += 1
+    raise ValueError("Unterminated JSON object")
+
+
 class AltCoinIndexAPI:
     api_url: str = "https://www.blockchaincenter.net/altcoin-season-index/"
+    # validators of the last downloaded page and the series parsed from it
+    validators: Dict[str, str] = {}
+    series: Optional[Series] = None
 
     @staticmethod
-    def get_historical_altcoin_index():
-        soup: BeautifulSoup = BeautifulSoup(
-            requests.get(AltCoinIndexAPI.api_url).text, "html.parser"
-        )
-        for sc in soup.find_all("script"):
-            if len(sc) != 1:
-                continue
-            if "chartdata" in sc.contents[0] and '"labels"' in sc.contents[0]:
+    def extract_chart_data(html: str) -> Dict[str, Any]:
+        """
+        Find the `chartdata = {...}` payload of the page by scanning for
+        its name and matching braces, without building a DOM
+        """
+        position: int = html.find("chartdata")
+        while position != -1:
+            start: int = html.find("{", position)
+            if start == -1:
                 break
-        chart_data = json.loads(re.findall(r" = (\{.+\})", sc.contents[0])[0])
+            # other scripts mention chartdata too, the payload has labels
+            if re.match(r"chartdata\s*=\s*\{", html[position : start + 1]):
+                payload = balanced_json(html, start)
+                if '"labels"' in payload:
+                    return json.loads(payload)
+            position = html.find("chartdata", position + len("chartdata"))
+        raise ValueError("Altcoin season index chart data not found")
+
+    @staticmethod
+    def parse_altcoin_index(html: str) -> Series:
+        chart_data = AltCoinIndexAPI.extract_chart_data(html)
         timestamp = [
             datetime.strptime(t, "%Y-%m-%d") for t in chart_data["labels"]["year"]
         ]
         value = [int(v) for v in chart_data["values"]["year"]]
         return pd.Series(value, index=timestamp, name="Altcoin Season Index")
 
+    @staticmethod
+    def local_copy_path() -> Optional[str]:
+        """
+        Local copy of the parsed series at `ALTCOIN_INDEX_PATH` (default
+        to `<DATA_DIR>/altcoin_index.json`), disabled if set to ""
+        """
+        path: Optional[str] = os.getenv("ALTCOIN_INDEX_PATH")
+        if path is None:
+            path = data_path("altcoin_index.json")
+        return None if path == "" else path
+
+    @staticmethod
+    def load_local_copy() -> None:
+        path = AltCoinIndexAPI.local_copy_path()
+        if path is None or not os.path.exists(path):
+            return
+        with open(path) as f:
+            local_copy = json.load(f)
+        AltCoinIndexAPI.validators = local_copy["validators"]
+        AltCoinIndexAPI.series = pd.Series(
+            local_copy["values"],
+            index=pd.to_datetime(local_copy["dates"]),
+            name="Altcoin Season Index",
+        )
+
+    @staticmethod
+    def save_local_copy() -> None:
+        path = AltCoinIndexAPI.local_copy_path()
+        if path is None:
+            return
+        series: Series = AltCoinIndexAPI.series
+        local_copy = {
+            "validators": AltCoinIndexAPI.validators,
+            "dates": [t.strftime("%Y-%m-%d") for t in series.index],
+            "values": [int(v) for v in series.values],
+        }
+        # write aside and rename so a crash never leaves a partial file
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(local_copy, f)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def get_historical_altcoin_index():
+        """
+        Altcoin season index history. The page is revalidated with the
+        ETag and Last-Modified of the last download, an unchanged page
+        answers 304 and the series is served from the local copy
+        """
+        cls = AltCoinIndexAPI
+        if cls.series is None:
+            cls.load_local_copy()
+
+        headers: Dict[str, str] = {}
+        if cls.series is not None:
+            if "ETag" in cls.validators:
+                headers["If-None-Match"] = cls.validators["ETag"]
+            if "Last-Modified" in cls.validators:
+                headers["If-Modified-Since"] = cls.validators["Last-Modified"]
+        response: Response = get_http_client().get(cls.api_url, headers=headers)
+        if response.status_code == 304 and cls.series is not None:
+            return cls.series.copy()
+        if response.status_code != 200:
+            raise ConnectionError(
+                f"Cannot fetch Altcoin Season Index: {response.status_code}"
+            )
+
+        cls.series = cls.parse_altcoin_index(response.text)
+        cls.validators = {
+            name: response.headers[name]
+            for name in ["ETag", "Last-Modified"]
+            if name in response.headers
+        }
+        cls.save_local_copy()
+        return cls.series.copy()
+
 
 class FearAndGreedAPI:
     api_url: str = "https://alternative.me/api/crypto/fear-and-greed-index/history"
 
     @staticmethod
     def get_historical_data(days: int = 300) -> Series:
-        response: Response = requests.post(
+        response: Response = get_http_client().post(
             FearAndGreedAPI.api_url,
             data=json.dumps({"days": days}),
             headers={"content-type": "application/json"},
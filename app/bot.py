@@ -1,13 +1,41 @@
+import asyncio
+import time
 from datetime import datetime
 from functools import partial
+from typing import Dict, List, Optional, Sequence, Union
 
 import telegram
 from loguru import logger
-from telegram.ext import CommandHandler, Updater
-
-from .callback import CallBacks, get_cdc_template
+from telegram.ext import Application, ApplicationBuilder, CommandHandler
+
+from .alerts import get_alert_engine
+from .callback import (
+    CallBacks,
+    async_get_cdc_template,
+    refresh_warm_state,
+    stream_live_signals,
+)
+from .delivery import get_delivery_queue
 from .enums.exchange import Exchange
 from .enums.pairs import Pairs
+from .live import live_markets
+from .report_cache import get_report_cache
+from .snapshot import get_warm_state
+from .workers import shutdown_workers
+
+
+# pairs reported for every exchange, USDT only for the others
+REPORT_PAIRS: Dict[Exchange, List[Pairs]] = {
+    Exchange.BITKUB: [Pairs.THB],
+    Exchange.FTX: [Pairs.USDT, Pairs.PERP, Pairs.BTC],
+}
+
+# chat id to the pairs of an exchange report it receives
+Destinations = Dict[str, Sequence[Pairs]]
+
+
+def report_pairs(exchange: Exchange) -> List[Pairs]:
+    return list(REPORT_PAIRS.get(exchange, [Pairs.USDT]))
 
 
 class Bot:
@@ -20,45 +48,54 @@ class Bot:
         await bot.send_message(chat_id=chat_id, text="Hello world!")
 
     async def send_message_to_chat(
-        self, chat_id: str, exchange: Exchange, img_path: str = "tmp.png"
+        self,
+        chat_id: str,
+        exchange: Exchange,
+        img_path: str = "tmp.png",
+        bot: Optional[telegram.Bot] = None,
     ) -> None:
-        bot: telegram.Bot = telegram.Bot(token=self.token)
+        await self.send_report(exchange, {chat_id: report_pairs(exchange)}, bot=bot)
+
+    async def send_report(
+        self,
+        exchange: Exchange,
+        destinations: Destinations,
+        bot: Optional[telegram.Bot] = None,
+    ) -> None:
+        """
+        Render the report of every pair requested by `destinations` once,
+        then deliver it to all of them concurrently. A chat receives the
+        current time followed by the reports of its pairs
+        """
+        if bot is None:
+            bot = telegram.Bot(token=self.token)
+        queue = get_delivery_queue()
         logger.info("Calling Dashboard callbacks")
 
-        match exchange:
-            case Exchange.BITKUB:
-                cdc_thb_template = get_cdc_template(Pairs.THB, exchange)
-                # btc_template = get_bitcoin_template(img_path)
-
-                current_time: str = (
-                    f"🕒 (UTC) {datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
-                )
-                await bot.send_message(chat_id=chat_id, text=current_time)
-                await bot.send_message(chat_id=chat_id, text=cdc_thb_template)
-            case Exchange.FTX:
-                cdc_usdt_template = get_cdc_template(Pairs.USDT, exchange)
-                cdc_perp_template = get_cdc_template(Pairs.PERP, exchange)
-                cdc_btc_template = get_cdc_template(Pairs.BTC, exchange)
-                # btc_template = get_bitcion_template(img_path)
-
-                current_time: str = (
-                    f"🕒 (UTC) {datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
-                )
-                await bot.send_message(chat_id=chat_id, text=current_time)
-                await bot.send_message(chat_id=chat_id, text=cdc_usdt_template)
-                await bot.send_message(chat_id=chat_id, text=cdc_perp_template)
-                await bot.send_message(chat_id=chat_id, text=cdc_btc_template)
-            case _:
-                cdc_usdt_template = get_cdc_template(Pairs.USDT, exchange)
-                # cdc_btc_template = get_cdc_template(Pairs.BTC, exchange)
-                # btc_template = get_bitcion_template(img_path)
-
-                current_time: str = (
-                    f"🕒 (UTC) {datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
-                )
-                await bot.send_message(chat_id=chat_id, text=current_time)
-                await bot.send_message(chat_id=chat_id, text=cdc_usdt_template)
-                # bot.send_message(chat_id=chat_id, text=cdc_btc_template)
+        pairs: List[Pairs] = [
+            pair
+            for pair in report_pairs(exchange)
+            if any(pair in chat_pairs for chat_pairs in destinations.values())
+        ]
+        templates: Dict[Pairs, str] = {}
+        for pair in pairs:
+            templates[pair] = await async_get_cdc_template(pair, exchange)
+        # btc_template = get_bitcoin_template(img_path)
+
+        current_time: str = (
+            f"🕒 (UTC) {datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
+        )
+        # messages to one chat are delivered in order, chats in parallel
+        await asyncio.gather(
+            *[
+                queue.send_message(bot, chat_id, template)
+                for chat_id, chat_pairs in destinations.items()
+                for template in [
+                    current_time,
+                    *[templates[pair] for pair in pairs if pair in chat_pairs],
+                ]
+            ]
+        )
 
         # bot.send_message(chat_id=chat_id, text=btc_template)
         # bot.send_photo(chat_id=chat_id, photo=open(img_path, "rb"))
@@ -72,23 +109,107 @@ class Bot:
         #     '\n\n"Comes for the price. Stay for the principle" - The legendary Piranya33 🐟'
         # bot.send_message(chat_id=chat_id, text=donate_template)
 
-    def run(self) -> None:
-        logger.info("Starting bot...")
-        updater: Updater = Updater(token=self.token, use_context=True)
-        dispatcher: Dispatcher = updater.dispatcher
+    async def send_reports(
+        self, chat_ids: Dict[Exchange, Union[str, Destinations]]
+    ) -> None:
+        """
+        Scan every exchange of `chat_ids` concurrently and send each
+        report to its destinations, a chat id receiving every pair or a
+        mapping from chat id to its pairs. Every report is rendered once
+        however many chats receive it. Scans share the HTTP connection
+        pools, the candle store and the indicator state of this process.
+        Signal changes found by the scans are sent to subscribed chats
+        as well
+        """
+        start: float = time.perf_counter()
+        bot: telegram.Bot = telegram.Bot(token=self.token)
+        get_alert_engine().attach(bot)
+        exchanges: List[Exchange] = list(chat_ids)
+        destinations: Dict[Exchange, Destinations] = {
+            exchange: (
+                {chat_ids[exchange]: report_pairs(exchange)}
+                if isinstance(chat_ids[exchange], str)
+                else chat_ids[exchange]
+            )
+            for exchange in exchanges
+        }
+        results = await asyncio.gather(
+            *[
+                self.send_report(exchange, destinations[exchange], bot=bot)
+                for exchange in exchanges
+            ],
+            return_exceptions=True,
+        )
+        await get_delivery_queue().join()
+
+        failed: List[Exchange] = []
+        for exchange, result in zip(exchanges, results):
+            if isinstance(result, BaseException):
+                logger.opt(exception=result).error(f"Report of {exchange} failed")
+                failed.append(exchange)
+        n_chats: int = sum(len(destinations[exchange]) for exchange in exchanges)
+        logger.info(
+            f"Sent {len(exchanges) - len(failed)}/{len(exchanges)} reports"
+            f" to {n_chats} chats in {time.perf_counter() - start:.1f}s"
+        )
+        if len(failed) > 0:
+            raise RuntimeError(f"Reports failed: {', '.join(failed)}")
+
+    def build_application(self) -> Application:
+        """
+        Build the bot application. Updates are processed concurrently and
+        handlers offload scans and chart rendering to worker pools, so a
+        long `/cdc` scan does not delay other commands
+        """
+        application: Application = (
+            ApplicationBuilder()
+            .token(self.token)
+            .concurrent_updates(True)
+            .post_init(self._post_init)
+            .post_shutdown(self._post_shutdown)
+            .build()
+        )
 
-        dispatcher.add_handler(
+        application.add_handler(
             CommandHandler("dashboard", CallBacks.dashboard_callback)
         )
-        dispatcher.add_handler(CommandHandler("cdc", CallBacks.cdc_callback))
-        dispatcher.add_handler(
+        application.add_handler(CommandHandler("cdc", CallBacks.cdc_callback))
+        application.add_handler(
             CommandHandler(
                 "cdcaction", partial(CallBacks.cdc_callback, is_current=False)
             )
         )
-        dispatcher.add_handler(
-            CommandHandler("open_interest", partial(CallBacks.open_interest_callback))
+        application.add_handler(
+            CommandHandler("open_interest", CallBacks.open_interest_callback)
+        )
+        application.add_handler(
+            CommandHandler("subscribe", CallBacks.subscribe_callback)
         )
+        application.add_handler(
+            CommandHandler(
+                "unsubscribe", partial(CallBacks.subscribe_callback, subscribe=False)
+            )
+        )
+        application.add_handler(
+            CommandHandler("subscriptions", CallBacks.subscriptions_callback)
+        )
+        return application
+
+    @staticmethod
+    async def _post_init(application: Application) -> None:
+        # serve the last snapshot right away and bring it up to date
+        get_warm_state().restore(get_report_cache())
+        # signal changes found by any scan or stream are pushed from here
+        get_alert_engine().attach(application.bot)
+        application.create_task(refresh_warm_state())
+        for exchange, pair in live_markets():
+            application.create_task(stream_live_signals(exchange, pair))
+
+    @staticmethod
+    async def _post_shutdown(application: Application) -> None:
+        get_warm_state().save(get_report_cache())
+        shutdown_workers()
 
-        updater.start_polling()
-        updater.idle()
+    def run(self) -> None:
+        logger.info("Starting bot...")
+        self.build_application().run_polling()
@@ -1,32 +1,46 @@
+import asyncio
 import os
 import re
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 from loguru import logger
-from matplotlib.ticker import FuncFormatter
-from ta import trend
-from telegram.ext import CallbackContext, Updater
+from telegram import Update
+from telegram.ext import ContextTypes
 
-from .api import AltCoinIndexAPI, CoinGlassAPI, CoinGecko, FearAndGreedAPI
+from .alerts import get_alert_engine
+from .candle_store import CandleStore, get_candle_store
 from .enums.exchange import Exchange
 from .enums.pairs import Pairs
 from .enums.signal import Signal
-from .exchanges import BinanceAPI
+from .exchanges import ExchangeAPI
+from .exchanges.backfill import history_start, iter_backfill
+from .exchanges.concurrent_fetch import iter_candle_data
 from .exchanges.exchange_provider import ExchangeProvider
+from .indicator_state import IndicatorEngine, get_indicator_engine
+from .live import (
+    KlineStreamer,
+    LiveSignals,
+    get_live_signals,
+    register_live_signals,
+)
+from .macro_data import get_macro_data
+from .open_interest import AGGREGATED, OI_LEVELS, OpenInterestHistory
+from .report_cache import get_report_cache, report_expiry
+from .resample import TIMEFRAME_OFFSETS, TIMEFRAMES, finest_timeframe, resample_candles
+from .snapshot import get_warm_state
 from .solver import Solver
 from .utils import send_message, send_photo
+from .workers import run_in_chart_worker, run_in_worker
 
 
 class CallBacks:
     @staticmethod
-    def dashboard_callback(
-        update: Updater,
-        context: CallbackContext,
-        img_path: str = "tmp.png",
+    async def dashboard_callback(
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
         chat_id: Optional[str] = None,
     ) -> None:
         """
@@ -38,22 +52,27 @@ class CallBacks:
         chat_id: str = update.effective_chat.id if chat_id is None else chat_id
 
         current_time: str = f"{datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
-        btc_template = get_bitcoin_template(img_path)
+        warm_dashboard = get_warm_state().get_dashboard()
+        if warm_dashboard is None:
+            btc_template, dashboard = await async_get_bitcoin_template()
+        else:
+            # answer from the last computed dashboard, refresh it if it is old
+            computed_at, btc_template, dashboard = warm_dashboard
+            if time.time() - computed_at > float(os.getenv("DASHBOARD_TTL", "900")):
+                context.application.create_task(refresh_warm_state())
 
-        send_message(chat_id, context, message=current_time)
-        send_photo(chat_id, context, img_path)
-        send_message(update.effective_chat.id, context, message=btc_template)
-        os.remove(img_path)
+        await send_message(chat_id, context, message=current_time)
+        await send_photo(chat_id, context, dashboard)
+        await send_message(update.effective_chat.id, context, message=btc_template)
 
     @staticmethod
-    def open_interest_callback(
-        update: Updater,
-        context: CallbackContext,
-        img_path: str = "oi.png",
+    async def open_interest_callback(
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
     ) -> None:
         args: List[str] = context.args
-        if len(args) != 1:
-            send_message(
+        if len(args) not in [1, 2]:
+            await send_message(
                 update.effective_chat.id,
                 context,
                 "Please parse exchange as an argument!",
@@ -61,69 +80,67 @@ class CallBacks:
             return
 
         exchange: str = args[0].lower().strip()
-        oi_data: Dict[str, pd.Series] = CoinGlassAPI.get_open_interest()
-        if exchange not in oi_data.keys():
-            send_message(
+        # e.g. /open_interest binance 1w, points as fetched by default
+        level: Optional[str] = args[1].lower().strip() if len(args) == 2 else None
+        if level is not None and level not in OI_LEVELS:
+            await send_message(
+                update.effective_chat.id,
+                context,
+                f"Unrecognized level: {level}. Only {'|'.join(OI_LEVELS)} available",
+            )
+            return
+        history: OpenInterestHistory = await run_in_worker(
+            get_macro_data().get, "open_interest"
+        )
+        if exchange not in history.exchanges():
+            await send_message(
                 update.effective_chat.id, context, f"Unrecognize exchange: {exchange}"
             )
             return
-        oi: pd.Series = oi_data[exchange][-300:]
+        oi: pd.Series = history.series(exchange, level)[-300:]
 
         logger.info(f"Calling Open Interest Callback on {exchange}")
 
-        # format text
-        oi_gain: float = (oi[-1] - oi[-2]) / oi[-2]
-        oi_gain_fmt: str = (
-            f"+{oi_gain * 100:.2f}" if oi_gain > 0 else f"{oi_gain * 100:.2f}"
-        )
+        if len(oi) == 0:
+            await send_message(
+                update.effective_chat.id,
+                context,
+                f"No open interest of {exchange} recorded yet",
+            )
+            return
+
+        # format text, a single point has no change to show
+        oi_change: str = ""
+        if len(oi) >= 2:
+            oi_gain: float = (oi.iloc[-1] - oi.iloc[-2]) / oi.iloc[-2]
+            oi_gain_fmt: str = (
+                f"+{oi_gain * 100:.2f}" if oi_gain > 0 else f"{oi_gain * 100:.2f}"
+            )
+            oi_change = f" ({oi_gain_fmt}%)"
 
         exchange = exchange[0].upper() + exchange[1:]
         template = (
             f"💰 {exchange} Future Open Interest:\n"
-            + f"    ${oi[-1]:,} ({oi_gain_fmt}%)\n\n"
+            + f"    ${oi.iloc[-1]:,.0f}{oi_change}\n\n"
         )
 
         # format image
-        btcusdt: pd.Series = BinanceAPI.generate_candle_data("BTCUSDT")["close"][-300:]
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        ax.plot(oi.index, oi.values)
-        ax.axhline(
-            oi[-1],
-            linestyle="--",
-            alpha=0.4,
-            color="black",
-            label="Future Open Interest (USD)",
-        )
-        ax.get_yaxis().set_major_formatter(
-            FuncFormatter(lambda x, p: format(int(x), ","))
+        candle_data: pd.DataFrame = await run_in_worker(
+            get_macro_data().get, "btc_usdt"
         )
+        btcusdt: pd.Series = candle_data["close"][-300:]
+        from .charts import render_open_interest
 
-        ax2 = ax.twinx()
-        ax2.plot(
-            btcusdt.index,
-            btcusdt.values,
-            color="orange",
-            alpha=0.7,
-            label="BTCUSDT (close)",
-        )
-        ax2.axhline(btcusdt.values[-1], linestyle="--", alpha=0.2, color="brown")
-        ax2.get_yaxis().set_major_formatter(
-            FuncFormatter(lambda x, p: format(int(x), ","))
+        chart: bytes = await run_in_chart_worker(
+            render_open_interest, exchange, oi, btcusdt
         )
 
-        ax.label_outer()
-        fig.suptitle(f"{exchange} Open Interest", fontweight="bold", fontsize=24)
-        lgd = fig.legend()
-        plt.savefig(img_path, bbox_extra_artists=(lgd,), bbox_inches="tight")
-
-        send_photo(update.effective_chat.id, context, img_path)
-        send_message(update.effective_chat.id, context, template)
-        os.remove(img_path)
+        await send_photo(update.effective_chat.id, context, chart)
+        await send_message(update.effective_chat.id, context, template)
 
     @staticmethod
-    def cdc_callback(
-        update: Updater, context: CallbackContext, is_current: bool = True
+    async def cdc_callback(
+        update: Update, context: ContextTypes.DEFAULT_TYPE, is_current: bool = True
     ) -> None:
         args = context.args
         if len(args) == 0:
@@ -131,30 +148,112 @@ class CallBacks:
         else:
             pair = args[0].lower().strip()
         if pair not in ["usdt", "btc"]:
-            send_message(
+            await send_message(
                 update.effective_chat.id,
                 context,
                 f"Unrecognized argument: {pair}. Only usdt|btc available",
             )
             return
+        # e.g. /cdc usdt 4h 1d, daily only by default
+        timeframes = tuple(arg.lower().strip() for arg in args[1:]) or ("1d",)
+        unknown = [timeframe for timeframe in timeframes if timeframe not in TIMEFRAMES]
+        if len(unknown) > 0:
+            await send_message(
+                update.effective_chat.id,
+                context,
+                f"Unrecognized timeframe: {' '.join(unknown)}."
+                f" Only {'|'.join(TIMEFRAMES)} available",
+            )
+            return
 
-        send_message(
+        await send_message(
             update.effective_chat.id,
             context,
             message=f"Computing XXX{pair.upper()} pairs. This could take a few minutes 🙇‍♂️ ...",
         )
-        template = get_cdc_template(pair, current=is_current)
-        send_message(update.effective_chat.id, context, message=template)
+        # scans run on their own event loop in the worker pool so that
+        # computing signals never blocks other commands
+        template = await run_in_worker(
+            get_cdc_template, pair, Exchange.BINANCE, is_current, None, timeframes
+        )
+        await send_message(update.effective_chat.id, context, message=template)
         if pair == "btc":
-            template = get_cdc_template(pair, Exchange.OKEX, is_current)
-            send_message(update.effective_chat.id, context, message=template)
+            template = await run_in_worker(
+                get_cdc_template, pair, Exchange.OKEX, is_current, None, timeframes
+            )
+            await send_message(update.effective_chat.id, context, message=template)
+        await run_in_worker(get_warm_state().save, get_report_cache())
+
+    @staticmethod
+    async def subscribe_callback(
+        update: Update, context: ContextTypes.DEFAULT_TYPE, subscribe: bool = True
+    ) -> None:
+        """
+        /subscribe <exchange> <pair|symbol> ... to receive signal changes
+        of whole markets (e.g. usdt) or single symbols (e.g. BTCUSDT),
+        /unsubscribe with the same arguments to stop receiving them
+        """
+        chat_id = update.effective_chat.id
+        command: str = "subscribe" if subscribe else "unsubscribe"
+        args: List[str] = context.args
+        if len(args) < 2:
+            await send_message(
+                chat_id,
+                context,
+                f"Usage: /{command} <exchange> <pair|symbol> ..."
+                f" e.g. /{command} binance usdt",
+            )
+            return
+        exchange: str = args[0].lower().strip()
+        if exchange not in list(Exchange):
+            await send_message(
+                chat_id,
+                context,
+                f"Unrecognized exchange: {exchange}."
+                f" Only {'|'.join(list(Exchange))} available",
+            )
+            return
+
+        alerts = get_alert_engine()
+        if subscribe:
+            targets = [
+                alerts.subscribe(chat_id, Exchange(exchange), target)
+                for target in args[1:]
+            ]
+            message = f"Subscribed to {exchange} {' '.join(targets)} signal changes"
+        else:
+            targets = [
+                target
+                for target in args[1:]
+                if alerts.unsubscribe(chat_id, Exchange(exchange), target)
+            ]
+            if len(targets) == 0:
+                message = "No matching subscription"
+            else:
+                message = f"Unsubscribed from {exchange} {' '.join(targets)}"
+        await send_message(chat_id, context, message)
 
     @staticmethod
-    def solve_cdc_callback(update: Updater, context: CallbackContext) -> None:
+    async def subscriptions_callback(
+        update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        subscriptions = get_alert_engine().subscriptions(update.effective_chat.id)
+        if len(subscriptions) == 0:
+            message = "No subscriptions. Subscribe with /subscribe <exchange> <pair>"
+        else:
+            message = "Subscribed signal changes:\n" + "\n".join(
+                f"    {exchange} {target}" for exchange, target in subscriptions
+            )
+        await send_message(update.effective_chat.id, context, message)
+
+    @staticmethod
+    async def solve_cdc_callback(
+        update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
         args = context.args
 
         if len(args) > 1:
-            context.bot.send_message(
+            await context.bot.send_message(
                 chat_id=update.effective_chat.id, text="Please parse only one argument!"
             )
         else:
@@ -166,73 +265,23 @@ class CallBacks:
             logger.info(f"computing {symbol} pair...")
 
             try:
-                candle_data = BinanceAPI.generate_candle_data(symbol, interval)
+                binance_api = ExchangeProvider.provide(Exchange.BINANCE)
+                candle_data = await run_in_worker(
+                    binance_api.generate_candle_data, symbol, interval
+                )
                 _, template = Solver.solve_cdc_cross(candle_data["close"])
-                context.bot.send_message(
+                await context.bot.send_message(
                     chat_id=update.effective_chat.id, text=template
                 )
             except AssertionError as e:
                 logger.info(f"cannot compute with the following error message:\n{e}")
-                context.bot.send_message(
+                await context.bot.send_message(
                     chat_id=update.effective_chat.id,
                     text=f"Unrecognize pair name `{symbol}` on Binance",
                 )
 
 
-def generate_image(data: pd.DataFrame, save_path: str) -> None:
-    current_time: str = f"{datetime.strftime(datetime.now(), '%d-%m-%Y %H:%M:%S')}"
-    fig = plt.figure(figsize=(10, 10))
-    gs = fig.add_gridspec(3, hspace=0)
-    axs = gs.subplots(sharex=True)
-    fig.suptitle(f"Bitcoin Dashboard\n{current_time}", fontweight="bold", fontsize=24)
-
-    # aggregated open interest
-    iterator = [
-        ("Altcoin Season Index", "red"),
-        ("Fear and Greed Index", "green"),
-        ("Aggregated Open Interest", "blue"),
-    ]
-    for i, (col, color) in enumerate(iterator):
-        axs[i].plot(data.index, data[col].values, label=col, color=color)
-        latest_value = None
-        for d in data[col].values[::-1]:
-            if d == d:
-                latest_value = d
-                break
-        axs[i].axhline(latest_value, linestyle="--", alpha=0.4, color="black")
-        axs[i].get_yaxis().set_major_formatter(
-            FuncFormatter(lambda x, p: format(int(x), ","))
-        )
-
-        ax2 = axs[i].twinx()
-        if i == 0:
-            ax2.plot(
-                data.index,
-                data["close"].values,
-                color="orange",
-                alpha=0.7,
-                label="BTCUSDT (close)",
-            )
-        else:
-            ax2.plot(data.index, data["close"].values, color="orange", alpha=0.7)
-        ax2.axhline(data["close"].values[-1], linestyle="--", alpha=0.2, color="brown")
-        ax2.get_yaxis().set_major_formatter(
-            FuncFormatter(lambda x, p: format(int(x), ","))
-        )
-    for ax in axs:
-        ax.label_outer()
-
-    lgd = fig.legend(loc="lower right", bbox_to_anchor=(1.22, 0.45))
-    plt.savefig(save_path, bbox_extra_artists=(lgd,), bbox_inches="tight")
-
-
-def get_cdc_template(
-    pair: Pairs = Pairs.USDT,
-    exchange: Exchange = Exchange.BINANCE,
-    current: bool = True,
-) -> str:
-    exchange_api = ExchangeProvider.provide(exchange)
-
+def get_tickers(exchange_api: ExchangeAPI, pair: Pairs) -> List[str]:
     tickers = []
     match pair:
         case Pairs.USDT:
@@ -243,22 +292,120 @@ def get_cdc_template(
             tickers = exchange_api.get_perp_tickers()
         case Pairs.THB:
             tickers = exchange_api.get_thb_tickers()
+    return sorted(tickers)
 
-    tickers = sorted(tickers)
-
-    buy_tickers = []
-    sell_tickers = []
-    buymore_tickers = []
-    sellmore_tickers = []
-    for ticker in tickers:
-        candle_data = exchange_api.generate_candle_data(ticker)
 
+async def scan_cdc_timeframes(
+    pair: Pairs = Pairs.USDT,
+    exchange: Exchange = Exchange.BINANCE,
+    timeframes: Sequence[str] = ("1d",),
+    current: bool = True,
+    max_concurrency: Optional[int] = None,
+    store: Optional[CandleStore] = None,
+    engine: Optional[IndicatorEngine] = None,
+) -> Dict[str, Dict[str, Optional[Signal]]]:
+    """
+    Compute CDC Action Zone signal of every ticker in `pair` market on
+    each of `timeframes`. Only candles of the finest timeframe are
+    fetched, candles of the other timeframes are resampled from them,
+    so a ticker costs one download however many timeframes are scanned.
+    When the coarsest timeframe needs more history than one kline page
+    holds, the history is backfilled page by page (see `iter_backfill`).
+
+    Candle data are fetched concurrently and signals are computed as
+    soon as candle data arrives. Candle data are read through `store`
+    (default to the shared candle store) when it is enabled and signals
+    are computed incrementally from the indicator state kept by
+    `engine` (default to the shared indicator engine)
+
+    Return
+    ------
+    signals: Dict[str, Dict[str, Optional[Signal]]]
+        Mapping from timeframe to the mapping from ticker to its signal,
+        ordered by ticker name. Tickers without candle data are omitted
+    """
+    exchange_api = ExchangeProvider.provide(exchange)
+    base_timeframe: str = finest_timeframe(timeframes)
+    intervals: Dict[str, str] = {
+        timeframe: exchange_api.get_interval(timeframe) for timeframe in timeframes
+    }
+    tickers = await asyncio.to_thread(get_tickers, exchange_api, pair)
+    if store is None:
+        store = get_candle_store()
+    if engine is None:
+        engine = get_indicator_engine()
+
+    signals: Dict[str, Dict[str, Optional[Signal]]] = {
+        timeframe: {} for timeframe in timeframes
+    }
+    start = history_start(exchange_api, timeframes)
+    if start is None:
+        candles = iter_candle_data(
+            exchange_api, tickers, max_concurrency, store, intervals[base_timeframe]
+        )
+    else:
+        # one kline page does not hold enough history for the coarsest timeframe
+        candles = iter_backfill(
+            exchange_api,
+            tickers,
+            base_timeframe,
+            start,
+            max_concurrency=max_concurrency,
+            store=store,
+        )
+    async for ticker, candle_data in candles:
         if candle_data is None:
             continue
 
-        signal = Solver.get_cdc_signal(candle_data["close"], current=current)
-        logger.info(f"Ticker ({ticker}) is {signal}")
+        for timeframe in timeframes:
+            if timeframe != base_timeframe:
+                candle_data_tf = resample_candles(candle_data, timeframe)
+            else:
+                candle_data_tf = candle_data
+            signal = engine.get_cdc_signal(
+                exchange_api.exchange,
+                ticker,
+                intervals[timeframe],
+                candle_data_tf["close"],
+                current=current,
+            )
+            logger.info(f"Ticker ({ticker}) is {signal} on {timeframe}")
+            signals[timeframe][ticker] = signal
+
+    await asyncio.to_thread(engine.save)
+    return {
+        timeframe: {
+            ticker: signals[timeframe][ticker]
+            for ticker in tickers
+            if ticker in signals[timeframe]
+        }
+        for timeframe in timeframes
+    }
+
+
+async def scan_cdc_signals(
+    pair: Pairs = Pairs.USDT,
+    exchange: Exchange = Exchange.BINANCE,
+    current: bool = True,
+    max_concurrency: Optional[int] = None,
+    store: Optional[CandleStore] = None,
+    engine: Optional[IndicatorEngine] = None,
+) -> Dict[str, Optional[Signal]]:
+    """Daily CDC Action Zone signal of every ticker in `pair` market"""
+    signals = await scan_cdc_timeframes(
+        pair, exchange, ("1d",), current, max_concurrency, store, engine
+    )
+    return signals["1d"]
 
+
+def format_cdc_template(
+    exchange: Exchange, signals: Dict[str, Optional[Signal]], timeframe: str = "1d"
+) -> str:
+    buy_tickers = []
+    sell_tickers = []
+    buymore_tickers = []
+    sellmore_tickers = []
+    for ticker, signal in signals.items():
         cleaned_ticker = re.sub(r"[-/_]", "", ticker)
         if signal == Signal.Buy:
             buy_tickers.append(cleaned_ticker)
@@ -269,8 +416,12 @@ def get_cdc_template(
         elif signal == Signal.SellMore:
             sellmore_tickers.append(cleaned_ticker)
 
+    # daily reports keep their original header
+    header: str = f"[{exchange.upper()}]"
+    if timeframe != "1d":
+        header += f" {timeframe.upper()}"
     cdc_template: str = (
-        f"[{exchange.upper()}]\n"
+        f"{header}\n"
         + "CDC Action Zone V3 \n\n"
         + "(Buy Next Bar) - buy now! 🟢\n"
         + f"{' '.join(buy_tickers)}\n\n"
@@ -285,28 +436,140 @@ def get_cdc_template(
     return cdc_template
 
 
-def get_bitcoin_template(img_path: str) -> str:
-    btc_dominance: float = CoinGecko.get_btc_dominance()
-    logger.info("Fetching BTC Price...")
-    btc_usdt_candle: pd.DataFrame = BinanceAPI.generate_candle_data("BTCUSDT")
-    logger.info("Fetching Altcoin Index...")
-    oi: Dict[str, pd.Series] = CoinGlassAPI.get_open_interest()
-    logger.info("Fetching Fear and Greed Index...")
-    altcoin_idx: pd.Series = AltCoinIndexAPI.get_historical_altcoin_index()
-    logger.info("Fetching Bitcoin Aggregated Open Interest...")
-    fng_idx: pd.Series = FearAndGreedAPI.get_historical_data()
+async def async_get_cdc_template(
+    pair: Pairs = Pairs.USDT,
+    exchange: Exchange = Exchange.BINANCE,
+    current: bool = True,
+    max_concurrency: Optional[int] = None,
+    timeframes: Sequence[str] = ("1d",),
+) -> str:
+    """
+    CDC Action Zone report of `pair` market, one section per timeframe.
+    Reports are cached until the next candle close of the finest
+    timeframe (see `report_expiry`) and concurrent requests of the same
+    report share one market scan. After every scan, the daily signals
+    of the last closed bars are diffed by the alert engine, which pushes
+    transitions to subscribed chats (see `AlertEngine`); signals of the
+    live bar flap with its price and are not alerted. Daily reports on
+    the live bar are read from the kline stream of the market when it is
+    streamed (see `stream_live_signals`)
+    """
+    timeframes = tuple(timeframes)
+    live = get_live_signals(exchange, pair)
+    if current and timeframes == ("1d",) and live is not None:
+        # streamed signals follow the live bar already
+        return format_cdc_template(exchange, live.signals())
+
+    base_timeframe: str = finest_timeframe(timeframes)
+    cache = get_report_cache()
+    last_close, expires_at = report_expiry(
+        cache.clock(),
+        current,
+        TIMEFRAMES[base_timeframe],
+        TIMEFRAME_OFFSETS.get(base_timeframe, 0),
+    )
+
+    async def scan() -> str:
+        signals = await scan_cdc_timeframes(
+            pair, exchange, timeframes, current, max_concurrency
+        )
+        if "1d" in signals:
+            closed = get_indicator_engine().closed_signals(
+                exchange,
+                ExchangeProvider.provide(exchange).get_interval("1d"),
+                signals["1d"],
+            )
+            get_alert_engine().refresh(exchange, pair, closed)
+        return "\n".join(
+            format_cdc_template(exchange, signals[timeframe], timeframe)
+            for timeframe in timeframes
+        )
+
+    return await cache.aget_or_compute(
+        (exchange, pair, current, timeframes, last_close), scan, expires_at
+    )
+
+
+def get_cdc_template(
+    pair: Pairs = Pairs.USDT,
+    exchange: Exchange = Exchange.BINANCE,
+    current: bool = True,
+    max_concurrency: Optional[int] = None,
+    timeframes: Sequence[str] = ("1d",),
+) -> str:
+    return asyncio.run(
+        async_get_cdc_template(pair, exchange, current, max_concurrency, timeframes)
+    )
+
+
+async def stream_live_signals(exchange: Exchange, pair: Pairs) -> None:
+    """
+    Keep daily signals of `pair` market up to date from its kline stream
+    and alert subscribers as soon as a bar closes on a new signal
+    """
+    exchange_api = ExchangeProvider.provide(exchange)
+    tickers = await asyncio.to_thread(get_tickers, exchange_api, pair)
+    alerts = get_alert_engine()
+    live = LiveSignals(
+        on_close=lambda symbol, signal: alerts.refresh(exchange, pair, {symbol: signal})
+    )
+    streamer = KlineStreamer(exchange, tickers, live=live)
+    register_live_signals(exchange, pair, live)
+    await streamer.run()
+
+
+def fetch_dashboard_data() -> Dict[str, Any]:
+    """Macro data of the Bitcoin dashboard by source name"""
+    logger.info("Fetching macro data...")
+    # sources are fetched concurrently and served from cache while fresh,
+    # a source that fails or is slow to refresh is served from cache too
+    macro_data = get_macro_data().get_many(
+        [
+            "btc_dominance",
+            "btc_usdt",
+            "open_interest",
+            "altcoin_index",
+            "fear_and_greed",
+        ],
+        revalidate=True,
+    )
     logger.info("Finish fetching!")
+    return macro_data
+
+
+def get_bitcoin_template() -> Tuple[str, bytes]:
+    """Return the Bitcoin dashboard text and its chart as PNG bytes"""
+    return render_bitcoin_template(fetch_dashboard_data())
+
+
+async def async_get_bitcoin_template() -> Tuple[str, bytes]:
+    """
+    `get_bitcoin_template` with the macro data fetched in the worker pool,
+    so only the rendering occupies the chart worker
+    """
+    macro_data = await run_in_worker(fetch_dashboard_data)
+    return await run_in_chart_worker(render_bitcoin_template, macro_data)
+
+
+def render_bitcoin_template(macro_data: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Bitcoin dashboard text and its chart from `fetch_dashboard_data`"""
+    # the plotting stack is only loaded by commands that draw charts
+    from ta import trend
+
+    from .charts import render_dashboard
+
+    btc_dominance: float = macro_data["btc_dominance"]
+    btc_usdt_candle: pd.DataFrame = macro_data["btc_usdt"]
+    history: OpenInterestHistory = macro_data["open_interest"]
+    altcoin_idx: pd.Series = macro_data["altcoin_index"]
+    fng_idx: pd.Series = macro_data["fear_and_greed"]
 
     smooth_alt_idx = pd.Series(
         trend.sma_indicator(altcoin_idx, 2),
         index=altcoin_idx.index,
         name="Altcoin Season Index",
     )
-    aggregated_oi: pd.Series = pd.Series(
-        np.array([x.resample("1D").mean().values for x in oi.values()]).sum(0),
-        index=oi["binance"].resample("1D").mean().index,
-        name="Aggregated Open Interest",
-    )
+    aggregated_oi: pd.Series = history.series(AGGREGATED, "1d")
 
     oi_gain: float = (aggregated_oi[-1] - aggregated_oi[-2]) / aggregated_oi[-2]
     oi_gain_fmt: str = (
@@ -367,5 +630,32 @@ def get_bitcoin_template(img_path: str) -> str:
         .join(fng_idx)
         .join(aggregated_oi)
     )
-    generate_image(dataset.iloc[-300:], img_path)
-    return btc_template
+    dataset = dataset.iloc[-300:]
+    dashboard: bytes = render_dashboard(dataset)
+    get_warm_state().set_dashboard(btc_template, dataset, dashboard)
+    return btc_template, dashboard
+
+
+async def refresh_warm_state() -> None:
+    """
+    Recompute the dashboard and the CDC reports restored from a stale
+    snapshot in the background, then save a new snapshot
+    """
+    state = get_warm_state()
+    if state.refreshing:
+        return
+    state.refreshing = True
+    try:
+        logger.info("Refreshing warm state...")
+        await async_get_bitcoin_template()
+        # report keys are (exchange, pair, current, timeframes, last close)
+        scans = {key[:4] for key in state.pop_stale_reports()}
+        for exchange, pair, current, timeframes in scans:
+            await run_in_worker(
+                get_cdc_template, pair, exchange, current, None, timeframes
+            )
+        await run_in_worker(state.save, get_report_cache())
+    except Exception as e:
+        logger.warning(f"Could not refresh warm state: {e}")
+    finally:
+        state.refreshing = False
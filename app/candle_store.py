@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import threading
+from typing import Optional, Type
+
+import pandas as pd
+from loguru import logger
+
+from .exchanges.backfill import catch_up
+from .exchanges.base_exchange import ExchangeAPI
+from .storage import data_path
+
+CANDLE_COLUMNS = ["open", "close", "high", "low", "volume"]
+
+
+class CandleStore:
+    """
+    On-disk OHLCV store keyed by (exchange, symbol, interval).
+
+    Candles are kept in a SQLite table indexed by their open time so that
+    a sync only needs to download candles from the last stored open time
+    onward. The last stored candle is re-downloaded on every sync since
+    it is usually the unfinished live bar.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS candles ("
+                " exchange TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " interval TEXT NOT NULL,"
+                " open_time INTEGER NOT NULL,"
+                " open REAL, close REAL, high REAL, low REAL, volume REAL,"
+                " PRIMARY KEY (exchange, symbol, interval, open_time)"
+                ")"
+            )
+            # earliest open time the stored history has been backfilled from
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS backfills ("
+                " exchange TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " interval TEXT NOT NULL,"
+                " start_time INTEGER NOT NULL,"
+                " PRIMARY KEY (exchange, symbol, interval)"
+                ")"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def last_open_time(
+        self, exchange: str, symbol: str, interval: str
+    ) -> Optional[pd.Timestamp]:
+        with self._lock:
+            (last,) = self._conn.execute(
+                "SELECT MAX(open_time) FROM candles"
+                " WHERE exchange = ? AND symbol = ? AND interval = ?",
+                (exchange, symbol, interval),
+            ).fetchone()
+        return None if last is None else pd.Timestamp(last, unit="s")
+
+    def backfilled_since(
+        self, exchange: str, symbol: str, interval: str
+    ) -> Optional[pd.Timestamp]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_time FROM backfills"
+                " WHERE exchange = ? AND symbol = ? AND interval = ?",
+                (exchange, symbol, interval),
+            ).fetchone()
+        return None if row is None else pd.Timestamp(row[0], unit="s")
+
+    def mark_backfilled(
+        self, exchange: str, symbol: str, interval: str, start: pd.Timestamp
+    ) -> None:
+        """Record that history of `symbol` is complete from `start` onward"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backfills"
+                " (exchange, symbol, interval, start_time) VALUES (?, ?, ?, ?)",
+                (exchange, symbol, interval, ExchangeAPI.to_unix_time(start)),
+            )
+
+    def load(self, exchange: str, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT open_time, open, close, high, low, volume FROM candles"
+                " WHERE exchange = ? AND symbol = ? AND interval = ?"
+                " ORDER BY open_time",
+                (exchange, symbol, interval),
+            ).fetchall()
+        if len(rows) == 0:
+            return None
+
+        candle_data = pd.DataFrame(rows, columns=["open_time", *CANDLE_COLUMNS])
+        candle_data.index = pd.to_datetime(candle_data.pop("open_time"), unit="s")
+        candle_data.index.name = None
+        return candle_data.astype(float)
+
+    def save(
+        self, exchange: str, symbol: str, interval: str, candle_data: pd.DataFrame
+    ) -> None:
+        candle_data = candle_data[CANDLE_COLUMNS].dropna(how="all")
+        open_times = pd.to_datetime(candle_data.index).asi8 // 10**9
+        records = [
+            (exchange, symbol, interval, int(open_time), *values)
+            for open_time, values in zip(
+                open_times, candle_data.itertuples(index=False, name=None)
+            )
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles"
+                " (exchange, symbol, interval, open_time,"
+                " open, close, high, low, volume)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+
+    def sync(
+        self,
+        exchange_api: Type[ExchangeAPI],
+        symbol: str,
+        interval: Optional[str] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Download candles newer than the last stored one and return
+        the full stored history of `symbol` at `interval` (default to
+        the adapter's `default_interval`). A store more than a kline
+        page behind is caught up page by page (see `catch_up`)
+
+        Return
+        ------
+        candle_data: Optional[pd.DataFrame]
+            Candle data in the same layout as `generate_candle_data`.
+            None if the exchange returns no data for `symbol`
+        """
+        exchange: str = exchange_api.exchange
+        interval = interval or exchange_api.default_interval
+        since: Optional[pd.Timestamp] = self.last_open_time(exchange, symbol, interval)
+
+        if since is None:
+            candle_data = exchange_api.generate_candle_data(symbol, interval=interval)
+        else:
+            # the store may be several pages behind
+            candle_data = catch_up(exchange_api, symbol, interval, since)
+        if candle_data is None or len(candle_data) == 0:
+            return None
+        logger.debug(f"{exchange}:{symbol} fetched {len(candle_data)} candles")
+
+        self.save(exchange, symbol, interval, candle_data)
+        return self.load(exchange, symbol, interval)
+
+
+_candle_store: Optional[CandleStore] = None
+
+
+def get_candle_store() -> Optional[CandleStore]:
+    """
+    Return the shared candle store located at `CANDLE_STORE_PATH`
+    (default to `<DATA_DIR>/candles.sqlite`). Setting `CANDLE_STORE_PATH`
+    to an empty string disables the store
+    """
+    global _candle_store
+    path: Optional[str] = os.getenv("CANDLE_STORE_PATH")
+    if path is None:
+        path = data_path("candles.sqlite")
+    if path == "":
+        return None
+    if _candle_store is None or _candle_store.path != path:
+        _candle_store = CandleStore(path)
+    return _candle_store
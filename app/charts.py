@@ -0,0 +1,188 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence, Union
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+
+class ChartCache:
+    """
+    Least recently used cache of rendered PNGs keyed by `chart_key`
+
+    Arguments
+    ---------
+    maxsize: int
+        Number of charts kept in memory
+    """
+
+    def __init__(self, maxsize: int = 32) -> None:
+        self.maxsize: int = maxsize
+        self._lock = threading.Lock()
+        self._charts: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._charts.get(key)
+            if png is not None:
+                self._charts.move_to_end(key)
+            return png
+
+    def put(self, key: str, png: bytes) -> None:
+        with self._lock:
+            self._charts[key] = png
+            self._charts.move_to_end(key)
+            while len(self._charts) > self.maxsize:
+                self._charts.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._charts.clear()
+
+
+_chart_cache: Optional[ChartCache] = None
+
+
+def get_chart_cache() -> ChartCache:
+    """Shared chart cache holding `CHART_CACHE_SIZE` charts (default to 32)"""
+    global _chart_cache
+    if _chart_cache is None:
+        _chart_cache = ChartCache(int(os.getenv("CHART_CACHE_SIZE", "32")))
+    return _chart_cache
+
+
+def chart_key(
+    name: str, data: Sequence[Union[pd.Series, pd.DataFrame]], *params: str
+) -> str:
+    """Hash of a chart's name, input data (values, index and names) and params"""
+    digest = hashlib.sha1(name.encode())
+    for item in data:
+        names = item.columns if isinstance(item, pd.DataFrame) else [item.name]
+        digest.update(repr(list(names)).encode())
+        digest.update(pd.util.hash_pandas_object(item, index=True).values.tobytes())
+    for param in params:
+        digest.update(param.encode())
+    return digest.hexdigest()
+
+
+def _format_thousands(x: float, pos: int) -> str:
+    return format(int(x), ",")
+
+
+def _to_png(fig: Figure, extra_artists: Sequence) -> bytes:
+    """Render `fig` to PNG bytes and release it"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(
+            buffer,
+            format="png",
+            bbox_extra_artists=extra_artists,
+            bbox_inches="tight",
+        )
+    finally:
+        fig.clear()
+    return buffer.getvalue()
+
+
+def _new_figure(figsize) -> Figure:
+    # figures made without pyplot are not tracked globally, so they are
+    # freed as soon as they are rendered and can be drawn from any thread
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def render_dashboard(data: pd.DataFrame) -> bytes:
+    """
+    Render the Bitcoin dashboard of `data`, a daily frame with BTCUSDT
+    `close`, altcoin season index, fear and greed index and aggregated
+    open interest columns. Identical data is rendered once
+    """
+    cache = get_chart_cache()
+    key = chart_key("dashboard", [data])
+    png = cache.get(key)
+    if png is not None:
+        return png
+
+    fig = _new_figure((10, 10))
+    gs = fig.add_gridspec(3, hspace=0)
+    axs = gs.subplots(sharex=True)
+    last_date: str = pd.Timestamp(data.index[-1]).strftime("%d-%m-%Y")
+    fig.suptitle(f"Bitcoin Dashboard\n{last_date}", fontweight="bold", fontsize=24)
+
+    iterator = [
+        ("Altcoin Season Index", "red"),
+        ("Fear and Greed Index", "green"),
+        ("Aggregated Open Interest", "blue"),
+    ]
+    for i, (col, color) in enumerate(iterator):
+        axs[i].plot(data.index, data[col].values, label=col, color=color)
+        latest_value = data[col].dropna()
+        if len(latest_value) > 0:
+            axs[i].axhline(
+                latest_value.iloc[-1], linestyle="--", alpha=0.4, color="black"
+            )
+        axs[i].get_yaxis().set_major_formatter(FuncFormatter(_format_thousands))
+
+        ax2 = axs[i].twinx()
+        ax2.plot(
+            data.index,
+            data["close"].values,
+            color="orange",
+            alpha=0.7,
+            label="BTCUSDT (close)" if i == 0 else None,
+        )
+        ax2.axhline(data["close"].values[-1], linestyle="--", alpha=0.2, color="brown")
+        ax2.get_yaxis().set_major_formatter(FuncFormatter(_format_thousands))
+    for ax in axs:
+        ax.label_outer()
+
+    lgd = fig.legend(loc="lower right", bbox_to_anchor=(1.22, 0.45))
+    png = _to_png(fig, (lgd,))
+    cache.put(key, png)
+    return png
+
+
+def render_open_interest(exchange: str, oi: pd.Series, btcusdt: pd.Series) -> bytes:
+    """Render open interest of `exchange` against BTCUSDT close price"""
+    cache = get_chart_cache()
+    key = chart_key("open_interest", [oi, btcusdt], exchange)
+    png = cache.get(key)
+    if png is not None:
+        return png
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+
+    ax.plot(oi.index, oi.values)
+    ax.axhline(
+        oi.iloc[-1],
+        linestyle="--",
+        alpha=0.4,
+        color="black",
+        label="Future Open Interest (USD)",
+    )
+    ax.get_yaxis().set_major_formatter(FuncFormatter(_format_thousands))
+
+    ax2 = ax.twinx()
+    ax2.plot(
+        btcusdt.index,
+        btcusdt.values,
+        color="orange",
+        alpha=0.7,
+        label="BTCUSDT (close)",
+    )
+    ax2.axhline(btcusdt.values[-1], linestyle="--", alpha=0.2, color="brown")
+    ax2.get_yaxis().set_major_formatter(FuncFormatter(_format_thousands))
+
+    ax.label_outer()
+    fig.suptitle(f"{exchange} Open Interest", fontweight="bold", fontsize=24)
+    lgd = fig.legend()
+    png = _to_png(fig, (lgd,))
+    cache.put(key, png)
+    return png
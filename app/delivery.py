@@ -0,0 +1,213 @@
+import asyncio
+import os
+import random
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from loguru import logger
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+Send = Callable[[], Awaitable[Any]]
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing `rate` operations per second, `burst` at once"""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate: float = rate
+        self.capacity: float = float(burst)
+        self.tokens: float = float(burst)
+        self.updated_at: float = time.monotonic()
+        self.paused_until: float = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold every acquisition for the next `seconds`"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    retry_after: Union[int, float, timedelta] = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class DeliveryQueue:
+    """
+    Outbound Telegram delivery queue.
+
+    Messages to one chat are sent in order by a worker of that chat
+    while different chats are served in parallel. Every send waits for
+    both the global and the per-chat rate limit. Flood control errors
+    (`RetryAfter`) pause every chat for the requested time and network
+    errors are retried with exponential backoff. The worker of a chat
+    exits once it has been idle for `idle_timeout` seconds.
+
+    Arguments
+    ---------
+    global_rate: float
+        Messages per second sent across all chats
+    chat_rate: float
+        Messages per second sent to a single chat
+    chat_burst: int
+        Messages sent to a single chat at once before `chat_rate` applies
+    max_attempts: int
+        Attempts per message before its delivery fails
+    backoff: float
+        Seconds to wait after the first network error, doubled after
+        every following one and capped at `max_backoff`
+    idle_timeout: float
+        Seconds without messages before the worker of a chat exits
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_attempts: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        idle_timeout: float = 60.0,
+    ) -> None:
+        self.chat_rate: float = chat_rate
+        self.chat_burst: int = chat_burst
+        self.max_attempts: int = max_attempts
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.idle_timeout: float = idle_timeout
+        self._global_limiter = AsyncRateLimiter(global_rate, max(1, int(global_rate)))
+        self._queues: Dict[Any, asyncio.Queue] = {}
+        self._workers: Dict[Any, asyncio.Task] = {}
+
+    def submit(self, chat_id: Any, send: Send) -> asyncio.Future:
+        """
+        Queue `send` for `chat_id` and return a future of its result.
+        The caller does not have to wait for the delivery
+        """
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        if chat_id not in self._queues:
+            self._queues[chat_id] = asyncio.Queue()
+            self._workers[chat_id] = asyncio.create_task(
+                self._work(chat_id, self._queues[chat_id])
+            )
+        self._queues[chat_id].put_nowait((send, future))
+        return future
+
+    def send_message(self, bot, chat_id: Any, text: str, **kwargs) -> asyncio.Future:
+        return self.submit(
+            chat_id, lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        )
+
+    def send_photo(
+        self, bot, chat_id: Any, photo: bytes, caption: str = "", **kwargs
+    ) -> asyncio.Future:
+        return self.submit(
+            chat_id,
+            lambda: bot.send_photo(
+                chat_id=chat_id, photo=photo, caption=caption, **kwargs
+            ),
+        )
+
+    async def _work(self, chat_id: Any, queue: asyncio.Queue) -> None:
+        chat_limiter = AsyncRateLimiter(self.chat_rate, self.chat_burst)
+        while True:
+            try:
+                send, future = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if not queue.empty():
+                    continue
+                # nothing is awaited until the next submit sees the chat gone
+                if self._queues.get(chat_id) is queue:
+                    del self._queues[chat_id]
+                    del self._workers[chat_id]
+                return
+            try:
+                if future.cancelled():
+                    continue
+                result, error = await self._deliver(chat_id, send, chat_limiter)
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+            finally:
+                queue.task_done()
+
+    async def _deliver(
+        self, chat_id: Any, send: Send, chat_limiter: AsyncRateLimiter
+    ) -> Tuple[Any, Optional[BaseException]]:
+        delay: float = self.backoff
+        for attempt in range(1, self.max_attempts + 1):
+            await chat_limiter.acquire()
+            await self._global_limiter.acquire()
+            try:
+                return await send(), None
+            except RetryAfter as e:
+                wait = retry_after_seconds(e)
+                logger.warning(f"Flood control on chat {chat_id}, waiting {wait}s")
+                # the flood limit is enforced across the bot, hold every chat
+                self._global_limiter.pause(wait)
+            except BadRequest as e:
+                # the request itself is invalid, retrying would not help
+                return None, e
+            except NetworkError as e:
+                if attempt == self.max_attempts:
+                    return None, e
+                wait = min(delay, self.max_backoff) * (1 + random.random() / 2)
+                logger.warning(f"Error sending to chat {chat_id}, retry in {wait:.1f}s")
+                await asyncio.sleep(wait)
+                delay *= 2
+            except Exception as e:
+                return None, e
+        return None, RuntimeError(f"Could not deliver to chat {chat_id}")
+
+    async def join(self) -> None:
+        """Wait until every queued message has been handled"""
+        await asyncio.gather(*[queue.join() for queue in self._queues.values()])
+
+    async def close(self) -> None:
+        await self.join()
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+
+
+_delivery_queues: Dict[asyncio.AbstractEventLoop, DeliveryQueue] = {}
+
+
+def get_delivery_queue() -> DeliveryQueue:
+    """
+    Return the delivery queue of the running event loop, limited to
+    `TELEGRAM_GLOBAL_RATE` (default to 30) messages per second overall
+    and `TELEGRAM_CHAT_RATE` (default to 1) per chat
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _delivery_queues:
+        for other in [other for other in _delivery_queues if other.is_closed()]:
+            del _delivery_queues[other]
+        _delivery_queues[loop] = DeliveryQueue(
+            global_rate=float(os.getenv("TELEGRAM_GLOBAL_RATE", "30")),
+            chat_rate=float(os.getenv("TELEGRAM_CHAT_RATE", "1")),
+        )
+    return _delivery_queues[loop]
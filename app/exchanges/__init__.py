@@ -1,9 +1,24 @@
+import importlib
+from typing import Any
+
 from .base_exchange import ExchangeAPI
-from .binance_api import BinanceAPI
-from .bitkub_api import BitkubAPI
-from .ftx_api import FtxAPI
-from .kucoin_api import KucoinAPI
-from .okx_api import OkxAPI
+
+# adapters are imported on first access, so using one exchange does not
+# load every other adapter
+_ADAPTERS = {
+    "BinanceAPI": ".binance_api",
+    "BitkubAPI": ".bitkub_api",
+    "FtxAPI": ".ftx_api",
+    "KucoinAPI": ".kucoin_api",
+    "OkxAPI": ".okx_api",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _ADAPTERS:
+        module = importlib.import_module(_ADAPTERS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = ["ExchangeAPI", "BinanceAPI", "BitkubAPI", "FtxAPI", "KucoinAPI", "OkxAPI"]
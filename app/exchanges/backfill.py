@@ -0,0 +1,230 @@
+import asyncio
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+import pandas as pd
+from loguru import logger
+
+from app.exchanges.base_exchange import ExchangeAPI
+from app.resample import TIMEFRAMES, finest_timeframe
+from app.workers import get_fetch_pool
+
+if TYPE_CHECKING:
+    from app.candle_store import CandleStore
+
+# bars of the coarsest timeframe loaded by a multi-timeframe scan, enough
+# for its moving averages to settle
+HISTORY_BARS: int = 200
+
+
+def page_windows(
+    start: int, end: int, period: int, page_size: int
+) -> List[Tuple[int, int]]:
+    """
+    Split unix times [start, end) into windows holding at most
+    `page_size` bars of `period` seconds
+    """
+    span: int = period * page_size
+    first: int = start // period * period
+    return [(since, min(since + span, end)) for since in range(first, end, span)]
+
+
+def stitch_pages(pages: Iterable[Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+    """
+    Join candle data pages into one series ordered by open time. Bars
+    returned by several pages are kept once, from the latest page
+    """
+    pages = [page for page in pages if page is not None and len(page) > 0]
+    if len(pages) == 0:
+        return None
+    candle_data = pd.concat(pages).sort_index(kind="stable")
+    return candle_data[~candle_data.index.duplicated(keep="last")]
+
+
+def catch_up(
+    exchange_api: Type[ExchangeAPI],
+    symbol: str,
+    interval: str,
+    since: pd.Timestamp,
+) -> Optional[pd.DataFrame]:
+    """
+    Fetch candles of `symbol` opened at or after `since`, the live one
+    included. Windows of `page_size` candles are requested one after
+    another with `fetch_candle_page` until a page is not full, so a
+    stored history any number of pages behind is caught up without a
+    gap. Adapters without paginated candle data, and intervals outside
+    `app.resample.TIMEFRAMES`, make a single `generate_candle_data` call
+    """
+    timeframes: Dict[str, str] = {
+        name: tf for tf, name in exchange_api.intervals.items()
+    }
+    paginated: bool = (
+        exchange_api.fetch_candle_page is not ExchangeAPI.fetch_candle_page
+    )
+    if not paginated or interval not in timeframes:
+        return exchange_api.generate_candle_data(symbol, interval=interval, since=since)
+
+    span: int = TIMEFRAMES[timeframes[interval]] * exchange_api.page_size
+    start: int = ExchangeAPI.to_unix_time(since)
+    pages: List[Optional[pd.DataFrame]] = []
+    while start <= time.time():
+        page = exchange_api.fetch_candle_page(
+            symbol,
+            interval,
+            pd.Timestamp(start, unit="s"),
+            pd.Timestamp(start + span, unit="s"),
+        )
+        pages.append(page)
+        if page is None or len(page) < exchange_api.page_size:
+            break
+        start += span
+    return stitch_pages(pages)
+
+
+def history_start(
+    exchange_api: Type[ExchangeAPI],
+    timeframes: Sequence[str],
+    now: Optional[float] = None,
+) -> Optional[pd.Timestamp]:
+    """
+    Open time from which a scan on `timeframes` needs candles of the
+    finest timeframe to cover `HISTORY_BARS` bars of the coarsest one.
+    None if a single kline page already covers them, or if the scan
+    only runs on one timeframe: its candles are fetched natively by the
+    adapter like a plain daily scan
+    """
+    base_timeframe: str = finest_timeframe(timeframes)
+    if set(timeframes) == {base_timeframe}:
+        return None
+    span: int = HISTORY_BARS * max(TIMEFRAMES[timeframe] for timeframe in timeframes)
+    if span <= exchange_api.page_size * TIMEFRAMES[base_timeframe]:
+        return None
+    now = time.time() if now is None else now
+    return pd.Timestamp(int(now) - span, unit="s")
+
+
+async def iter_backfill(
+    exchange_api: Type[ExchangeAPI],
+    symbols: Iterable[str],
+    timeframe: str,
+    start: pd.Timestamp,
+    end: Optional[pd.Timestamp] = None,
+    max_concurrency: Optional[int] = None,
+    store: Optional["CandleStore"] = None,
+) -> AsyncIterator[Tuple[str, Optional[pd.DataFrame]]]:
+    """
+    Download candle history of many symbols and yield them in the order
+    they complete.
+
+    The range of every symbol is split into windows of `page_size`
+    candles that are fetched concurrently, then stitched into a single
+    series. Pages of all symbols share `max_concurrency` requests on the
+    fetch pool (see `get_fetch_pool`) so a backfill of a whole market
+    stays within the exchange rate limits; 429 responses are retried by
+    the HTTP client
+
+    Arguments
+    ---------
+    exchange_api: Type[ExchangeAPI]
+        An exchange adapter implementing `fetch_candle_page`
+    symbols: Iterable[str]
+        Symbols to download
+    timeframe: str
+        Timeframe of the candles, one of `app.resample.TIMEFRAMES`
+    start: pd.Timestamp
+        Open time of the first candle
+    end: Optional[pd.Timestamp]
+        Open time after the last candle. Default to now, the live
+        candle included
+    max_concurrency: Optional[int]
+        Maximum number of in-flight requests. Default to the
+        adapter's `max_concurrency`
+    store: Optional[CandleStore]
+        If given, downloaded candles are saved to the store and the
+        full stored history is yielded. Symbols already backfilled
+        from `start` only download candles from their last stored one
+
+    Return
+    ------
+    An async iterator of (symbol, candle_data) tuples
+    """
+    limit: int = max_concurrency or exchange_api.max_concurrency
+    exchange: str = exchange_api.exchange
+    interval: str = exchange_api.get_interval(timeframe)
+    period: int = TIMEFRAMES[timeframe]
+    start_time: int = ExchangeAPI.to_unix_time(start)
+    end_time: int = (
+        int(time.time()) + period if end is None else ExchangeAPI.to_unix_time(end)
+    )
+    loop = asyncio.get_running_loop()
+    executor = get_fetch_pool()
+    semaphore = asyncio.Semaphore(limit)
+
+    def resume_time(symbol: str) -> int:
+        if store is not None:
+            since = store.backfilled_since(exchange, symbol, interval)
+            last = store.last_open_time(exchange, symbol, interval)
+            if since is not None and last is not None and since <= start:
+                # the last stored candle is usually the unfinished live bar
+                return ExchangeAPI.to_unix_time(last)
+        return start_time
+
+    def fetch_page(symbol: str, window: Tuple[int, int]) -> Optional[pd.DataFrame]:
+        since, until = window
+        return exchange_api.fetch_candle_page(
+            symbol,
+            interval,
+            pd.Timestamp(since, unit="s"),
+            pd.Timestamp(until, unit="s"),
+        )
+
+    async def fetch_page_limited(
+        symbol: str, window: Tuple[int, int]
+    ) -> Optional[pd.DataFrame]:
+        async with semaphore:
+            return await loop.run_in_executor(executor, fetch_page, symbol, window)
+
+    def save(
+        symbol: str, candle_data: Optional[pd.DataFrame], complete: bool
+    ) -> Optional[pd.DataFrame]:
+        if candle_data is not None:
+            store.save(exchange, symbol, interval, candle_data)
+        if complete:
+            store.mark_backfilled(exchange, symbol, interval, start)
+        return store.load(exchange, symbol, interval)
+
+    async def backfill(symbol: str) -> Tuple[str, Optional[pd.DataFrame]]:
+        since: int = await loop.run_in_executor(executor, resume_time, symbol)
+        windows = page_windows(since, end_time, period, exchange_api.page_size)
+        pages = await asyncio.gather(
+            *[fetch_page_limited(symbol, window) for window in windows]
+        )
+        candle_data = stitch_pages(pages)
+        logger.debug(
+            f"{exchange}:{symbol} fetched {len(windows)} pages,"
+            f" {0 if candle_data is None else len(candle_data)} candles"
+        )
+        if store is None:
+            return symbol, candle_data
+        candle_data = await loop.run_in_executor(
+            executor, save, symbol, candle_data, since == start_time
+        )
+        return symbol, candle_data
+
+    tasks = [asyncio.ensure_future(backfill(symbol)) for symbol in symbols]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,29 +1,132 @@
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from app.enums.exchange import Exchange
+
 
 class PairNotSupportedException(Exception):
     pass
 
 
+class IntervalNotSupportedException(Exception):
+    pass
+
+
 class ExchangeAPI(ABC):
     base_url: str
+    exchange: Exchange
+    # interval used when fetching candle data without specifying one
+    default_interval: str = "1d"
+    # exchange interval names of the timeframes in `app.resample.TIMEFRAMES`
+    intervals: Dict[str, str] = {"1h": "1h", "4h": "4h", "1d": "1d", "1w": "1w"}
+    # maximum number of candles returned by one kline request
+    page_size: int = 500
+    # maximum number of concurrent kline requests during a market scan
+    max_concurrency: int = 8
+    # seconds a fetched market universe is reused by ticker lookups
+    universe_ttl: float = 300.0
+
+    _universe: Optional[Tuple[float, List[str]]] = None
+    _universe_fetch: Optional[Future] = None
+    _universe_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # every adapter caches its universe under a lock of its own
+        cls._universe = None
+        cls._universe_fetch = None
+        cls._universe_lock = threading.Lock()
+
+    @staticmethod
+    def to_unix_time(timestamp: pd.Timestamp) -> int:
+        """Convert a naive UTC timestamp to unix time in seconds"""
+        return int(pd.Timestamp(timestamp).timestamp())
 
     @staticmethod
     @abstractmethod
-    def generate_candle_data(symbol: str, interval: str = "1d") -> pd.DataFrame:
+    def generate_candle_data(
+        symbol: str, interval: str = "1d", since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """
+        Fetch candle data of `symbol`. If `since` is given, only candles
+        opened at or after `since` are requested
+        """
         pass
 
+    @staticmethod
+    def fetch_candle_page(
+        symbol: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fetch at most `page_size` candles of `symbol` opened at or after
+        `start` and before `end` with a single request
+        """
+        raise NotImplementedError("paginated candle data is not implemented")
+
+    @classmethod
+    def get_interval(cls, timeframe: str) -> str:
+        """Interval name the exchange uses for `timeframe`"""
+        if timeframe not in cls.intervals:
+            raise IntervalNotSupportedException(
+                f"{timeframe} interval is not supported by {cls.__name__}"
+            )
+        return cls.intervals[timeframe]
+
     @staticmethod
     @abstractmethod
-    def get_usdt_tickers() -> List[str]:
+    def fetch_universe() -> List[str]:
+        """Fetch symbols of every market listed on the exchange"""
         pass
 
-    @staticmethod
+    @classmethod
+    def get_universe(cls) -> List[str]:
+        """
+        Symbols of every market listed on the exchange. The snapshot is
+        fetched once and shared by every ticker lookup for `universe_ttl`
+        seconds
+        """
+        with cls._universe_lock:
+            if cls._universe is not None and (
+                time.monotonic() - cls._universe[0] <= cls.universe_ttl
+            ):
+                return cls._universe[1]
+            # concurrent lookups share one fetch, made without the lock held
+            future = cls._universe_fetch
+            fetching: bool = future is None
+            if fetching:
+                future = cls._universe_fetch = Future()
+        if not fetching:
+            return future.result()
+
+        try:
+            universe = cls.fetch_universe()
+        except BaseException as e:
+            with cls._universe_lock:
+                cls._universe_fetch = None
+            future.set_exception(e)
+            raise
+        with cls._universe_lock:
+            cls._universe = (time.monotonic(), universe)
+            cls._universe_fetch = None
+        future.set_result(universe)
+        return universe
+
+    @classmethod
+    @abstractmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        pass
+
+    @classmethod
     @abstractmethod
-    def get_btc_tickers() -> List[str]:
+    def get_btc_tickers(cls) -> List[str]:
         pass
 
     @classmethod
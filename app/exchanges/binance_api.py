@@ -1,80 +1,85 @@
-import json
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
-import requests
 from loguru import logger
 
+from app.enums.exchange import Exchange
 from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.kline_decoder import decode_kline_rows, loads
+from app.exchanges.symbol_rules import SymbolRule
+from app.http_client import get_http_client
 
 
 class BinanceAPI(ExchangeAPI):
     base_url: str = "https://api.binance.com"
+    exchange: Exchange = Exchange.BINANCE
+    page_size: int = 1000
+    max_concurrency: int = 16
+    usdt_rule: SymbolRule = SymbolRule(
+        quote="USDT",
+        count_token="USD",
+        excluded=["UP", "DOWN", "BEAR", "BULL", "DAI"],
+        excluded_prefix="USDT",
+    )
+    btc_rule: SymbolRule = SymbolRule(
+        quote="BTC",
+        count_token="BTC",
+        excluded=["USD", "DOWN", "BEAR", "BULL", "DAI"],
+        excluded_prefix="BTC",
+    )
 
     @staticmethod
     def format_unixtime(unix_time: int):
         return datetime.utcfromtimestamp(int(str(unix_time)[:-3]))
 
     @staticmethod
-    def generate_candle_data(symbol: str, interval: str = "1d") -> pd.DataFrame:
-        r = requests.get(
-            f"{BinanceAPI.base_url}/api/v3/klines",
-            {"symbol": symbol, "interval": interval},
-        )
-        klines = json.loads(r.text)
-        candle_data = []
-        timestamp = []
+    def generate_candle_data(
+        symbol: str, interval: str = "1d", since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        params = {"interval": interval, "limit": BinanceAPI.page_size}
+        return BinanceAPI.get_klines(symbol, params, since)
+
+    @staticmethod
+    def fetch_candle_page(
+        symbol: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        params = {"interval": interval, "limit": BinanceAPI.page_size}
+        if end is not None:
+            # endTime is inclusive
+            params["endTime"] = BinanceAPI.to_unix_time(end) * 1000 - 1
+        return BinanceAPI.get_klines(symbol, params, start)
+
+    @staticmethod
+    def get_klines(
+        symbol: str, params: Dict[str, Any], since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        params = {"symbol": symbol, **params}
+        if since is not None:
+            params["startTime"] = BinanceAPI.to_unix_time(since) * 1000
+        r = get_http_client().get(f"{BinanceAPI.base_url}/api/v3/klines", params)
+        klines = loads(r.content)
+        # error responses are a JSON object instead of a list of klines
+        assert isinstance(klines, list), f"{symbol}: {klines}"
         for line in klines:
             assert len(line) == 12, f"{symbol}: {len(line)}"
-            open_time = BinanceAPI.format_unixtime(line[0])
-            timestamp.append(open_time)
-            # end_time = datetime.utcfromtimestamp(line[6])
-            volume = line[5]
-            high, low, op, close = line[2], line[3], line[1], line[4]
-            candle_data.append([op, close, high, low, volume])
-        candle_data = pd.DataFrame(
-            candle_data,
-            columns=["open", "close", "high", "low", "volume"],
-            index=timestamp,
-        )
-        return candle_data.astype(float)
+        # [open time, open, high, low, close, volume, ...]
+        return decode_kline_rows(klines, time_idx=0, column_idx=[1, 4, 2, 3, 5])
 
     @staticmethod
-    def get_usdt_tickers() -> List[str]:
-        r = requests.get(f"{BinanceAPI.base_url}/api/v3/ticker/price")
+    def fetch_universe() -> List[str]:
+        r = get_http_client().get(f"{BinanceAPI.base_url}/api/v3/ticker/price")
         logger.debug("binance response:", r)
-        tickers = json.loads(r.text)
-        return [
-            ticker["symbol"]
-            for ticker in tickers
-            if (
-                ticker["symbol"][:4] != "USDT"
-                and "USDT" in ticker["symbol"]
-                and "UP" not in ticker["symbol"]
-                and "DOWN" not in ticker["symbol"]
-                and "BEAR" not in ticker["symbol"]
-                and "BULL" not in ticker["symbol"]
-                and ticker["symbol"].count("USD") == 1
-                and "DAI" not in ticker["symbol"]
-            )
-        ]
+        tickers = loads(r.content)
+        return [ticker["symbol"] for ticker in tickers]
 
-    @staticmethod
-    def get_btc_tickers() -> List[str]:
-        r = requests.get(f"{BinanceAPI.base_url}/api/v3/ticker/price")
-        tickers = json.loads(r.text)
-        return [
-            ticker["symbol"]
-            for ticker in tickers
-            if (
-                ticker["symbol"][:3] != "BTC"
-                and "USD" not in ticker["symbol"]
-                and "BTC" in ticker["symbol"]
-                and "DOWN" not in ticker["symbol"]
-                and "BEAR" not in ticker["symbol"]
-                and "BULL" not in ticker["symbol"]
-                and "DAI" not in ticker["symbol"]
-                and ticker["symbol"].count("BTC") == 1
-            )
-        ]
+    @classmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        return cls.usdt_rule.apply(cls.get_universe())
+
+    @classmethod
+    def get_btc_tickers(cls) -> List[str]:
+        return cls.btc_rule.apply(cls.get_universe())
@@ -1,21 +1,36 @@
-import json
 import time
-from datetime import datetime
-from typing import List, Dict
+from typing import Dict, List, Optional
 
 import pandas as pd
-import requests
 
+from app.enums.exchange import Exchange
 from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.kline_decoder import build_candle_data, loads, to_datetime_index
+from app.exchanges.symbol_rules import SymbolRule
+from app.http_client import get_http_client
 
 
 class BitkubAPI(ExchangeAPI):
     base_url: str = "https://api.bitkub.com"
+    exchange: Exchange = Exchange.BITKUB
+    default_interval: str = "1D"
+    # tradingview resolutions, intraday ones are in minutes
+    intervals: Dict[str, str] = {"1h": "60", "4h": "240", "1d": "1D", "1w": "1W"}
+    page_size: int = 1000
+    max_concurrency: int = 8
+    thb_rule: SymbolRule = SymbolRule(
+        quote="THB",
+        count_token="THB",
+        excluded=["USD", "DOWN", "BEAR", "BULL", "DAI"],
+        excluded_prefix="USDT",
+    )
     reso_mapping: Dict[str, int] = {
         "15min": 900,
         "30min": 1800,
         "1h": 3600,
+        "60": 3600,
         "4h": 14400,
+        "240": 14400,
         "12h": 43200,
         "1D": 86400,
         "1W": 604800,
@@ -27,56 +42,61 @@ class BitkubAPI(ExchangeAPI):
         symbol: str,
         lookback: int = 100,  # numbers of candles to lookback
         interval: str = "1D",
+        since: Optional[pd.Timestamp] = None,
     ) -> pd.DataFrame:
         # format start, end time
         end = int(time.time())
         start = end - BitkubAPI.reso_mapping[interval] * lookback
+        if since is not None:
+            start = BitkubAPI.to_unix_time(since)
+        return BitkubAPI.get_klines(symbol, interval, start, end)
 
-        r = requests.get(
+    @staticmethod
+    def fetch_candle_page(
+        symbol: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        return BitkubAPI.get_klines(
+            symbol,
+            interval,
+            BitkubAPI.to_unix_time(start),
+            # `to` is inclusive
+            int(time.time()) if end is None else BitkubAPI.to_unix_time(end) - 1,
+        )
+
+    @staticmethod
+    def get_klines(symbol: str, interval: str, start: int, end: int) -> pd.DataFrame:
+        r = get_http_client().get(
             f"{BitkubAPI.base_url}/tradingview/history",
             {"symbol": symbol, "resolution": interval, "from": start, "to": end},
         )
-        klines = json.loads(r.text)
-        candle_data = []
-        timestamp = []
+        klines = loads(r.content)
         if klines["s"] == "no_data":
             return None
-        for T in range(len(klines["t"])):
-            open_time = datetime.utcfromtimestamp(int(klines["t"][T])).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
-            timestamp.append(open_time)
-            # end_time = datetime.utcfromtimestamp(l[6])
-            volume = klines["v"][T]
-            high, low, op, close = (
-                klines["h"][T],
-                klines["l"][T],
-                klines["o"][T],
-                klines["c"][T],
-            )
-            candle_data.append([op, close, high, low, volume])
-        candle_data = pd.DataFrame(
-            candle_data,
-            columns=["open", "close", "high", "low", "volume"],
-            index=timestamp,
+        # tradingview format, one array per column
+        return build_candle_data(
+            {
+                "open": klines["o"],
+                "close": klines["c"],
+                "high": klines["h"],
+                "low": klines["l"],
+                "volume": klines["v"],
+            },
+            index=to_datetime_index(klines["t"], unit="s"),
         )
-        return candle_data.astype(float)
 
     @staticmethod
-    def get_thb_tickers() -> List[str]:
-        r = requests.get(f"{BitkubAPI.base_url}/api/market/symbols")
-        tickers = json.loads(r.text)
+    def fetch_universe() -> List[str]:
+        r = get_http_client().get(f"{BitkubAPI.base_url}/api/market/symbols")
+        tickers = loads(r.content)
+        return [ticker["symbol"] for ticker in tickers["result"]]
+
+    @classmethod
+    def get_thb_tickers(cls) -> List[str]:
+        # market symbols are THB_BTC while tradingview symbols are BTC_THB
         return [
-            str(ticker["symbol"][4:] + "_" + ticker["symbol"][:3])
-            for ticker in tickers["result"]
-            if (
-                ticker["symbol"][:4] != "USDT"
-                and "THB" in ticker["symbol"]
-                and "USD" not in ticker["symbol"]
-                and "DOWN" not in ticker["symbol"]
-                and "BEAR" not in ticker["symbol"]
-                and "BULL" not in ticker["symbol"]
-                and "DAI" not in ticker["symbol"]
-                and ticker["symbol"].count("THB") == 1
-            )
+            str(symbol[4:] + "_" + symbol[:3])
+            for symbol in cls.thb_rule.apply(cls.get_universe())
         ]
@@ -0,0 +1,80 @@
+import asyncio
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Optional, Tuple, Type
+
+import pandas as pd
+from loguru import logger
+
+from app.exchanges.base_exchange import ExchangeAPI
+from app.workers import get_fetch_pool
+
+if TYPE_CHECKING:
+    from app.candle_store import CandleStore
+
+
+async def iter_candle_data(
+    exchange_api: Type[ExchangeAPI],
+    symbols: Iterable[str],
+    max_concurrency: Optional[int] = None,
+    store: Optional["CandleStore"] = None,
+    interval: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Optional[pd.DataFrame]]]:
+    """
+    Fetch candle data of many symbols concurrently and yield
+    them in the order they complete. Downloads run on the fetch pool
+    shared by every scan (see `get_fetch_pool`)
+
+    Arguments
+    ---------
+    exchange_api: Type[ExchangeAPI]
+        An exchange adapter whose `generate_candle_data` is called per symbol
+    symbols: Iterable[str]
+        Symbols to fetch
+    max_concurrency: Optional[int]
+        Maximum number of in-flight requests. Default to the
+        adapter's `max_concurrency`
+    store: Optional[CandleStore]
+        If given, candle data are read from the store and only
+        candles newer than the stored ones are downloaded
+    interval: Optional[str]
+        Exchange interval name of the candles. Default to the
+        adapter's `default_interval`
+
+    Return
+    ------
+    An async iterator of (symbol, candle_data) tuples. candle_data is
+    None for symbols whose fetch failed
+    """
+    limit: int = max_concurrency or exchange_api.max_concurrency
+    interval = interval or exchange_api.default_interval
+    loop = asyncio.get_running_loop()
+    executor = get_fetch_pool()
+    semaphore = asyncio.Semaphore(limit)
+
+    async def fetch(symbol: str) -> Tuple[str, Optional[pd.DataFrame]]:
+        async with semaphore:
+            try:
+                if store is None:
+                    candle_data = await loop.run_in_executor(
+                        executor,
+                        partial(
+                            exchange_api.generate_candle_data, symbol, interval=interval
+                        ),
+                    )
+                else:
+                    candle_data = await loop.run_in_executor(
+                        executor, store.sync, exchange_api, symbol, interval
+                    )
+            except Exception as e:
+                # one unavailable market does not abort the scan
+                logger.warning(f"{exchange_api.exchange}:{symbol} fetch failed: {e!r}")
+                candle_data = None
+        return symbol, candle_data
+
+    tasks = [asyncio.ensure_future(fetch(symbol)) for symbol in symbols]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,7 +1,8 @@
-from typing import Dict
+import importlib
+from typing import Dict, Type
 
 from app.enums.exchange import Exchange
-from app.exchanges import ExchangeAPI, BinanceAPI, BitkubAPI, OkxAPI, FtxAPI, KucoinAPI
+from app.exchanges import ExchangeAPI
 
 
 class ExchangeAPINotFoundException(Exception):
@@ -9,17 +10,19 @@ class ExchangeAPINotFoundException(Exception):
 
 
 class ExchangeProvider:
-    exchangeMapper: Dict[Exchange, ExchangeAPI] = {
-        Exchange.BINANCE: BinanceAPI,
-        Exchange.OKEX: OkxAPI,
-        Exchange.FTX: FtxAPI,
-        Exchange.KUCOIN: KucoinAPI,
-        Exchange.BITKUB: BitkubAPI,
+    # adapters are referenced by import path and imported on first use
+    exchangeMapper: Dict[Exchange, str] = {
+        Exchange.BINANCE: "app.exchanges.binance_api:BinanceAPI",
+        Exchange.OKEX: "app.exchanges.okx_api:OkxAPI",
+        Exchange.FTX: "app.exchanges.ftx_api:FtxAPI",
+        Exchange.KUCOIN: "app.exchanges.kucoin_api:KucoinAPI",
+        Exchange.BITKUB: "app.exchanges.bitkub_api:BitkubAPI",
     }
 
     @staticmethod
-    def provide(exchange: Exchange) -> ExchangeAPI:
+    def provide(exchange: Exchange) -> Type[ExchangeAPI]:
         if exchange not in ExchangeProvider.exchangeMapper:
             raise ExchangeAPINotFoundException(f"{exchange} not found in mapper")
 
-        return ExchangeProvider.exchangeMapper[exchange]
+        module_name, class_name = ExchangeProvider.exchangeMapper[exchange].split(":")
+        return getattr(importlib.import_module(module_name), class_name)
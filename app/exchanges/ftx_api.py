@@ -1,15 +1,42 @@
-import json
-from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import pandas as pd
-import requests
 
-from app.exchanges import ExchangeAPI
+from app.enums.exchange import Exchange
+from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.kline_decoder import build_candle_data, empty_candle_data, loads
+from app.exchanges.symbol_rules import SymbolRule
+from app.http_client import get_http_client
 
 
 class FtxAPI(ExchangeAPI):
     base_url: str = "https://ftx.com/api"
+    exchange: Exchange = Exchange.FTX
+    page_size: int = 1500
+    max_concurrency: int = 8
+    usdt_rule: SymbolRule = SymbolRule(
+        quote="USD",
+        count_token="USD",
+        excluded=[
+            "USDT",
+            "UP",
+            "DOWN",
+            "HALF/",
+            "HEDGE/",
+            "BEAR",
+            "BULL",
+            "DAI",
+        ],
+        excluded_prefix="USD",
+    )
+    perp_rule: SymbolRule = SymbolRule(quote="PERP")
+    btc_rule: SymbolRule = SymbolRule(
+        quote="BTC",
+        count_token="BTC",
+        excluded=["USD", "UP", "DOWN", "BEAR", "BULL", "DAI", "-"],
+        excluded_prefix="BTC",
+    )
+    intervals: Dict[str, str] = {"1h": "1h", "4h": "4h", "1d": "1d", "1w": "1W"}
     reso_mapping: Dict[str, int] = {
         "15min": 900,
         "30min": 1800,
@@ -22,82 +49,68 @@ class FtxAPI(ExchangeAPI):
     }
 
     @staticmethod
-    def generate_candle_data(market_name: str, resolution: str = "1d") -> pd.DataFrame:
-        timeframe = FtxAPI.reso_mapping[resolution]
+    def generate_candle_data(
+        market_name: str,
+        interval: str = "1d",
+        since: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        timeframe = FtxAPI.reso_mapping[interval]
 
         url: str = f"{FtxAPI.base_url}/markets/{market_name}/candles?resolution={timeframe}"  # &start_time={start_time}&end_time={end_time}"
-        r = requests.get(url)
+        if since is not None:
+            url += f"&start_time={FtxAPI.to_unix_time(since)}"
 
-        klines = json.loads(r.text)["result"]
+        candle_data = FtxAPI.get_klines(url)
+        if interval != "1d" or len(candle_data) == 0:
+            return candle_data
+        return candle_data.resample("1D").mean()
 
-        candle_data = []
-        timestamp = []
-        for line in klines:
-            open_time = datetime.strptime(line["startTime"], "%Y-%m-%dT%H:%M:%S+00:00")
-            timestamp.append(open_time)
-            volume = line["volume"]
-            high, low, op, close = (
-                line["high"],
-                line["low"],
-                line["open"],
-                line["close"],
-            )
-            candle_data.append([op, close, high, low, volume])
-        candle_data = pd.DataFrame(
-            candle_data,
-            columns=["open", "close", "high", "low", "volume"],
-            index=timestamp,
+    @staticmethod
+    def fetch_candle_page(
+        market_name: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        url: str = (
+            f"{FtxAPI.base_url}/markets/{market_name}/candles"
+            f"?resolution={FtxAPI.reso_mapping[interval]}"
+            f"&start_time={FtxAPI.to_unix_time(start)}"
         )
-        return candle_data.astype(float).resample("1D").mean()
+        if end is not None:
+            # end_time is inclusive
+            url += f"&end_time={FtxAPI.to_unix_time(end) - 1}"
+        return FtxAPI.get_klines(url)
 
     @staticmethod
-    def get_usdt_tickers() -> List[str]:
-        r = requests.get(f"{FtxAPI.base_url}/markets")
-        tickers = json.loads(r.text)
-        return [
-            ticker["name"]
-            for ticker in tickers["result"]
-            if (
-                ticker["name"][:3] != "USD"
-                and "USD" in ticker["name"]
-                and "USDT" not in ticker["name"]
-                and "UP" not in ticker["name"]
-                and "DOWN" not in ticker["name"]
-                and "HALF/" not in ticker["name"]
-                and "HEDGE/" not in ticker["name"]
-                and "BEAR" not in ticker["name"]
-                and "BULL" not in ticker["name"]
-                and ticker["name"].count("USD") == 1
-                and "DAI" not in ticker["name"]
-            )
-        ]
+    def get_klines(url: str) -> pd.DataFrame:
+        r = get_http_client().get(url)
 
-    @staticmethod
-    def get_perp_tickers() -> List[str]:
-        r = requests.get(f"{FtxAPI.base_url}/markets")
-        tickers = json.loads(r.text)
-        return [
-            ticker["name"] for ticker in tickers["result"] if "PERP" in ticker["name"]
-        ]
+        klines = pd.DataFrame(loads(r.content)["result"])
+        if len(klines) == 0:
+            return empty_candle_data()
+
+        return build_candle_data(
+            klines,
+            index=pd.DatetimeIndex(
+                pd.to_datetime(klines["startTime"], format="%Y-%m-%dT%H:%M:%S+00:00")
+            ),
+        )
 
     @staticmethod
-    def get_btc_tickers() -> List[str]:
-        r = requests.get(f"{FtxAPI.base_url}/markets")
-        tickers = json.loads(r.text)
+    def fetch_universe() -> List[str]:
+        r = get_http_client().get(f"{FtxAPI.base_url}/markets")
+        tickers = loads(r.content)
+        return [ticker["name"] for ticker in tickers["result"]]
+
+    @classmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        return cls.usdt_rule.apply(cls.get_universe())
+
+    @classmethod
+    def get_perp_tickers(cls) -> List[str]:
+        return cls.perp_rule.apply(cls.get_universe())
 
-        return [
-            ticker["name"]
-            for ticker in tickers["result"]
-            if (
-                ticker["name"][:3] != "BTC"
-                and "USD" not in ticker["name"]
-                and "BTC" in ticker["name"]
-                and "UP" not in ticker["name"]
-                and "DOWN" not in ticker["name"]
-                and "BEAR" not in ticker["name"]
-                and "BULL" not in ticker["name"]
-                and ticker["name"].count("BTC") == 1
-                and "DAI" not in ticker["name"]
-                and "-" not in ticker["name"]
-            )
-        ]
+    @classmethod
+    def get_btc_tickers(cls) -> List[str]:
+        return cls.btc_rule.apply(cls.get_universe())
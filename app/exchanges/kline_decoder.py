@@ -0,0 +1,77 @@
+import json
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+CANDLE_COLUMNS = ["open", "close", "high", "low", "volume"]
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """Decode a JSON payload, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def to_datetime_index(open_time: np.ndarray, unit: str) -> pd.DatetimeIndex:
+    """
+    Convert unix open times to a naive UTC `DatetimeIndex`.
+    Millisecond times are truncated to whole seconds
+    """
+    open_time = np.asarray(open_time).astype(np.int64)
+    if unit == "ms":
+        open_time = open_time // 1000
+    return pd.DatetimeIndex(open_time.astype("datetime64[s]").astype("datetime64[ns]"))
+
+
+def build_candle_data(
+    columns: Dict[str, Sequence[Any]], index: pd.DatetimeIndex
+) -> pd.DataFrame:
+    """Build candle data with float `CANDLE_COLUMNS` from raw columns"""
+    return pd.DataFrame(
+        {name: np.asarray(columns[name], dtype=float) for name in CANDLE_COLUMNS},
+        index=index,
+    )
+
+
+def empty_candle_data() -> pd.DataFrame:
+    return build_candle_data(
+        {name: [] for name in CANDLE_COLUMNS}, pd.DatetimeIndex([])
+    )
+
+
+def decode_kline_rows(
+    rows: List[List[Any]],
+    time_idx: int,
+    column_idx: Sequence[int],
+    unit: str = "ms",
+) -> pd.DataFrame:
+    """
+    Decode klines encoded as one array per candle (Binance, OKX, Kucoin)
+
+    Arguments
+    ---------
+    rows: List[List[Any]]
+        Decoded JSON klines
+    time_idx: int
+        Position of the candle open time in every row
+    column_idx: Sequence[int]
+        Positions of open, close, high, low and volume in every row
+    unit: str
+        Unit of the open time, "ms" or "s"
+    """
+    if len(rows) == 0:
+        return empty_candle_data()
+
+    # transpose rows into columns once, then convert each column in bulk
+    klines: List[tuple] = list(zip(*rows))
+    return build_candle_data(
+        {name: klines[idx] for name, idx in zip(CANDLE_COLUMNS, column_idx)},
+        index=to_datetime_index(klines[time_idx], unit),
+    )
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Type
+
+from app.enums.exchange import Exchange
+from app.exchanges.kline_decoder import loads
+from app.http_client import get_http_client
+
+
+@dataclass(frozen=True)
+class KlineUpdate:
+    """Latest state of the bar of `symbol` opened at `open_time` (unix seconds)"""
+
+    symbol: str
+    open_time: int
+    open: float
+    close: float
+    high: float
+    low: float
+    volume: float
+
+
+def chunks(items: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class KlineStream(ABC):
+    """
+    Wire format of an exchange kline WebSocket stream. Streams of many
+    symbols are multiplexed over `streams_per_connection` per connection
+    """
+
+    url: str
+    exchange: Exchange
+    # symbols subscribed over a single connection
+    streams_per_connection: int = 200
+    # symbols subscribed by a single message
+    streams_per_message: int = 50
+    # seconds between subscribe messages, exchanges limit incoming messages
+    message_interval: float = 0.0
+    # seconds between application level pings, None if not required
+    ping_interval: Optional[float] = None
+
+    @classmethod
+    async def connect_url(cls) -> str:
+        return cls.url
+
+    @staticmethod
+    @abstractmethod
+    def subscribe_messages(symbols: Sequence[str], interval: str) -> List[str]:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def parse(message: str) -> List[KlineUpdate]:
+        """Kline updates of a received message, none for control messages"""
+        pass
+
+    @staticmethod
+    def ping_message() -> Optional[str]:
+        return None
+
+
+class BinanceKlineStream(KlineStream):
+    url: str = "wss://stream.binance.com:9443/stream"
+    exchange: Exchange = Exchange.BINANCE
+    streams_per_connection: int = 1024
+    streams_per_message: int = 200
+    message_interval: float = 0.25
+
+    @staticmethod
+    def subscribe_messages(symbols: Sequence[str], interval: str) -> List[str]:
+        return [
+            json.dumps(
+                {
+                    "method": "SUBSCRIBE",
+                    "params": [
+                        f"{symbol.lower()}@kline_{interval}" for symbol in chunk
+                    ],
+                    "id": i,
+                }
+            )
+            for i, chunk in enumerate(
+                chunks(symbols, BinanceKlineStream.streams_per_message), start=1
+            )
+        ]
+
+    @staticmethod
+    def parse(message: str) -> List[KlineUpdate]:
+        payload = loads(message)
+        if "data" not in payload:
+            # subscription results
+            return []
+        kline = payload["data"]["k"]
+        return [
+            KlineUpdate(
+                symbol=kline["s"],
+                open_time=int(kline["t"]) // 1000,
+                open=float(kline["o"]),
+                close=float(kline["c"]),
+                high=float(kline["h"]),
+                low=float(kline["l"]),
+                volume=float(kline["v"]),
+            )
+        ]
+
+
+class OkxKlineStream(KlineStream):
+    url: str = "wss://ws.okx.com:8443/ws/v5/business"
+    exchange: Exchange = Exchange.OKEX
+    streams_per_connection: int = 300
+    message_interval: float = 0.1
+    # connections without any message for 30 seconds are closed
+    ping_interval: Optional[float] = 25.0
+
+    @staticmethod
+    def subscribe_messages(symbols: Sequence[str], interval: str) -> List[str]:
+        return [
+            json.dumps(
+                {
+                    "op": "subscribe",
+                    "args": [
+                        {"channel": f"candle{interval}", "instId": symbol}
+                        for symbol in chunk
+                    ],
+                }
+            )
+            for chunk in chunks(symbols, OkxKlineStream.streams_per_message)
+        ]
+
+    @staticmethod
+    def parse(message: str) -> List[KlineUpdate]:
+        if message == "pong":
+            return []
+        payload = loads(message)
+        if "data" not in payload:
+            return []
+        symbol: str = payload["arg"]["instId"]
+        # [open time, open, high, low, close, volume, ...]
+        return [
+            KlineUpdate(
+                symbol=symbol,
+                open_time=int(row[0]) // 1000,
+                open=float(row[1]),
+                close=float(row[4]),
+                high=float(row[2]),
+                low=float(row[3]),
+                volume=float(row[5]),
+            )
+            for row in payload["data"]
+        ]
+
+    @staticmethod
+    def ping_message() -> Optional[str]:
+        return "ping"
+
+
+class KucoinKlineStream(KlineStream):
+    # public connections need a token issued by the REST API
+    token_url: str = "https://api.kucoin.com/api/v1/bullet-public"
+    exchange: Exchange = Exchange.KUCOIN
+    streams_per_connection: int = 400
+    streams_per_message: int = 100
+    message_interval: float = 0.1
+    ping_interval: Optional[float] = 18.0
+
+    @classmethod
+    async def connect_url(cls) -> str:
+        r = await asyncio.to_thread(get_http_client().post, cls.token_url)
+        bullet = loads(r.content)["data"]
+        endpoint: str = bullet["instanceServers"][0]["endpoint"]
+        return f"{endpoint}?token={bullet['token']}&connectId={uuid.uuid4().hex}"
+
+    @staticmethod
+    def subscribe_messages(symbols: Sequence[str], interval: str) -> List[str]:
+        return [
+            json.dumps(
+                {
+                    "id": uuid.uuid4().hex,
+                    "type": "subscribe",
+                    "topic": "/market/candles:"
+                    + ",".join(f"{symbol}_{interval}" for symbol in chunk),
+                    "privateChannel": False,
+                    "response": True,
+                }
+            )
+            for chunk in chunks(symbols, KucoinKlineStream.streams_per_message)
+        ]
+
+    @staticmethod
+    def parse(message: str) -> List[KlineUpdate]:
+        payload = loads(message)
+        if payload.get("subject") != "trade.candles.update":
+            return []
+        data = payload["data"]
+        # [open time, open, close, high, low, volume, turnover]
+        candle = data["candles"]
+        return [
+            KlineUpdate(
+                symbol=data["symbol"],
+                open_time=int(candle[0]),
+                open=float(candle[1]),
+                close=float(candle[2]),
+                high=float(candle[3]),
+                low=float(candle[4]),
+                volume=float(candle[5]),
+            )
+        ]
+
+    @staticmethod
+    def ping_message() -> Optional[str]:
+        return json.dumps({"id": str(int(time.time() * 1000)), "type": "ping"})
+
+
+KLINE_STREAMS: Dict[Exchange, Type[KlineStream]] = {
+    Exchange.BINANCE: BinanceKlineStream,
+    Exchange.OKEX: OkxKlineStream,
+    Exchange.KUCOIN: KucoinKlineStream,
+}
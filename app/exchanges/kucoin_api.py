@@ -1,27 +1,74 @@
-import json
 import time
-from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
-import requests
 from loguru import logger
 
+from app.enums.exchange import Exchange
 from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.kline_decoder import decode_kline_rows, loads
+from app.exchanges.symbol_rules import SymbolRule
+from app.http_client import get_http_client
 
 
 class KucoinAPI(ExchangeAPI):
     base_url: str = "https://api.kucoin.com"
+    exchange: Exchange = Exchange.KUCOIN
+    default_interval: str = "1day"
+    intervals: Dict[str, str] = {
+        "1h": "1hour",
+        "4h": "4hour",
+        "1d": "1day",
+        "1w": "1week",
+    }
+    page_size: int = 1500
+    max_concurrency: int = 4
+    usdt_rule: SymbolRule = SymbolRule(
+        quote="USDT",
+        count_token="USD",
+        excluded=["UP", "DOWN", "BEAR", "BULL", "3L", "3S", "DAI"],
+        excluded_prefix="USDT",
+    )
+    btc_rule: SymbolRule = SymbolRule(
+        quote="BTC",
+        count_token="BTC",
+        excluded=["USD", "DOWN", "BEAR", "BULL", "DAI"],
+        excluded_prefix="BTC",
+    )
 
     @staticmethod
     def generate_candle_data(
-        symbol: str, interval: str = "1day", max_attempt: int = 10
+        symbol: str,
+        interval: str = "1day",
+        since: Optional[pd.Timestamp] = None,
+        max_attempt: int = 10,
     ) -> pd.DataFrame:
-        r = requests.get(
-            f"{KucoinAPI.base_url}/api/v1/market/candles",
-            {"symbol": symbol, "type": interval},
-        )
-        klines = json.loads(r.text)
+        params = {"symbol": symbol, "type": interval}
+        if since is not None:
+            params["startAt"] = KucoinAPI.to_unix_time(since)
+        return KucoinAPI.get_klines(params, max_attempt)
+
+    @staticmethod
+    def fetch_candle_page(
+        symbol: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        params = {
+            "symbol": symbol,
+            "type": interval,
+            "startAt": KucoinAPI.to_unix_time(start),
+        }
+        if end is not None:
+            # endAt is inclusive
+            params["endAt"] = KucoinAPI.to_unix_time(end) - 1
+        return KucoinAPI.get_klines(params)
+
+    @staticmethod
+    def get_klines(params: Dict[str, Any], max_attempt: int = 10) -> pd.DataFrame:
+        r = get_http_client().get(f"{KucoinAPI.base_url}/api/v1/market/candles", params)
+        klines = loads(r.content)
 
         n_attempt = 0
         while klines["code"] != "200000":
@@ -31,67 +78,28 @@ class KucoinAPI(ExchangeAPI):
             logger.warning("Error fetching API. Retrying in 0.1 seconds")
 
             time.sleep(0.1)
-            r = requests.get(
-                f"{KucoinAPI.base_url}/api/v1/market/candles",
-                {"symbol": symbol, "type": interval},
+            r = get_http_client().get(
+                f"{KucoinAPI.base_url}/api/v1/market/candles", params
             )
-            klines = json.loads(r.text)
+            klines = loads(r.content)
             n_attempt += 1
 
-        candle_data = []
-        timestamp = []
-        for line in klines["data"]:
-            open_time = datetime.utcfromtimestamp(int(line[0])).strftime(
-                "%Y-%m-%d %H:%M:%S"
-            )
-            timestamp.append(open_time)
-            # end_time = datetime.utcfromtimestamp(line[6])
-            volume = line[5]
-            high, low, op, close = line[3], line[4], line[1], line[2]
-            candle_data.append([op, close, high, low, volume])
-        candle_data = pd.DataFrame(
-            candle_data,
-            columns=["open", "close", "high", "low", "volume"],
-            index=timestamp,
+        # [open time, open, close, high, low, volume, turnover], newest first
+        candle_data = decode_kline_rows(
+            klines["data"], time_idx=0, column_idx=[1, 2, 3, 4, 5], unit="s"
         )
-        return candle_data.astype(float)[::-1]
+        return candle_data[::-1]
 
     @staticmethod
-    def get_usdt_tickers() -> List[str]:
-        r = requests.get(f"{KucoinAPI.base_url}/api/v1/symbols")
-        tickers = json.loads(r.text)
-        return [
-            ticker["symbol"]
-            for ticker in tickers["data"]
-            if (
-                ticker["symbol"][:4] != "USDT"
-                and "USDT" in ticker["symbol"]
-                and "UP" not in ticker["symbol"]
-                and "DOWN" not in ticker["symbol"]
-                and "BEAR" not in ticker["symbol"]
-                and "BULL" not in ticker["symbol"]
-                and "3L" not in ticker["symbol"]
-                and "3S" not in ticker["symbol"]
-                and ticker["symbol"].count("USD") == 1
-                and "DAI" not in ticker["symbol"]
-            )
-        ]
+    def fetch_universe() -> List[str]:
+        r = get_http_client().get(f"{KucoinAPI.base_url}/api/v1/symbols")
+        tickers = loads(r.content)
+        return [ticker["symbol"] for ticker in tickers["data"]]
 
-    @staticmethod
-    def get_btc_tickers() -> List[str]:
-        r = requests.get(f"{KucoinAPI.base_url}/api/v1/symbols")
-        tickers = json.loads(r.text)
-        return [
-            ticker["symbol"]
-            for ticker in tickers["data"]
-            if (
-                ticker["symbol"][:3] != "BTC"
-                and "USD" not in ticker["symbol"]
-                and "BTC" in ticker["symbol"]
-                and "DOWN" not in ticker["symbol"]
-                and "BEAR" not in ticker["symbol"]
-                and "BULL" not in ticker["symbol"]
-                and "DAI" not in ticker["symbol"]
-                and ticker["symbol"].count("BTC") == 1
-            )
-        ]
+    @classmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        return cls.usdt_rule.apply(cls.get_universe())
+
+    @classmethod
+    def get_btc_tickers(cls) -> List[str]:
+        return cls.btc_rule.apply(cls.get_universe())
@@ -1,23 +1,47 @@
-import json
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
-import requests
 
+from app.enums.exchange import Exchange
 from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.kline_decoder import decode_kline_rows, loads
+from app.exchanges.symbol_rules import SymbolRule
+from app.http_client import get_http_client
 
 
 class OkxAPI(ExchangeAPI):
     base_url: str = "https://www.okx.com"
+    exchange: Exchange = Exchange.OKEX
+    # "1D" and "1W" bars open at Hong Kong midnight (16:00 UTC), the "utc"
+    # ones at UTC midnight like the bars of every other exchange
+    default_interval: str = "1Dutc"
+    intervals: Dict[str, str] = {"1h": "1H", "4h": "4H", "1d": "1Dutc", "1w": "1Wutc"}
+    page_size: int = 100
+    max_concurrency: int = 8
+    usdt_rule: SymbolRule = SymbolRule(
+        quote="USDT",
+        count_token="USDT",
+        excluded=["DOWN", "BEAR", "BULL", "DAI"],
+    )
+    btc_rule: SymbolRule = SymbolRule(
+        quote="BTC",
+        count_token="BTC",
+        excluded=["USD", "DOWN", "BEAR", "BULL", "DAI"],
+        excluded_prefix="BTC",
+    )
     gran_mapping: Dict[str, int] = {
         "15min": 900,
         "30min": 1800,
         "1h": 3600,
+        "1H": 3600,
         "4h": 14400,
+        "4H": 14400,
         "12h": 43200,
         "1D": 86400,
+        "1Dutc": 86400,
         "1W": 604800,
+        "1Wutc": 604800,
         "1M": 2678400,
     }
 
@@ -26,67 +50,57 @@ class OkxAPI(ExchangeAPI):
 
     @staticmethod
     def generate_candle_data(
-        instrument_id: str, granularity: str = "1D"
+        instrument_id: str,
+        interval: str = "1Dutc",
+        since: Optional[pd.Timestamp] = None,
     ) -> pd.DataFrame:
-        _timeframe = OkxAPI.gran_mapping[granularity]
-        payload = {"instId": instrument_id, "bar": "1D"}
+        payload = {"instId": instrument_id, "bar": interval}
+        if since is not None:
+            # `before` returns records newer than (exclusive) the given time
+            payload["before"] = OkxAPI.to_unix_time(since) * 1000 - 1
+        return OkxAPI.get_klines(payload)
 
-        r = requests.get(
+    @staticmethod
+    def fetch_candle_page(
+        instrument_id: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        payload = {
+            "instId": instrument_id,
+            "bar": interval,
+            "before": OkxAPI.to_unix_time(start) * 1000 - 1,
+            "limit": OkxAPI.page_size,
+        }
+        if end is not None:
+            # `after` returns records older than (exclusive) the given time
+            payload["after"] = OkxAPI.to_unix_time(end) * 1000
+        return OkxAPI.get_klines(payload)
+
+    @staticmethod
+    def get_klines(payload: Dict[str, Any]) -> pd.DataFrame:
+        r = get_http_client().get(
             f"{OkxAPI.base_url}/api/v5/market/history-candles", params=payload
         )
 
-        klines = json.loads(r.text)["data"]
-        # print(klines)
-        candle_data = []
-        timestamp = []
-        for line in klines:
-            open_time = OkxAPI.format_unixtime(line[0])
-            timestamp.append(open_time)
-            volume = line[5]
-            high, low, op, close = line[2], line[3], line[1], line[4]
-            candle_data.append([op, close, high, low, volume])
-        candle_data = pd.DataFrame(
-            candle_data,
-            columns=["open", "close", "high", "low", "volume"],
-            index=timestamp,
-        )
-        return candle_data.astype(float).resample("1D").mean()
+        klines = loads(r.content)["data"]
+        # [open time, open, high, low, close, volume, ...], newest first
+        candle_data = decode_kline_rows(klines, time_idx=0, column_idx=[1, 4, 2, 3, 5])
+        return candle_data.sort_index()
 
     @staticmethod
-    def get_usdt_tickers() -> List[str]:
-        r = requests.get(f"{OkxAPI.base_url}/api/v5/market/tickers?instType=SPOT")
-        tickers = json.loads(r.text)["data"]
-
-        return [
-            ticker["instId"]
-            for ticker in tickers
-            if (
-                ticker["instId"][:3] != "USDT"
-                and "USDT" in ticker["instId"]
-                and "DOWN" not in ticker["instId"]
-                and "BEAR" not in ticker["instId"]
-                and "BULL" not in ticker["instId"]
-                and "DAI" not in ticker["instId"]
-                and ticker["instId"].count("USDT") == 1
-            )
-        ]
+    def fetch_universe() -> List[str]:
+        r = get_http_client().get(
+            f"{OkxAPI.base_url}/api/v5/market/tickers?instType=SPOT"
+        )
+        tickers = loads(r.content)["data"]
+        return [ticker["instId"] for ticker in tickers]
 
-    @staticmethod
-    def get_btc_tickers() -> List[str]:
-        r = requests.get(f"{OkxAPI.base_url}/api/v5/market/tickers?instType=SPOT")
-        tickers = json.loads(r.text)["data"]
+    @classmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        return cls.usdt_rule.apply(cls.get_universe())
 
-        return [
-            ticker["instId"]
-            for ticker in tickers
-            if (
-                ticker["instId"][:3] != "BTC"
-                and "USD" not in ticker["instId"]
-                and "BTC" in ticker["instId"]
-                and "DOWN" not in ticker["instId"]
-                and "BEAR" not in ticker["instId"]
-                and "BULL" not in ticker["instId"]
-                and "DAI" not in ticker["instId"]
-                and ticker["instId"].count("BTC") == 1
-            )
-        ]
+    @classmethod
+    def get_btc_tickers(cls) -> List[str]:
+        return cls.btc_rule.apply(cls.get_universe())
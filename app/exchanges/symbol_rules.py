@@ -0,0 +1,48 @@
+import re
+from typing import Iterable, List, Optional, Sequence
+
+
+class SymbolRule:
+    """
+    Select symbols of one quote asset from an exchange universe,
+    excluding leveraged tokens and other unwanted markets
+
+    Arguments
+    ---------
+    quote: str
+        Substring every selected symbol must contain
+    count_token: Optional[str]
+        If given, selected symbols contain `count_token` exactly once
+    excluded: Sequence[str]
+        Substrings a selected symbol must not contain
+    excluded_prefix: Optional[str]
+        Prefix a selected symbol must not start with
+    """
+
+    def __init__(
+        self,
+        quote: str,
+        count_token: Optional[str] = None,
+        excluded: Sequence[str] = (),
+        excluded_prefix: Optional[str] = None,
+    ) -> None:
+        self.quote: str = quote
+        self.count_token: Optional[str] = count_token
+        self.excluded_prefix: Optional[str] = excluded_prefix
+        self._excluded: Optional[re.Pattern] = None
+        if len(excluded) > 0:
+            self._excluded = re.compile("|".join(re.escape(e) for e in excluded))
+
+    def match(self, symbol: str) -> bool:
+        return (
+            self.quote in symbol
+            and (
+                self.excluded_prefix is None
+                or not symbol.startswith(self.excluded_prefix)
+            )
+            and (self._excluded is None or self._excluded.search(symbol) is None)
+            and (self.count_token is None or symbol.count(self.count_token) == 1)
+        )
+
+    def apply(self, symbols: Iterable[str]) -> List[str]:
+        return [symbol for symbol in symbols if self.match(symbol)]
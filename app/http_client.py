@@ -0,0 +1,106 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.models import Response
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """
+    Shared HTTP client for exchange adapters and market data APIs.
+
+    A single `requests.Session` keeps connections alive and pools them
+    per host, so a market scan reuses a handful of TLS connections
+    instead of opening one per request. Responses are gzip-encoded
+    when the server supports it and every request has explicit
+    connect/read timeouts.
+
+    Arguments
+    ---------
+    connect_timeout: float
+        Seconds to wait for a connection to be established
+    read_timeout: float
+        Seconds to wait for the server to send a response
+    pool_maxsize: int
+        Maximum number of kept-alive connections per host
+    max_retries: int
+        Number of retries on connection errors, 429 and 5xx responses.
+        `Retry-After` headers are honored
+    transport: Optional[BaseAdapter]
+        Replace the network transport, e.g. to replay recorded
+        responses in tests
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        pool_maxsize: int = 32,
+        max_retries: int = 3,
+        transport: Optional[BaseAdapter] = None,
+    ) -> None:
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.session: requests.Session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        if transport is None:
+            transport = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=pool_maxsize,
+                max_retries=Retry(
+                    total=max_retries,
+                    backoff_factor=0.5,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=None,
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                ),
+            )
+        self.session.mount("http://", transport)
+        self.session.mount("https://", transport)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        return self.session.get(
+            url, params=params, headers=headers, timeout=self.timeout
+        )
+
+    def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        return self.session.post(url, data=data, headers=headers, timeout=self.timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_http_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """
+    Return the process-wide HTTP client. Timeouts can be tuned with
+    `HTTP_CONNECT_TIMEOUT` and `HTTP_READ_TIMEOUT`
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = HttpClient(
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", 5.0)),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", 30.0)),
+        )
+    return _http_client
+
+
+def set_http_client(client: HttpClient) -> None:
+    """Replace the process-wide HTTP client, e.g. with a fake transport"""
+    global _http_client
+    _http_client = client
@@ -0,0 +1,391 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass, field, replace
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import indicators
+from .enums.signal import Signal
+from .solver import Solver
+from .storage import data_path
+
+NAN: float = float("nan")
+# bars stepped after a vectorized seed, enough to fill the StochRSI
+# window, both smoothing windows and the two bars kept in `history`
+SEED_TAIL: int = indicators.STOCH_WINDOW + 2 * indicators.SMOOTH_WINDOW
+
+
+@dataclass(frozen=True)
+class EwmState:
+    """State of `ewm(adjust=False).mean()` as computed by pandas"""
+
+    weighted: float = NAN
+    old_wt: float = 1.0
+    nobs: int = 0
+
+    def step(self, cur: float, alpha: float) -> "EwmState":
+        weighted, old_wt = self.weighted, self.old_wt
+        is_observation: bool = not math.isnan(cur)
+        if not math.isnan(weighted):
+            old_wt *= 1 - alpha
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        return EwmState(weighted, old_wt, self.nobs + is_observation)
+
+    def value(self, min_periods: int) -> float:
+        return self.weighted if self.nobs >= min_periods else NAN
+
+
+def _ewm_state(values: np.ndarray, alpha: float) -> EwmState:
+    """`EwmState` after stepping through every value, computed by pandas"""
+    observed: np.ndarray = np.flatnonzero(~np.isnan(values))
+    if len(observed) == 0:
+        return EwmState()
+    weighted: float = float(
+        pd.Series(values).ewm(alpha=alpha, adjust=False).mean().iloc[-1]
+    )
+    old_wt: float = 1.0
+    # missing values after the last observation keep decaying its weight
+    for _ in range(len(values) - 1 - observed[-1]):
+        old_wt *= 1 - alpha
+    return EwmState(weighted, old_wt, len(observed))
+
+
+def _window_append(window: Tuple[float, ...], value: float, size: int):
+    return (*window, value)[-size:]
+
+
+def _mean(window: Tuple[float, ...]) -> float:
+    return sum(window) / len(window)
+
+
+def _window_value(window: Tuple[float, ...], size: int, func) -> float:
+    # rolling(size, min_periods=size): NaN unless `size` valid values
+    if len(window) < size or any(math.isnan(v) for v in window):
+        return NAN
+    return func(window)
+
+
+@dataclass(frozen=True)
+class IndicatorState:
+    """
+    Indicator state of one (exchange, symbol, interval) stream as of
+    its last closed bar. Every update costs O(1) regardless of history
+    length and yields the same values as the full recomputation done
+    in `Solver.get_cdc_signal`
+    """
+
+    last_open_time: Optional[int] = None
+    n_bars: int = 0
+    prev_close: float = NAN
+    fast: EwmState = field(default_factory=EwmState)
+    slow: EwmState = field(default_factory=EwmState)
+    rsi_up: EwmState = field(default_factory=EwmState)
+    rsi_down: EwmState = field(default_factory=EwmState)
+    rsi_window: Tuple[float, ...] = ()
+    stoch_window: Tuple[float, ...] = ()
+    k_window: Tuple[float, ...] = ()
+    # (macd, k, d) of the last two closed bars, oldest first
+    history: Tuple[Tuple[float, float, float], ...] = ()
+
+    def step(self, close: float, open_time: Optional[int] = None) -> "IndicatorState":
+        """Return the state after appending a bar closed at `close`"""
+        fast = self.fast.step(close, 2 / (indicators.FAST_WINDOW + 1))
+        slow = self.slow.step(close, 2 / (indicators.SLOW_WINDOW + 1))
+        macd: float = fast.value(indicators.FAST_WINDOW) - slow.value(
+            indicators.SLOW_WINDOW
+        )
+
+        # the first bar and bars next to a missing close count as no change
+        diff: float = close - self.prev_close
+        up: float = diff if diff > 0 else 0.0
+        down: float = -diff if diff < 0 else 0.0
+        rsi_up = self.rsi_up.step(up, 1 / indicators.RSI_WINDOW)
+        rsi_down = self.rsi_down.step(down, 1 / indicators.RSI_WINDOW)
+        ema_up: float = rsi_up.value(indicators.RSI_WINDOW)
+        ema_down: float = rsi_down.value(indicators.RSI_WINDOW)
+        if ema_down == 0:
+            rsi: float = 100.0
+        else:
+            rsi: float = 100 - (100 / (1 + ema_up / ema_down))
+
+        rsi_window = _window_append(self.rsi_window, rsi, indicators.STOCH_WINDOW)
+        lowest = _window_value(rsi_window, indicators.STOCH_WINDOW, min)
+        highest = _window_value(rsi_window, indicators.STOCH_WINDOW, max)
+        if highest == lowest:
+            # the latest rsi is also the lowest one, 0 / 0
+            stoch: float = NAN
+        else:
+            stoch: float = 100 * (rsi - lowest) / (highest - lowest)
+
+        stoch_window = _window_append(
+            self.stoch_window, stoch, indicators.SMOOTH_WINDOW
+        )
+        k = _window_value(stoch_window, indicators.SMOOTH_WINDOW, _mean)
+        k_window = _window_append(self.k_window, k, indicators.SMOOTH_WINDOW)
+        d = _window_value(k_window, indicators.SMOOTH_WINDOW, _mean)
+
+        return replace(
+            self,
+            last_open_time=open_time,
+            n_bars=self.n_bars + 1,
+            prev_close=close,
+            fast=fast,
+            slow=slow,
+            rsi_up=rsi_up,
+            rsi_down=rsi_down,
+            rsi_window=rsi_window,
+            stoch_window=stoch_window,
+            k_window=k_window,
+            history=(*self.history, (macd, k, d))[-2:],
+        )
+
+    @staticmethod
+    def from_closes(
+        closes: np.ndarray, open_time: Optional[int] = None
+    ) -> "IndicatorState":
+        """
+        State after stepping through every bar of `closes`, the last one
+        opened at `open_time`. The EWMs are computed over the whole
+        history at once; only the last `SEED_TAIL` bars are stepped, to
+        fill the rolling windows
+        """
+        closes = np.asarray(closes, dtype=float)
+        n_seeded: int = max(0, len(closes) - SEED_TAIL)
+        state = IndicatorState()
+        if n_seeded > 0:
+            seeded: np.ndarray = closes[:n_seeded]
+            # the first bar and bars next to a missing close count as no change
+            diff: np.ndarray = np.concatenate(([NAN], np.diff(seeded)))
+            with np.errstate(invalid="ignore"):
+                up: np.ndarray = np.where(diff > 0, diff, 0.0)
+                down: np.ndarray = np.where(diff < 0, -diff, 0.0)
+            state = IndicatorState(
+                n_bars=n_seeded,
+                prev_close=float(seeded[-1]),
+                fast=_ewm_state(seeded, 2 / (indicators.FAST_WINDOW + 1)),
+                slow=_ewm_state(seeded, 2 / (indicators.SLOW_WINDOW + 1)),
+                rsi_up=_ewm_state(up, 1 / indicators.RSI_WINDOW),
+                rsi_down=_ewm_state(down, 1 / indicators.RSI_WINDOW),
+            )
+        for close in closes[n_seeded:]:
+            state = state.step(float(close))
+        return replace(state, last_open_time=open_time)
+
+    def get_cdc_signal(
+        self, live_close: float, current: bool = True
+    ) -> Optional[Signal]:
+        """
+        Signal of the stream when its live (unfinished) bar is at
+        `live_close`. The live bar is not committed to the state
+        """
+        live = self.step(live_close)
+        if live.n_bars < 30:
+            return None
+
+        last_closed, live_bar = live.history
+        if current:
+            prev, curr = last_closed, live_bar
+        else:
+            prev, curr = self.history
+        return Solver.classify_cdc_signal(
+            current_diff=curr[0],
+            prev_diff=prev[0],
+            current_kd_diff=curr[1] - curr[2],
+            prev_kd_diff=prev[1] - prev[2],
+            last_k=live_bar[1],
+        )
+
+    def closed_cdc_signal(self) -> Optional[Signal]:
+        """
+        Signal the last closed bar closed with, i.e. `get_cdc_signal` of
+        the bar at its final price. Unlike the live signal it only
+        changes when a bar closes
+        """
+        if self.n_bars < 30:
+            return None
+        prev, curr = self.history
+        return Solver.classify_cdc_signal(
+            current_diff=curr[0],
+            prev_diff=prev[0],
+            current_kd_diff=curr[1] - curr[2],
+            prev_kd_diff=prev[1] - prev[2],
+            last_k=curr[1],
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @staticmethod
+    def from_json(payload: str) -> "IndicatorState":
+        state = json.loads(payload)
+        for name in ["fast", "slow", "rsi_up", "rsi_down"]:
+            state[name] = EwmState(**state[name])
+        for name in ["rsi_window", "stoch_window", "k_window"]:
+            state[name] = tuple(state[name])
+        state["history"] = tuple(tuple(h) for h in state["history"])
+        return IndicatorState(**state)
+
+
+class IndicatorStateStore:
+    """Persist `IndicatorState` of every stream in a SQLite table"""
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS indicator_state ("
+                " exchange TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " interval TEXT NOT NULL,"
+                " state TEXT NOT NULL,"
+                " PRIMARY KEY (exchange, symbol, interval)"
+                ")"
+            )
+
+    def load_all(self) -> Dict[Tuple[str, str, str], IndicatorState]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT exchange, symbol, interval, state FROM indicator_state"
+            ).fetchall()
+        return {
+            (exchange, symbol, interval): IndicatorState.from_json(state)
+            for exchange, symbol, interval, state in rows
+        }
+
+    def save(self, states: Dict[Tuple[str, str, str], IndicatorState]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO indicator_state"
+                " (exchange, symbol, interval, state) VALUES (?, ?, ?, ?)",
+                [(*key, state.to_json()) for key, state in states.items()],
+            )
+
+
+class IndicatorEngine:
+    """
+    Keep `IndicatorState` per (exchange, symbol, interval) and compute
+    CDC signals from it. Only bars closed since the last evaluation are
+    applied to the state; on cold start the state is seeded from the
+    full history with vectorized EWMs (see `IndicatorState.from_closes`)
+    """
+
+    def __init__(self, store: Optional[IndicatorStateStore] = None) -> None:
+        self.store: Optional[IndicatorStateStore] = store
+        self._states: Dict[Tuple[str, str, str], IndicatorState] = (
+            {} if store is None else store.load_all()
+        )
+        self._dirty: Set[Tuple[str, str, str]] = set()
+        self._lock = threading.Lock()
+
+    def update(
+        self, exchange: str, symbol: str, interval: str, src: pd.Series
+    ) -> IndicatorState:
+        """
+        Apply closed bars of `src` (every bar except the last, live one)
+        that are newer than the stored state
+        """
+        key = (exchange, symbol, interval)
+        closed: pd.Series = src.iloc[:-1]
+        index = closed.index
+        if not isinstance(index, pd.DatetimeIndex):
+            index = pd.to_datetime(index)
+        open_times: np.ndarray = index.as_unit("s").asi8
+
+        state: Optional[IndicatorState] = self._states.get(key)
+        start: int = 0
+        if state is not None:
+            start = int(np.searchsorted(open_times, state.last_open_time))
+            if start < len(open_times) and open_times[start] == state.last_open_time:
+                start += 1
+            else:
+                # the stored state does not overlap with `src`
+                state = None
+                start = 0
+        if start == len(closed):
+            return IndicatorState() if state is None else state
+        if state is None:
+            # cold start, seed from the whole history at once
+            state = IndicatorState.from_closes(
+                closed.to_numpy(dtype=float), int(open_times[-1])
+            )
+        else:
+            for open_time, close in zip(open_times[start:], closed.values[start:]):
+                state = state.step(float(close), int(open_time))
+        with self._lock:
+            self._states[key] = state
+            self._dirty.add(key)
+        return state
+
+    def get_cdc_signal(
+        self,
+        exchange: str,
+        symbol: str,
+        interval: str,
+        src: pd.Series,
+        current: bool = True,
+    ) -> Optional[Signal]:
+        if len(src) < 30:
+            return None
+        state = self.update(exchange, symbol, interval, src)
+        return state.get_cdc_signal(float(src.iloc[-1]), current=current)
+
+    def closed_signals(
+        self, exchange: str, interval: str, symbols: Iterable[str]
+    ) -> Dict[str, Optional[Signal]]:
+        """
+        Signal the last closed bar of each of `symbols` closed with (see
+        `IndicatorState.closed_cdc_signal`). Symbols without state are
+        omitted
+        """
+        with self._lock:
+            states = {
+                symbol: self._states.get((exchange, symbol, interval))
+                for symbol in symbols
+            }
+        return {
+            symbol: state.closed_cdc_signal()
+            for symbol, state in states.items()
+            if state is not None
+        }
+
+    def save(self) -> None:
+        """Persist states updated since the last save"""
+        if self.store is None:
+            return
+        # scans of several exchanges may update states while saving
+        with self._lock:
+            states = {key: self._states[key] for key in self._dirty}
+            self._dirty.clear()
+        if len(states) > 0:
+            self.store.save(states)
+
+
+_indicator_engine: Optional[IndicatorEngine] = None
+
+
+def get_indicator_engine() -> IndicatorEngine:
+    """
+    Return the shared indicator engine persisted at `INDICATOR_STATE_PATH`
+    (default to `<DATA_DIR>/indicator_state.sqlite`). Setting
+    `INDICATOR_STATE_PATH` to an empty string keeps state in memory only
+    """
+    global _indicator_engine
+    if _indicator_engine is None:
+        path: Optional[str] = os.getenv("INDICATOR_STATE_PATH")
+        if path is None:
+            path = data_path("indicator_state.sqlite")
+        store = IndicatorStateStore(path) if path != "" else None
+        _indicator_engine = IndicatorEngine(store)
+    return _indicator_engine
@@ -0,0 +1,131 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# CDC Action Zone V3 parameters
+FAST_WINDOW: int = 12
+SLOW_WINDOW: int = 26
+RSI_WINDOW: int = 14
+STOCH_WINDOW: int = 14
+SMOOTH_WINDOW: int = 3
+
+
+def stack_close_prices(closes: Sequence[pd.Series]) -> np.ndarray:
+    """
+    Stack close prices of many tickers into a (tickers x bars) matrix.
+    Every row is aligned to the latest bar and shorter histories
+    are padded with NaN on the left
+    """
+    n_bars: int = max((len(close) for close in closes), default=0)
+    matrix: np.ndarray = np.full((len(closes), n_bars), np.nan)
+    for i, close in enumerate(closes):
+        if len(close) > 0:
+            matrix[i, n_bars - len(close) :] = np.asarray(close, dtype=float)
+    return matrix
+
+
+def first_valid_index(values: np.ndarray) -> np.ndarray:
+    """Column of the first non-NaN value of every row (`n_cols` if none)"""
+    is_valid: np.ndarray = ~np.isnan(values)
+    return np.where(is_valid.any(axis=1), is_valid.argmax(axis=1), values.shape[1])
+
+
+def ewm_step(
+    weighted: np.ndarray, old_wt: np.ndarray, cur: np.ndarray, alpha: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One step of `pd.Series.ewm(alpha=alpha, adjust=False).mean()`,
+    replicating how pandas treats missing observations
+    """
+    started: np.ndarray = ~np.isnan(weighted)
+    is_observation: np.ndarray = ~np.isnan(cur)
+    old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+    with np.errstate(invalid="ignore"):
+        update: np.ndarray = started & is_observation & (weighted != cur)
+        new_weighted: np.ndarray = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+    weighted = np.where(update, new_weighted, weighted)
+    old_wt = np.where(started & is_observation, 1.0, old_wt)
+    weighted = np.where(~started & is_observation, cur, weighted)
+    return weighted, old_wt
+
+
+def ewm_mean(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """Row-wise `ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean()`"""
+    n_rows, n_cols = values.shape
+    output: np.ndarray = np.full(values.shape, np.nan)
+    weighted: np.ndarray = np.full(n_rows, np.nan)
+    old_wt: np.ndarray = np.ones(n_rows)
+    nobs: np.ndarray = np.zeros(n_rows, dtype=int)
+    for i in range(n_cols):
+        cur: np.ndarray = values[:, i]
+        nobs += ~np.isnan(cur)
+        weighted, old_wt = ewm_step(weighted, old_wt, cur, alpha)
+        output[:, i] = np.where(nobs >= min_periods, weighted, np.nan)
+    return output
+
+
+def ema(values: np.ndarray, window: int) -> np.ndarray:
+    """Row-wise `ta.trend.ema_indicator`"""
+    return ewm_mean(values, 2 / (window + 1), window)
+
+
+def _rolling(values: np.ndarray, window: int, func) -> np.ndarray:
+    output: np.ndarray = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        windows: np.ndarray = sliding_window_view(values, window, axis=1)
+        output[:, window - 1 :] = func(windows, axis=-1)
+    return output
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, np.min)
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, np.max)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(values, window, np.mean)
+
+
+def macd(close: np.ndarray) -> np.ndarray:
+    """Row-wise `ta.trend.MACD(close).macd()`"""
+    return ema(close, FAST_WINDOW) - ema(close, SLOW_WINDOW)
+
+
+def rsi(close: np.ndarray, window: int = RSI_WINDOW) -> np.ndarray:
+    """Row-wise `ta.momentum.rsi`, ignoring the left NaN padding of each row"""
+    diff: np.ndarray = np.full(close.shape, np.nan)
+    diff[:, 1:] = close[:, 1:] - close[:, :-1]
+    with np.errstate(invalid="ignore"):
+        up: np.ndarray = np.where(diff > 0, diff, 0.0)
+        down: np.ndarray = np.where(diff < 0, -diff, 0.0)
+
+    # padding is not part of a ticker's history
+    is_padding: np.ndarray = (
+        np.arange(close.shape[1])[None, :] < first_valid_index(close)[:, None]
+    )
+    up[is_padding] = np.nan
+    down[is_padding] = np.nan
+
+    ema_up: np.ndarray = ewm_mean(up, 1 / window, window)
+    ema_down: np.ndarray = ewm_mean(down, 1 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+
+
+def stoch_rsi_kd(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise Stochastic RSI %K and %D as computed by `Solver.get_cdc_signal`
+    """
+    rsi_values: np.ndarray = rsi(close)
+    lowest: np.ndarray = rolling_min(rsi_values, STOCH_WINDOW)
+    highest: np.ndarray = rolling_max(rsi_values, STOCH_WINDOW)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stoch: np.ndarray = 100 * (rsi_values - lowest) / (highest - lowest)
+    k: np.ndarray = rolling_mean(stoch, SMOOTH_WINDOW)
+    d: np.ndarray = rolling_mean(k, SMOOTH_WINDOW)
+    return k, d
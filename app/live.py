@@ -0,0 +1,270 @@
+import asyncio
+import os
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from loguru import logger
+
+from .candle_store import CandleStore, get_candle_store
+from .enums.exchange import Exchange
+from .enums.pairs import Pairs
+from .enums.signal import Signal
+from .exchanges.base_exchange import ExchangeAPI
+from .exchanges.concurrent_fetch import iter_candle_data
+from .exchanges.exchange_provider import ExchangeProvider
+from .exchanges.kline_stream import KLINE_STREAMS, KlineStream, KlineUpdate, chunks
+from .indicator_state import IndicatorEngine, IndicatorState, get_indicator_engine
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# called with (symbol, previous signal, signal)
+OnChange = Callable[[str, Optional[Signal], Optional[Signal]], None]
+# called with (symbol, signal its last closed bar closed with)
+OnClose = Callable[[str, Optional[Signal]], None]
+
+
+class LiveSignals:
+    """
+    CDC signals of a market kept up to date by kline updates.
+
+    Every symbol holds the indicator state of its closed bars and its
+    live bar. An update only touches its own symbol: the live bar is
+    replaced, committed to the state once a newer bar opens, and the
+    signal is evaluated from the state in O(1)
+
+    Arguments
+    ---------
+    on_change: Optional[OnChange]
+        Called when the live signal of a symbol changes
+    on_close: Optional[OnClose]
+        Called when a symbol is seeded and whenever one of its bars
+        closes, with the signal that bar closed with
+    """
+
+    def __init__(
+        self,
+        on_change: Optional[OnChange] = None,
+        on_close: Optional[OnClose] = None,
+    ) -> None:
+        self.on_change: Optional[OnChange] = on_change
+        self.on_close: Optional[OnClose] = on_close
+        # set once every streamed symbol has been seeded
+        self.ready: bool = False
+        self.n_evaluations: int = 0
+        self._lock = threading.Lock()
+        self._states: Dict[str, IndicatorState] = {}
+        self._live_bars: Dict[str, Tuple[int, float]] = {}
+        self._signals: Dict[str, Optional[Signal]] = {}
+
+    def seed(
+        self, symbol: str, state: IndicatorState, open_time: int, close: float
+    ) -> None:
+        """Restart `symbol` from `state` of its closed bars and its live bar"""
+        self._states[symbol] = state
+        self._live_bars[symbol] = (open_time, close)
+        self._evaluate(symbol)
+        if self.on_close is not None:
+            self.on_close(symbol, state.closed_cdc_signal())
+
+    def apply(self, update: KlineUpdate) -> bool:
+        """Apply `update` and return whether its symbol is tracked"""
+        live_bar = self._live_bars.get(update.symbol)
+        if live_bar is None:
+            return False
+        open_time, close = live_bar
+        if update.open_time < open_time:
+            # late update of a bar that is already closed
+            return True
+        if update.open_time > open_time:
+            state = self._states[update.symbol].step(close, open_time)
+            self._states[update.symbol] = state
+            if self.on_close is not None:
+                self.on_close(update.symbol, state.closed_cdc_signal())
+        self._live_bars[update.symbol] = (update.open_time, update.close)
+        self._evaluate(update.symbol)
+        return True
+
+    def _evaluate(self, symbol: str) -> None:
+        self.n_evaluations += 1
+        _, close = self._live_bars[symbol]
+        signal = self._states[symbol].get_cdc_signal(close, current=True)
+        with self._lock:
+            seen: bool = symbol in self._signals
+            previous = self._signals.get(symbol)
+            self._signals[symbol] = signal
+        if seen and previous != signal and self.on_change is not None:
+            self.on_change(symbol, previous, signal)
+
+    def signals(self) -> Dict[str, Optional[Signal]]:
+        """Latest signal of every symbol ordered by symbol, from any thread"""
+        with self._lock:
+            return dict(sorted(self._signals.items()))
+
+
+class KlineStreamer:
+    """
+    Stream kline updates of `symbols` into `LiveSignals`.
+
+    Symbols are split over connections of `streams_per_connection`
+    streams. Every connection first loads candle history of its symbols
+    through the candle store, then subscribes to their klines and
+    reconnects with exponential backoff when it drops; history is
+    loaded again on reconnect to fill the bars missed in between
+
+    Arguments
+    ---------
+    exchange: Exchange
+        One of the exchanges in `KLINE_STREAMS`
+    symbols: Sequence[str]
+        Symbols to stream
+    timeframe: str
+        Timeframe of the streamed klines
+    live: Optional[LiveSignals]
+        Signals updated by the stream. Default to new ones
+    store: Optional[CandleStore]
+        Candle store history is loaded through. Default to the shared one
+    engine: Optional[IndicatorEngine]
+        Engine computing the state of closed bars. Default to the shared one
+    """
+
+    def __init__(
+        self,
+        exchange: Exchange,
+        symbols: Sequence[str],
+        timeframe: str = "1d",
+        live: Optional[LiveSignals] = None,
+        store: Optional[CandleStore] = None,
+        engine: Optional[IndicatorEngine] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+    ) -> None:
+        self.exchange_api: Type[ExchangeAPI] = ExchangeProvider.provide(exchange)
+        self.stream: Type[KlineStream] = KLINE_STREAMS[exchange]
+        self.symbols: List[str] = list(symbols)
+        self.interval: str = self.exchange_api.get_interval(timeframe)
+        self.live: LiveSignals = LiveSignals() if live is None else live
+        self.store: Optional[CandleStore] = store
+        self.engine: Optional[IndicatorEngine] = engine
+        self.reconnect_delay: float = reconnect_delay
+        self.max_reconnect_delay: float = max_reconnect_delay
+        self._n_seeded: int = 0
+
+    async def seed(self, symbols: Sequence[str]) -> None:
+        """Reset `symbols` from their candle history"""
+        store = get_candle_store() if self.store is None else self.store
+        engine = get_indicator_engine() if self.engine is None else self.engine
+        async for symbol, candle_data in iter_candle_data(
+            self.exchange_api, symbols, store=store, interval=self.interval
+        ):
+            if candle_data is None or len(candle_data) == 0:
+                continue
+            close = candle_data["close"]
+            # replaying a long history would stall the event loop
+            state = await asyncio.to_thread(
+                engine.update, self.exchange_api.exchange, symbol, self.interval, close
+            )
+            self.live.seed(
+                symbol,
+                state,
+                ExchangeAPI.to_unix_time(close.index[-1]),
+                float(close.iloc[-1]),
+            )
+        await asyncio.to_thread(engine.save)
+
+    async def run(self) -> None:
+        try:
+            import aiohttp
+        except ImportError as e:  # pragma: no cover - optional live streaming
+            raise RuntimeError("Streaming klines requires aiohttp") from e
+
+        connections = chunks(self.symbols, self.stream.streams_per_connection)
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(
+                *[
+                    self._run_connection(session, symbols, len(connections))
+                    for symbols in connections
+                ]
+            )
+
+    async def _run_connection(
+        self, session: "aiohttp.ClientSession", symbols: Sequence[str], n: int
+    ) -> None:
+        exchange: str = self.exchange_api.exchange
+        delay: float = self.reconnect_delay
+        seeded: bool = False
+        while True:
+            try:
+                await self.seed(symbols)
+                if not seeded:
+                    seeded = True
+                    self._n_seeded += 1
+                    self.live.ready = self._n_seeded == n
+                url: str = await self.stream.connect_url()
+                async with session.ws_connect(url) as ws:
+                    for message in self.stream.subscribe_messages(
+                        symbols, self.interval
+                    ):
+                        await ws.send_str(message)
+                        await asyncio.sleep(self.stream.message_interval)
+                    logger.info(f"Streaming {len(symbols)} {exchange} klines")
+                    delay = self.reconnect_delay
+                    await self._consume(ws)
+                logger.warning(f"{exchange} kline stream closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{exchange} kline stream failed: {e!r}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _consume(self, ws: "aiohttp.ClientWebSocketResponse") -> None:
+        from aiohttp import WSMsgType
+
+        pinger: Optional[asyncio.Task] = None
+        if self.stream.ping_interval is not None:
+            pinger = asyncio.create_task(self._ping(ws))
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    for update in self.stream.parse(message.data):
+                        self.live.apply(update)
+                elif message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+
+    async def _ping(self, ws: "aiohttp.ClientWebSocketResponse") -> None:
+        while not ws.closed:
+            await asyncio.sleep(self.stream.ping_interval)
+            await ws.send_str(self.stream.ping_message())
+
+
+_live_signals: Dict[Tuple[Exchange, Pairs], LiveSignals] = {}
+
+
+def live_markets() -> List[Tuple[Exchange, Pairs]]:
+    """
+    Markets streamed live, listed in `LIVE_STREAMS` as comma separated
+    `exchange:pair` (e.g. "binance:usdt,okex:btc"). None by default
+    """
+    markets: List[Tuple[Exchange, Pairs]] = []
+    for market in os.getenv("LIVE_STREAMS", "").split(","):
+        if market.strip() == "":
+            continue
+        exchange, pair = market.strip().lower().split(":")
+        markets.append((Exchange(exchange), Pairs(pair)))
+    return markets
+
+
+def register_live_signals(exchange: Exchange, pair: Pairs, live: LiveSignals) -> None:
+    _live_signals[(exchange, pair)] = live
+
+
+def get_live_signals(exchange: Exchange, pair: Pairs) -> Optional[LiveSignals]:
+    """Live signals of `pair` market on `exchange` once they are ready"""
+    live = _live_signals.get((exchange, pair))
+    if live is None or not live.ready:
+        return None
+    return live
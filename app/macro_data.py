@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from .api import AltCoinIndexAPI, CoinGecko, FearAndGreedAPI
+from .enums.exchange import Exchange
+from .exchanges.exchange_provider import ExchangeProvider
+from .open_interest import refresh_open_interest
+
+MINUTE: int = 60
+HOUR: int = 60 * MINUTE
+
+
+@dataclass(frozen=True)
+class MacroSource:
+    """Third-party data fetched by `fetch`, fresh for `ttl` seconds"""
+
+    fetch: Callable[[], Any]
+    ttl: float
+
+
+def fetch_btc_usdt():
+    return ExchangeProvider.provide(Exchange.BINANCE).generate_candle_data("BTCUSDT")
+
+
+MACRO_SOURCES: Dict[str, MacroSource] = {
+    "btc_dominance": MacroSource(CoinGecko.get_btc_dominance, 5 * MINUTE),
+    "btc_usdt": MacroSource(fetch_btc_usdt, MINUTE),
+    # history with only new points appended and levels kept up to date
+    "open_interest": MacroSource(refresh_open_interest, 15 * MINUTE),
+    # both indices are published once a day
+    "altcoin_index": MacroSource(
+        AltCoinIndexAPI.get_historical_altcoin_index, 6 * HOUR
+    ),
+    "fear_and_greed": MacroSource(FearAndGreedAPI.get_historical_data, 6 * HOUR),
+}
+
+
+class MacroData:
+    """
+    Cache of macro data sources, each kept for its own TTL.
+
+    Sources are refreshed concurrently on a pool of their own and a
+    refresh of one source is shared by every concurrent caller. A stale
+    value is served while it is refreshed in the background and kept
+    when the refresh fails, so a slow or failing third-party site never
+    holds a reader for more than `timeout` seconds
+
+    Arguments
+    ---------
+    sources: Dict[str, MacroSource]
+        Sources by name
+    timeout: float
+        Seconds to wait for sources without any cached value
+    clock: Callable[[], float]
+        Time source, replaceable in tests
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, MacroSource],
+        timeout: float = 10.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.sources: Dict[str, MacroSource] = sources
+        self.timeout: float = timeout
+        self.clock: Callable[[], float] = clock
+        self._lock = threading.Lock()
+        # name to (fetched at, value)
+        self._values: Dict[str, Tuple[float, Any]] = {}
+        self._refreshes: Dict[str, Future] = {}
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(sources)), thread_name_prefix="macro"
+        )
+
+    def get(self, name: str) -> Any:
+        return self.get_many([name])[name]
+
+    def get_many(
+        self, names: Sequence[str], revalidate: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Value of every source of `names`, refreshing the expired ones
+        concurrently. Expired values are returned right away unless
+        `revalidate` is set, which waits up to `timeout` for their
+        refresh and falls back to them if it fails or times out
+
+        Raise
+        -----
+        TimeoutError
+            A source without cached value did not answer in time. Errors
+            of its fetch are raised as they are
+        """
+        values: Dict[str, Any] = {}
+        pending: Dict[str, Tuple[Future, Optional[Tuple[float, Any]]]] = {}
+        now: float = self.clock()
+        with self._lock:
+            for name in names:
+                entry = self._values.get(name)
+                if entry is not None and now - entry[0] < self.sources[name].ttl:
+                    values[name] = entry[1]
+                    continue
+                future = self._refresh(name)
+                if entry is not None and not revalidate:
+                    # stale while revalidating
+                    values[name] = entry[1]
+                else:
+                    pending[name] = (future, entry)
+
+        deadline: float = time.monotonic() + self.timeout
+        for name, (future, stale) in pending.items():
+            try:
+                values[name] = future.result(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except Exception as e:
+                if stale is None:
+                    if isinstance(e, FutureTimeoutError):
+                        raise TimeoutError(
+                            f"{name} did not answer in {self.timeout}s"
+                        ) from None
+                    raise
+                logger.warning(f"Serving {name} from {now - stale[0]:.0f}s ago")
+                values[name] = stale[1]
+        return {name: values[name] for name in names}
+
+    def _refresh(self, name: str) -> Future:
+        # called with the lock held
+        future = self._refreshes.get(name)
+        if future is None:
+            future = self._pool.submit(self._fetch, name)
+            self._refreshes[name] = future
+        return future
+
+    def _fetch(self, name: str) -> Any:
+        start: float = time.perf_counter()
+        try:
+            value = self.sources[name].fetch()
+        except Exception as e:
+            logger.warning(f"Could not refresh {name}: {e!r}")
+            raise
+        else:
+            with self._lock:
+                self._values[name] = (self.clock(), value)
+            logger.debug(f"Refreshed {name} in {time.perf_counter() - start:.2f}s")
+            return value
+        finally:
+            with self._lock:
+                self._refreshes.pop(name, None)
+
+
+_macro_data: Optional[MacroData] = None
+
+
+def get_macro_data() -> MacroData:
+    """
+    Return the shared macro data cache. Sources never fetched before are
+    waited for up to `MACRO_TIMEOUT` (default to 10) seconds
+    """
+    global _macro_data
+    if _macro_data is None:
+        _macro_data = MacroData(
+            MACRO_SOURCES, timeout=float(os.getenv("MACRO_TIMEOUT", "10"))
+        )
+    return _macro_data
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .api import CoinGlassAPI
+from .resample import bar_open_time
+from .storage import data_path
+
+AGGREGATED: str = "aggregated"
+# downsampled levels kept up to date with every update
+OI_LEVELS: List[str] = ["1d", "1w"]
+
+
+def unix_times(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("s").asi8
+
+
+class OpenInterestStore:
+    """Persist open interest points of every exchange in a SQLite table"""
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS open_interest ("
+                " exchange TEXT NOT NULL,"
+                " time INTEGER NOT NULL,"
+                " value REAL,"
+                " PRIMARY KEY (exchange, time)"
+                ")"
+            )
+
+    def load(self) -> Optional[pd.DataFrame]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT exchange, time, value FROM open_interest"
+            ).fetchall()
+        if len(rows) == 0:
+            return None
+        points = pd.DataFrame(rows, columns=["exchange", "time", "value"]).pivot(
+            index="time", columns="exchange", values="value"
+        )
+        points.index = pd.to_datetime(points.index, unit="s")
+        points.index.name = None
+        points.columns.name = None
+        return points
+
+    def save(self, points: pd.DataFrame) -> None:
+        times = unix_times(pd.DatetimeIndex(points.index))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO open_interest (exchange, time, value)"
+                " VALUES (?, ?, ?)",
+                [
+                    (exchange, int(time), float(value))
+                    for exchange in points.columns
+                    for time, value in zip(times, points[exchange].values)
+                    if not np.isnan(value)
+                ],
+            )
+
+
+class OpenInterestHistory:
+    """
+    Open interest history of every exchange, their aggregate and the
+    daily and weekly levels of both.
+
+    An update only appends the points newer than the last known one
+    (which is replaced, it may still move) to `store`, aggregates them
+    across exchanges and recomputes the level bars they fall in. Readers
+    get ready series without aggregating or resampling anything
+
+    Arguments
+    ---------
+    store: Optional[OpenInterestStore]
+        Store points are persisted to and loaded from on start. Kept in
+        memory only if None
+    """
+
+    def __init__(self, store: Optional[OpenInterestStore] = None) -> None:
+        self.store: Optional[OpenInterestStore] = store
+        self._lock = threading.Lock()
+        self._points: pd.DataFrame = pd.DataFrame(index=pd.DatetimeIndex([]))
+        self._levels: Dict[str, pd.DataFrame] = {
+            level: self._points for level in OI_LEVELS
+        }
+        if store is not None:
+            points = store.load()
+            if points is not None:
+                self._append(points)
+
+    def update(self, points: pd.DataFrame) -> int:
+        """
+        Append `points` (one column per exchange) newer than the last
+        known point and return how many were new
+        """
+        with self._lock:
+            last: Optional[pd.Timestamp] = (
+                self._points.index[-1] if len(self._points) > 0 else None
+            )
+        points = points.drop(columns=AGGREGATED, errors="ignore").sort_index()
+        if last is not None:
+            points = points[points.index >= last]
+        if len(points) == 0:
+            return 0
+        if self.store is not None:
+            self.store.save(points)
+        self._append(points)
+        return len(points) - int(points.index[0] == last)
+
+    def _append(self, points: pd.DataFrame) -> None:
+        points = points.astype(float)
+        points[AGGREGATED] = points.fillna(0).sum(axis=1)
+        since: pd.Timestamp = points.index[0]
+        with self._lock:
+            merged = pd.concat([self._points[self._points.index < since], points])
+            self._levels = {
+                level: self._downsample(merged, self._levels[level], since, level)
+                for level in OI_LEVELS
+            }
+            self._points = merged
+
+    @staticmethod
+    def _downsample(
+        points: pd.DataFrame, bars: pd.DataFrame, since: pd.Timestamp, level: str
+    ) -> pd.DataFrame:
+        """`bars` with the bars from the one containing `since` recomputed"""
+        start = pd.Timestamp(
+            int(bar_open_time(unix_times(pd.DatetimeIndex([since]))[0], level)),
+            unit="s",
+        )
+        tail = points[points.index >= start]
+        open_times = pd.to_datetime(
+            bar_open_time(unix_times(pd.DatetimeIndex(tail.index)), level), unit="s"
+        )
+        return pd.concat([bars[bars.index < start], tail.groupby(open_times).mean()])
+
+    def exchanges(self) -> List[str]:
+        with self._lock:
+            return list(self._points.columns)
+
+    def series(self, exchange: str, level: Optional[str] = None) -> pd.Series:
+        """
+        Open interest of `exchange` (or `AGGREGATED`), as fetched or at
+        one of `OI_LEVELS`
+        """
+        with self._lock:
+            points = self._points if level is None else self._levels[level]
+        name = (
+            "Aggregated Open Interest"
+            if exchange == AGGREGATED
+            else f"{exchange} Open Interest"
+        )
+        return points[exchange].rename(name)
+
+
+_open_interest_history: Optional[OpenInterestHistory] = None
+
+
+def get_open_interest_history() -> OpenInterestHistory:
+    """
+    Return the shared open interest history persisted at
+    `OPEN_INTEREST_PATH` (default to `<DATA_DIR>/open_interest.sqlite`).
+    Setting `OPEN_INTEREST_PATH` to an empty string keeps it in memory only
+    """
+    global _open_interest_history
+    if _open_interest_history is None:
+        path: Optional[str] = os.getenv("OPEN_INTEREST_PATH")
+        if path is None:
+            path = data_path("open_interest.sqlite")
+        store = OpenInterestStore(path) if path != "" else None
+        _open_interest_history = OpenInterestHistory(store)
+    return _open_interest_history
+
+
+def refresh_open_interest() -> OpenInterestHistory:
+    """Append the latest open interest points to the shared history"""
+    history = get_open_interest_history()
+    n_new: int = history.update(CoinGlassAPI.get_open_interest_points())
+    logger.debug(f"Appended {n_new} open interest points")
+    return history
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+DAY: int = 86400
+
+
+def last_close_time(now: float, period: int = DAY, offset: int = 0) -> int:
+    """
+    Unix time at which the last candle of `period` seconds closed, for
+    candles opening `offset` seconds after the multiples of `period`
+    """
+    return int((now - offset) // period) * period + offset
+
+
+class ReportCache:
+    """
+    Cache rendered reports until they expire and coalesce concurrent
+    requests of the same report into a single computation.
+
+    While a report is being computed, later callers of the same key
+    wait for that computation instead of starting their own, so a
+    burst of identical requests costs one market scan.
+
+    Arguments
+    ---------
+    clock: Callable[[], float]
+        Returns the current unix time, replaceable in tests
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self.clock: Callable[[], float] = clock
+        self._lock = threading.Lock()
+        self._reports: Dict[Hashable, Tuple[float, str]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: Hashable) -> Optional[str]:
+        entry = self._reports.get(key)
+        if entry is None:
+            return None
+        expires_at, report = entry
+        if self.clock() >= expires_at:
+            del self._reports[key]
+            return None
+        return report
+
+    def _claim(self, key: Hashable) -> Tuple[Optional[str], Optional[Future], bool]:
+        """
+        Return a cached report, or the future of the in-flight
+        computation of `key` and whether the caller has to compute it
+        """
+        with self._lock:
+            report = self._get(key)
+            if report is not None:
+                return report, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                return None, future, False
+            future = Future()
+            self._inflight[key] = future
+            return None, future, True
+
+    def _settle(
+        self,
+        key: Hashable,
+        future: Future,
+        expires_at: float,
+        report: Optional[str] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        with self._lock:
+            del self._inflight[key]
+            if error is None:
+                now = self.clock()
+                self._reports = {k: v for k, v in self._reports.items() if v[0] > now}
+                self._reports[key] = (expires_at, report)
+        if error is None:
+            future.set_result(report)
+        else:
+            future.set_exception(error)
+
+    def get_or_compute(
+        self, key: Hashable, compute: Callable[[], str], expires_at: float
+    ) -> str:
+        """Return the report of `key`, computing it with `compute` if needed"""
+        report, future, is_owner = self._claim(key)
+        if report is not None:
+            return report
+        if not is_owner:
+            return future.result()
+
+        try:
+            report = compute()
+        except BaseException as e:
+            self._settle(key, future, expires_at, error=e)
+            raise
+        self._settle(key, future, expires_at, report)
+        return report
+
+    async def aget_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[str]],
+        expires_at: float,
+    ) -> str:
+        """Async version of `get_or_compute`"""
+        report, future, is_owner = self._claim(key)
+        if report is not None:
+            return report
+        if not is_owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            report = await compute()
+        except BaseException as e:
+            self._settle(key, future, expires_at, error=e)
+            raise
+        self._settle(key, future, expires_at, report)
+        return report
+
+    def entries(self) -> Dict[Hashable, Tuple[float, str]]:
+        """Cached reports and their expiry times, e.g. to snapshot them"""
+        with self._lock:
+            return dict(self._reports)
+
+    def restore(self, entries: Dict[Hashable, Tuple[float, str]]) -> None:
+        """Load reports saved by `entries`, skipping expired ones"""
+        now = self.clock()
+        with self._lock:
+            for key, (expires_at, report) in entries.items():
+                if expires_at > now:
+                    self._reports[key] = (expires_at, report)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reports.clear()
+
+
+_report_cache: Optional[ReportCache] = None
+
+
+def get_report_cache() -> ReportCache:
+    global _report_cache
+    if _report_cache is None:
+        _report_cache = ReportCache()
+    return _report_cache
+
+
+def report_expiry(
+    now: float, current: bool, period: int = DAY, offset: int = 0
+) -> Tuple[int, float]:
+    """
+    Return the last candle close time and the expiry time of a report
+    computed at `now`.
+
+    Reports on closed candles (`current=False`) cannot change before the
+    next close. Reports on the live candle follow its price, so they are
+    kept for `CDC_REPORT_TTL` seconds (default to 900) at most
+    """
+    last_close: int = last_close_time(now, period, offset)
+    expires_at: float = last_close + period
+    if current:
+        ttl = float(os.getenv("CDC_REPORT_TTL", 900))
+        expires_at = min(expires_at, now + ttl)
+    return last_close, expires_at
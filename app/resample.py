@@ -0,0 +1,88 @@
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from .exchanges.kline_decoder import CANDLE_COLUMNS
+
+# bar length in seconds of every timeframe a CDC scan can run on
+TIMEFRAMES: Dict[str, int] = {
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+    "1w": 604800,
+}
+# weekly bars open on Monday 00:00 UTC while unix time starts on a Thursday
+TIMEFRAME_OFFSETS: Dict[str, int] = {"1w": 4 * 86400}
+
+
+def check_timeframe(timeframe: str) -> str:
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(
+            f"Unsupported timeframe {timeframe}. Use one of {', '.join(TIMEFRAMES)}"
+        )
+    return timeframe
+
+
+def finest_timeframe(timeframes: Iterable[str]) -> str:
+    """Shortest of `timeframes`, the one every other can be built from"""
+    return min(map(check_timeframe, timeframes), key=TIMEFRAMES.__getitem__)
+
+
+def bar_open_time(unix_time: np.ndarray, timeframe: str) -> np.ndarray:
+    """Open time of the `timeframe` bar containing each of `unix_time`"""
+    period: int = TIMEFRAMES[check_timeframe(timeframe)]
+    offset: int = TIMEFRAME_OFFSETS.get(timeframe, 0)
+    return (np.asarray(unix_time) - offset) // period * period + offset
+
+
+def resample_candles(candle_data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate candle data of a finer interval into `timeframe` bars.
+
+    Bars are aligned on UTC like the exchanges' own candles: open is the
+    first open, close the last close, high the highest high, low the
+    lowest low and volume the total volume of the finer bars. The last
+    bar is built from the finer bars seen so far, so it is the partial
+    live bar of `timeframe` exactly as the exchange would report it
+
+    Arguments
+    ---------
+    candle_data: pd.DataFrame
+        Candle data with `CANDLE_COLUMNS` indexed by open time, in
+        ascending order. Rows without a close price (gaps) are skipped
+    timeframe: str
+        One of `TIMEFRAMES`
+
+    Return
+    ------
+    candle_data: pd.DataFrame
+        Candle data of `timeframe` in the same layout
+    """
+    candle_data = candle_data[CANDLE_COLUMNS].dropna(subset=["close"])
+    if len(candle_data) == 0:
+        return candle_data
+
+    index = pd.DatetimeIndex(candle_data.index)
+    open_times: np.ndarray = bar_open_time(index.as_unit("s").asi8, timeframe)
+    # first row of every bar, rows are sorted so bars are contiguous
+    starts: np.ndarray = np.flatnonzero(
+        np.concatenate(([True], open_times[1:] != open_times[:-1]))
+    )
+    ends: np.ndarray = np.concatenate((starts[1:], [len(open_times)])) - 1
+
+    values: Dict[str, np.ndarray] = {
+        name: candle_data[name].to_numpy(dtype=float) for name in CANDLE_COLUMNS
+    }
+    return pd.DataFrame(
+        {
+            "open": values["open"][starts],
+            "close": values["close"][ends],
+            "high": np.fmax.reduceat(values["high"], starts),
+            "low": np.fmin.reduceat(values["low"], starts),
+            "volume": np.add.reduceat(np.nan_to_num(values["volume"]), starts),
+        },
+        index=pd.DatetimeIndex(
+            open_times[starts].astype("datetime64[s]").astype("datetime64[ns]")
+        ),
+    )
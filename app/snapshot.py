@@ -0,0 +1,166 @@
+import gzip
+import os
+import pickle
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from .report_cache import ReportCache
+from .storage import data_path
+
+# bumped whenever the snapshot or its report keys change shape
+SNAPSHOT_VERSION: int = 2
+
+
+@dataclass
+class Snapshot:
+    """Latest computed state of the bot"""
+
+    created_at: float
+    version: int = SNAPSHOT_VERSION
+    dashboard_at: Optional[float] = None
+    bitcoin_template: Optional[str] = None
+    dashboard_data: Optional[pd.DataFrame] = None
+    dashboard_png: Optional[bytes] = None
+    # report cache entries, (exchange, pair, current, timeframes, last close) to
+    # (expires at, report)
+    reports: Dict[Hashable, Tuple[float, str]] = field(default_factory=dict)
+
+
+class SnapshotStore:
+    """Save and load a `Snapshot` as a gzip-compressed pickle at `path`"""
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Snapshot]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with gzip.open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+        if not isinstance(snapshot, Snapshot) or snapshot.version != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring outdated snapshot {self.path}")
+            return None
+        return snapshot
+
+    def save(self, snapshot: Snapshot) -> None:
+        # write aside and rename so a crash never leaves a partial file, one
+        # save at a time and to a file of its own so saves never interleave
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp"
+            )
+            try:
+                with (
+                    os.fdopen(fd, "wb") as raw,
+                    gzip.open(raw, "wb", compresslevel=6) as f,
+                ):
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+class WarmState:
+    """
+    Latest dashboard and CDC reports, restored from a snapshot at startup
+    so the bot can answer right away while fresh data is computed in
+    the background
+    """
+
+    def __init__(self, store: Optional[SnapshotStore] = None) -> None:
+        self.store: Optional[SnapshotStore] = store
+        self.refreshing: bool = False
+        self._lock = threading.Lock()
+        self._dashboard_at: Optional[float] = None
+        self._bitcoin_template: Optional[str] = None
+        self._dashboard_data: Optional[pd.DataFrame] = None
+        self._dashboard_png: Optional[bytes] = None
+        self._stale_reports: Dict[Hashable, Tuple[float, str]] = {}
+
+    def set_dashboard(
+        self, bitcoin_template: str, dashboard_data: pd.DataFrame, dashboard_png: bytes
+    ) -> None:
+        with self._lock:
+            self._dashboard_at = time.time()
+            self._bitcoin_template = bitcoin_template
+            self._dashboard_data = dashboard_data
+            self._dashboard_png = dashboard_png
+
+    def get_dashboard(self) -> Optional[Tuple[float, str, bytes]]:
+        """Time the dashboard was computed, its text and its chart"""
+        with self._lock:
+            if self._dashboard_png is None:
+                return None
+            return self._dashboard_at, self._bitcoin_template, self._dashboard_png
+
+    def pop_stale_reports(self) -> Dict[Hashable, Tuple[float, str]]:
+        """Reports of the snapshot that expired before they were restored"""
+        with self._lock:
+            stale, self._stale_reports = self._stale_reports, {}
+            return stale
+
+    def restore(self, report_cache: ReportCache) -> bool:
+        """Load the last snapshot into this state and `report_cache`"""
+        snapshot = None if self.store is None else self.store.load()
+        if snapshot is None:
+            return False
+
+        with self._lock:
+            self._dashboard_at = snapshot.dashboard_at
+            self._bitcoin_template = snapshot.bitcoin_template
+            self._dashboard_data = snapshot.dashboard_data
+            self._dashboard_png = snapshot.dashboard_png
+            now = report_cache.clock()
+            self._stale_reports = {
+                key: entry for key, entry in snapshot.reports.items() if entry[0] <= now
+            }
+        report_cache.restore(snapshot.reports)
+        logger.info(
+            f"Restored snapshot from {time.ctime(snapshot.created_at)}"
+            f" ({len(snapshot.reports)} reports)"
+        )
+        return True
+
+    def save(self, report_cache: ReportCache) -> None:
+        if self.store is None:
+            return
+        with self._lock:
+            snapshot = Snapshot(
+                created_at=time.time(),
+                dashboard_at=self._dashboard_at,
+                bitcoin_template=self._bitcoin_template,
+                dashboard_data=self._dashboard_data,
+                dashboard_png=self._dashboard_png,
+                reports=report_cache.entries(),
+            )
+        self.store.save(snapshot)
+
+
+_warm_state: Optional[WarmState] = None
+
+
+def get_warm_state() -> WarmState:
+    """
+    Return the shared warm state persisted at `SNAPSHOT_PATH` (default
+    to `<DATA_DIR>/snapshot.pkl.gz`). Setting `SNAPSHOT_PATH` to an empty
+    string keeps the state in memory only
+    """
+    global _warm_state
+    if _warm_state is None:
+        path: Optional[str] = os.getenv("SNAPSHOT_PATH")
+        if path is None:
+            path = data_path("snapshot.pkl.gz")
+        _warm_state = WarmState(SnapshotStore(path) if path != "" else None)
+    return _warm_state
@@ -1,141 +1,232 @@
 import re
-from typing import Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from . import indicators
 from .enums.signal import Signal
 
-from ta import trend, momentum
+# signals of `Solver.cdc_conditions`, Bearish when none of them holds
+CDC_SIGNALS: List[Signal] = [
+    Signal.Buy,
+    Signal.Sell,
+    Signal.BuyMore,
+    Signal.Bullish,
+    Signal.SellMore,
+]
 
 
 class Solver:
     @staticmethod
     def get_cdc_signal(src: pd.Series, current: bool = True) -> Optional[Signal]:
+        from ta import momentum, trend
+
         curr_idx = -1
         prev_idx = -2
         if not current:
             curr_idx -= 1
             prev_idx -= 1
 
-        # Buy/Sell
         if len(src) < 30:
             return None
 
         macd = trend.MACD(src).macd()
-        current_diff: float = macd[curr_idx]
-        prev_diff: float = macd[prev_idx]
-
-        if prev_diff < 0 < current_diff:  # cross over
-            return Signal.Buy
-        elif prev_diff > 0 > current_diff:  # cross under
-            return Signal.Sell
-
-        # Buymore sell more
-        # todo: check this
         rsi = momentum.rsi(src, 14)
         stoch_rsi = momentum.stoch(rsi, rsi, rsi, 14)
         k = trend.sma_indicator(stoch_rsi, 3)
         d = trend.sma_indicator(k, 3)
-        current_kd_diff = k[curr_idx] - d[curr_idx]
-        prev_kd_diff = k[prev_idx] - d[prev_idx]
 
-        if current_diff > 0:
-            if (
-                current_kd_diff > 0 > prev_kd_diff and k[-1] < 30 and current_diff > 0
-            ):  # cross over
-                return Signal.BuyMore
+        return Solver.classify_cdc_signal(
+            current_diff=macd.iloc[curr_idx],
+            prev_diff=macd.iloc[prev_idx],
+            current_kd_diff=k.iloc[curr_idx] - d.iloc[curr_idx],
+            prev_kd_diff=k.iloc[prev_idx] - d.iloc[prev_idx],
+            last_k=k.iloc[-1],
+        )
 
-            return Signal.Bullish
-        else:
-            if (
-                current_kd_diff < 0 < prev_kd_diff and k[-1] > 70 and current_diff < 0
-            ):  # cross under
-                return Signal.SellMore
-            return Signal.Bearish
+    @staticmethod
+    def cdc_conditions(
+        current_diff: Any,
+        prev_diff: Any,
+        current_kd_diff: Any,
+        prev_kd_diff: Any,
+        last_k: Any,
+    ) -> List[Any]:
+        """
+        Conditions of the CDC Action Zone signals in `CDC_SIGNALS`, in
+        order of priority, from MACD (EMA12 - EMA26) and Stochastic RSI
+        K - D of the current and previous bar. Work on floats as well as
+        arrays of tickers. Signal is Bearish when none holds
+        """
+        is_bullish = current_diff > 0
+        return [
+            # Buy/Sell
+            (prev_diff < 0) & (0 < current_diff),  # cross over
+            (prev_diff > 0) & (0 > current_diff),  # cross under
+            # Buymore sell more
+            # todo: check this
+            is_bullish & (current_kd_diff > 0) & (0 > prev_kd_diff) & (last_k < 30),
+            is_bullish,
+            (current_kd_diff < 0)
+            & (0 < prev_kd_diff)
+            & (last_k > 70)
+            & (current_diff < 0),  # cross under
+        ]
+
+    @staticmethod
+    def classify_cdc_signal(
+        current_diff: float,
+        prev_diff: float,
+        current_kd_diff: float,
+        prev_kd_diff: float,
+        last_k: float,
+    ) -> Signal:
+        """Classify CDC Action Zone signal of one ticker (see `cdc_conditions`)"""
+        conditions = Solver.cdc_conditions(
+            current_diff, prev_diff, current_kd_diff, prev_kd_diff, last_k
+        )
+        for condition, signal in zip(conditions, CDC_SIGNALS):
+            if condition:
+                return signal
+        return Signal.Bearish
+
+    @staticmethod
+    def get_cdc_signals(
+        close: np.ndarray, current: bool = True
+    ) -> List[Optional[Signal]]:
+        """
+        Batch version of `get_cdc_signal` computing every ticker at once
+
+        Arguments
+        ---------
+        close: np.ndarray
+            A (tickers x bars) close price matrix aligned to the latest bar.
+            Shorter histories are padded with NaN on the left
+            (see `indicators.stack_close_prices`)
+        current: bool
+            Whether to compute signal of the current bar or the previous bar
+
+        Return
+        ------
+        signals: List[Optional[Signal]]
+            Signal of every row, same as calling `get_cdc_signal` per ticker
+        """
+        close = np.asarray(close, dtype=float)
+        if close.ndim != 2:
+            raise ValueError(f"Expected a 2D close price matrix, got {close.ndim}D")
+
+        curr_idx = -1
+        prev_idx = -2
+        if not current:
+            curr_idx -= 1
+            prev_idx -= 1
+
+        n_bars: np.ndarray = close.shape[1] - indicators.first_valid_index(close)
+        if close.shape[1] < 30:
+            return [None] * close.shape[0]
+
+        macd = indicators.macd(close)
+        current_diff: np.ndarray = macd[:, curr_idx]
+        prev_diff: np.ndarray = macd[:, prev_idx]
+
+        k, d = indicators.stoch_rsi_kd(close)
+        current_kd_diff: np.ndarray = k[:, curr_idx] - d[:, curr_idx]
+        prev_kd_diff: np.ndarray = k[:, prev_idx] - d[:, prev_idx]
+
+        conditions = [n_bars < 30] + Solver.cdc_conditions(
+            current_diff, prev_diff, current_kd_diff, prev_kd_diff, k[:, -1]
+        )
+        choices = [None, *CDC_SIGNALS, Signal.Bearish]
+        choice_idx: np.ndarray = np.select(
+            conditions, range(len(conditions)), default=len(conditions)
+        )
+        return [choices[i] for i in choice_idx]
 
     @staticmethod
-    def solve_cdc_cross(
-        src: pd.Series, max_trial: int = 100000
-    ) -> Tuple[Optional[float], str]:
+    def solve_cdc_cross(src: pd.Series) -> Tuple[Optional[float], str]:
         """
-        Solve (brute force search) for EMA 12, EMA 26
-        crosses up/down given historical data
+        Solve for the closing price of the current bar that
+        makes EMA 12 and EMA 26 cross up/down given historical data
+
+        Since EMA[t] = alpha * price[t] + (1 - alpha) * EMA[t-1],
+        EMA 12 - EMA 26 is linear in the current price and the crossing
+        price is solved exactly from EMA states of the previous bar
 
         Arguments
         ---------
-        data: np.ndarray
-            A candlestick data loaded from `generate_candle_data` function
-        max_trial: np.ndarray
-            Maximum number of trial to be done during search
+        src: pd.Series
+            Close price from `generate_candle_data` function.
+            The last value is the current (unfinished) bar. Not modified
 
         Return
         ------
         result_price: Optional[float]
             A price that causes golden/death cross between
-            EMA12, EMA26. If return None, solution cannot be found
-            within given range of `delta` and `resolution`
+            EMA12, EMA26. If return None, no positive price can
+            cause the cross
+        template: str
+            A message describing the result
         """
-        fast_ema: np.ndarray = trend.ema_indicator(src.values, 12).values
-        slow_ema: np.ndarray = trend.ema_indicator(src.values, 26).values
-        ema_diff: float = fast_ema[-1] - slow_ema[-1]
-        current_price: float = src.values[-1]
+        values: np.ndarray = np.asarray(src, dtype=float)
+        current_price: float = values[-1]
 
         assert current_price > 0
         if abs(current_price) >= 1:
-            degree: int = len(str(current_price).split(".")[0]) - 1
             decimal_place: int = 4
         else:
-            regex_zero: int = len(
-                re.findall(r"0\.0+", f"{current_price:.20f}")[0].split(".")[-1]
+            leading_zero: str = re.findall(r"0\.(0*)", f"{current_price:.20f}")[0]
+            decimal_place: int = len(leading_zero) + 5
+
+        if len(values) < 2:
+            return None, "Could not solve for a solution!"
+
+        fast_alpha: float = 2 / (indicators.FAST_WINDOW + 1)
+        slow_alpha: float = 2 / (indicators.SLOW_WINDOW + 1)
+        # EMA states of the previous bar
+        prev_values: pd.Series = pd.Series(values[:-1])
+        prev_fast: float = (
+            prev_values.ewm(alpha=fast_alpha, adjust=False).mean().iloc[-1]
+        )
+        prev_slow: float = (
+            prev_values.ewm(alpha=slow_alpha, adjust=False).mean().iloc[-1]
+        )
+
+        fast_ema: float = fast_alpha * current_price + (1 - fast_alpha) * prev_fast
+        slow_ema: float = slow_alpha * current_price + (1 - slow_alpha) * prev_slow
+        ema_diff: float = fast_ema - slow_ema
+
+        # fast_alpha * p + (1 - fast_alpha) * prev_fast
+        #   == slow_alpha * p + (1 - slow_alpha) * prev_slow
+        result_price: float = (
+            (1 - slow_alpha) * prev_slow - (1 - fast_alpha) * prev_fast
+        ) / (fast_alpha - slow_alpha)
+
+        if not result_price > 0:
+            return None, "Could not solve for a solution!"
+
+        if ema_diff > 0:
+            template: str = (
+                "If today's price closed at $"
+                + f"%.{decimal_place}f" % result_price
+                + ", CDC V3 Action Zone will be bearish"
+            )
+        else:
+            template: str = (
+                "If today's price closed at $"
+                + f"%.{decimal_place}f" % result_price
+                + ", CDC V3 Action Zone will be bullish"
             )
-            degree: int = -int(regex_zero) - 1
-            decimal_place: int = -degree + 4
-        resolution: float = 10**degree
-
-        delta: float = resolution / 1000
-
-        if ema_diff >= 0:
-            # bullish, gradually step down price
-            delta = -delta
-
-        result_price: float = current_price
-        n_trial: int = 1
-        template: str = ""
-        while True:
-            if result_price < 0.0 or n_trial > max_trial:
-                template += "Could not solve for a solution!"
-                return template
-            src.iloc[-1] = result_price
-            fast_ema: np.ndarray = trend.ema_indicator(src.values, 12).values
-            slow_ema: np.ndarray = trend.ema_indicator(src.values, 26).values
-            diff: float = fast_ema[-1] - slow_ema[-1]
-            # print(result_price, diff)
-            if abs(diff) < abs(delta) / 10:
-                if ema_diff > 0:
-                    template += (
-                        "If today's price closed at $"
-                        + f"%.{decimal_place}f" % result_price
-                        + ", CDC V3 Action Zone will be bearish"
-                    )
-                else:
-                    template += (
-                        "If today's price closed at $"
-                        + f"%.{decimal_place}f" % result_price
-                        + ", CDC V3 Action Zone will be bullish"
-                    )
-                price_diff: float = result_price - current_price
-                sign: str = "+" if price_diff > 0 else "-"
-                percent_diff: float = price_diff / current_price
-                template += (
-                    f"\nThat will be {sign}$"
-                    + f"%.{decimal_place}f" % abs(result_price - current_price)
-                    + f" ({sign}"
-                    + "%.2f" % abs(percent_diff * 100)
-                    + "%) from the current price ($"
-                    + f"%.{decimal_place}f" % current_price
-                    + ")"
-                )
-                return result_price, template
-            result_price += delta
-            n_trial += 1
+        price_diff: float = result_price - current_price
+        sign: str = "+" if price_diff > 0 else "-"
+        percent_diff: float = price_diff / current_price
+        template += (
+            f"\nThat will be {sign}$"
+            + f"%.{decimal_place}f" % abs(result_price - current_price)
+            + f" ({sign}"
+            + "%.2f" % abs(percent_diff * 100)
+            + "%) from the current price ($"
+            + f"%.{decimal_place}f" % current_price
+            + ")"
+        )
+        return result_price, template
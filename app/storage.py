@@ -0,0 +1,11 @@
+import os
+
+
+def data_path(filename: str) -> str:
+    """
+    Resolve `filename` inside the local data directory (`DATA_DIR`,
+    default to `data/`) and make sure the directory exists
+    """
+    data_dir: str = os.getenv("DATA_DIR", "data")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, filename)
@@ -0,0 +1,112 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Type
+
+import pandas as pd
+import pytest
+
+from app.enums.exchange import Exchange
+from app.exchanges.base_exchange import ExchangeAPI
+from app.exchanges.exchange_provider import ExchangeProvider
+
+
+@dataclass(frozen=True)
+class KlineRequest:
+    symbol: str
+    interval: str
+    # `since` of `generate_candle_data` or `start` of `fetch_candle_page`
+    start: Optional[pd.Timestamp]
+    paged: bool
+
+
+class FakeExchangeAPI(ExchangeAPI):
+    """
+    Exchange adapter serving `candles` from memory. Every kline request
+    is recorded with the thread it ran on and the number of requests in
+    flight. Use the `fake_exchange` fixture for a fresh one per test
+    """
+
+    base_url: str = "http://localhost"
+    exchange: Exchange = Exchange.BINANCE
+    # seconds every kline request takes
+    delay: float = 0.0
+    candles: Dict[str, pd.DataFrame]
+    # symbols whose kline requests fail
+    failing: Set[str]
+    requests: List[KlineRequest]
+    threads: Set[str]
+    in_flight: int
+    max_in_flight: int
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.candles = {}
+        cls.failing = set()
+        cls.requests = []
+        cls.threads = set()
+        cls.in_flight = 0
+        cls.max_in_flight = 0
+        cls.request_lock = threading.Lock()
+
+    @classmethod
+    def serve(cls, request: KlineRequest) -> pd.DataFrame:
+        with cls.request_lock:
+            cls.requests.append(request)
+            cls.threads.add(threading.current_thread().name)
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(cls.delay)
+            if request.symbol in cls.failing:
+                raise ConnectionError(f"{request.symbol} is unavailable")
+            return cls.candles[request.symbol]
+        finally:
+            with cls.request_lock:
+                cls.in_flight -= 1
+
+    @classmethod
+    def generate_candle_data(
+        cls, symbol: str, interval: str = "1d", since: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        candles = cls.serve(KlineRequest(symbol, interval, since, paged=False))
+        if since is not None:
+            candles = candles[candles.index >= since]
+        return candles
+
+    @classmethod
+    def fetch_candle_page(
+        cls,
+        symbol: str,
+        interval: str,
+        start: pd.Timestamp,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        candles = cls.serve(KlineRequest(symbol, interval, start, paged=True))
+        candles = candles[candles.index >= start]
+        if end is not None:
+            candles = candles[candles.index < end]
+        return candles.iloc[: cls.page_size]
+
+    @classmethod
+    def fetch_universe(cls) -> List[str]:
+        return list(cls.candles)
+
+    @classmethod
+    def get_usdt_tickers(cls) -> List[str]:
+        return cls.get_universe()
+
+    @classmethod
+    def get_btc_tickers(cls) -> List[str]:
+        return []
+
+
+@pytest.fixture
+def fake_exchange(monkeypatch) -> Type[FakeExchangeAPI]:
+    """A fresh `FakeExchangeAPI` provided for every exchange"""
+
+    class TestExchangeAPI(FakeExchangeAPI):
+        pass
+
+    monkeypatch.setattr(ExchangeProvider, "provide", lambda exchange: TestExchangeAPI)
+    return TestExchangeAPI
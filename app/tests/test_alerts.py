@@ -0,0 +1,155 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app import alerts, indicators
+from app.alerts import AlertEngine, AlertStore, Transition
+from app.callback import CallBacks
+from app.delivery import get_delivery_queue
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.enums.signal import Signal
+from app.exchanges.kline_stream import KlineUpdate
+from app.indicator_state import IndicatorEngine
+from app.live import LiveSignals
+from app.solver import Solver
+from app.tests.test_solver import random_closes
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def send_message(self, chat_id, text) -> None:
+        self.messages.append((chat_id, text))
+
+
+def test_only_transitions_reach_subscribers():
+    engine = AlertEngine()
+    engine.subscribe(1, Exchange.KUCOIN, "USDT")
+    engine.subscribe(2, Exchange.KUCOIN, "btc-usdt")
+    engine.subscribe(3, Exchange.BINANCE, "usdt")
+
+    first = {
+        "BTC-USDT": Signal.Bullish,
+        "ETH-USDT": Signal.Bearish,
+        "XRP-USDT": Signal.Buy,
+    }
+    # nothing to compare the first signals with
+    assert engine.refresh(Exchange.KUCOIN, Pairs.USDT, first) == {}
+
+    routes = engine.refresh(
+        Exchange.KUCOIN,
+        Pairs.USDT,
+        {
+            "BTC-USDT": Signal.Sell,
+            "ETH-USDT": Signal.BuyMore,
+            "XRP-USDT": Signal.Bullish,
+            "ADA-USDT": Signal.Buy,
+        },
+    )
+
+    btc = Transition(Exchange.KUCOIN, "BTC-USDT", Signal.Bullish, Signal.Sell)
+    eth = Transition(Exchange.KUCOIN, "ETH-USDT", Signal.Bearish, Signal.BuyMore)
+    assert routes == {"1": [btc, eth], "2": [btc]}
+    assert engine.diff(Exchange.KUCOIN, {"BTC-USDT": Signal.Sell}) == []
+
+
+def test_alerts_persist_and_are_delivered_from_worker_threads(tmp_path):
+    path = str(tmp_path / "alerts.sqlite")
+    engine = AlertEngine(AlertStore(path))
+    engine.subscribe(1, Exchange.BINANCE, "usdt")
+    engine.refresh(Exchange.BINANCE, Pairs.USDT, {"BTCUSDT": Signal.Bullish})
+
+    # a new process starts from the stored signals and subscriptions
+    engine = AlertEngine(AlertStore(path))
+    assert engine.subscriptions(1) == [("binance", "usdt")]
+    bot = FakeBot()
+
+    async def run():
+        engine.attach(bot)
+        # scans refresh signals on worker threads
+        await asyncio.to_thread(
+            engine.refresh, Exchange.BINANCE, Pairs.USDT, {"BTCUSDT": Signal.Sell}
+        )
+        await asyncio.sleep(0)
+        await get_delivery_queue().join()
+
+    asyncio.run(run())
+
+    assert bot.messages == [
+        ("1", "🔔 [BINANCE] CDC Action Zone V3 \n\nBTCUSDT: Bullish → Sell")
+    ]
+
+
+def test_subscribe_commands(monkeypatch):
+    monkeypatch.setattr(alerts, "_alert_engine", AlertEngine())
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=42))
+
+    async def command(callback, *args, **kwargs):
+        context = SimpleNamespace(args=list(args), bot=FakeBot())
+        await callback(update, context, **kwargs)
+        await get_delivery_queue().join()
+        return context.bot.messages[-1][1]
+
+    async def run():
+        return [
+            await command(CallBacks.subscribe_callback, "ftx"),
+            await command(CallBacks.subscribe_callback, "bybit", "usdt"),
+            await command(CallBacks.subscribe_callback, "binance", "usdt", "ETHBTC"),
+            await command(CallBacks.subscriptions_callback),
+            await command(
+                CallBacks.subscribe_callback, "binance", "usdt", subscribe=False
+            ),
+            await command(CallBacks.subscriptions_callback),
+        ]
+
+    usage, unknown, subscribed, listed, unsubscribed, remaining = asyncio.run(run())
+
+    assert usage.startswith("Usage: /subscribe")
+    assert unknown.startswith("Unrecognized exchange: bybit")
+    assert subscribed == "Subscribed to binance usdt ETHBTC signal changes"
+    assert listed.endswith("binance ETHBTC\n    binance usdt")
+    assert unsubscribed == "Unsubscribed from binance usdt"
+    assert remaining.endswith("binance ETHBTC")
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_flapping_live_signal_alerts_once_the_bar_closes():
+    # a ticker whose MACD is below zero on its last closed bar
+    close = next(
+        close
+        for close in map(pd.Series.dropna, random_closes(50, seed=9))
+        if len(close) > 60 and indicators.macd(close.to_numpy()[None, :-1])[0, -1] < 0
+    )
+    cross_price, _ = Solver.solve_cdc_cross(close)
+    open_time = int(close.index[-1].timestamp())
+
+    engine = AlertEngine()
+    engine.subscribe(1, Exchange.BINANCE, "usdt")
+    routes = []
+    changes = []
+    live = LiveSignals(
+        on_change=lambda *change: changes.append(change),
+        on_close=lambda symbol, signal: routes.append(
+            engine.refresh(Exchange.BINANCE, Pairs.USDT, {symbol: signal})
+        ),
+    )
+    state = IndicatorEngine().update("binance", "BTCUSDT", "1d", close)
+    live.seed("BTCUSDT", state, open_time, float(close.iloc[-1]))
+
+    # the live bar swings around the price where EMA 12 crosses EMA 26
+    for price in [1.01, 0.99, 1.01, 0.99, 1.01]:
+        live.apply(KlineUpdate("BTCUSDT", open_time, *[cross_price * price] * 4, 1.0))
+    assert [signal for _, _, signal in changes].count(Signal.Buy) == 3
+
+    # the bar closes above the cross price and the next one opens
+    next_open = open_time + 86400
+    live.apply(KlineUpdate("BTCUSDT", next_open, *[cross_price] * 4, 1.0))
+    live.apply(KlineUpdate("BTCUSDT", next_open, *[cross_price * 0.9] * 4, 1.0))
+
+    alerted = [t for route in routes for t in route.get("1", [])]
+    assert len(alerted) == 1
+    assert alerted[0].signal == Signal.Buy
@@ -0,0 +1,90 @@
+import json
+from typing import List
+
+import pandas as pd
+import pytest
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+
+from app.api import AltCoinIndexAPI
+from app.http_client import HttpClient, get_http_client, set_http_client
+
+CHART_DATA = {
+    "labels": {"year": ["2024-01-01", "2024-01-02", "2024-01-03"]},
+    "values": {"year": ["40", "42", "45"]},
+    "notes": 'braces in strings } { and " quotes',
+}
+PAGE = (
+    "<html><head><script>window.chartdata_loaded = false;</script></head>"
+    "<body><script>if (chartdata) { draw(); }</script>"
+    f"<script>var chartdata = {json.dumps(CHART_DATA)};\nrender(chartdata);</script>"
+    "</body></html>"
+)
+
+
+class PageTransport(BaseAdapter):
+    """Serve `PAGE` with an ETag and answer 304 when it is presented"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.requests: List[PreparedRequest] = []
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        self.requests.append(request)
+        response = Response()
+        if request.headers.get("If-None-Match") == '"v1"':
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response._content = PAGE.encode()
+            response.headers["ETag"] = '"v1"'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def page_transport(monkeypatch, tmp_path):
+    monkeypatch.setenv("ALTCOIN_INDEX_PATH", str(tmp_path / "altcoin_index.json"))
+    monkeypatch.setattr(AltCoinIndexAPI, "series", None)
+    monkeypatch.setattr(AltCoinIndexAPI, "validators", {})
+    transport = PageTransport()
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=transport))
+    yield transport
+    set_http_client(previous_client)
+
+
+def test_extract_chart_data_skips_other_scripts():
+    assert AltCoinIndexAPI.extract_chart_data(PAGE) == CHART_DATA
+    with pytest.raises(ValueError):
+        AltCoinIndexAPI.extract_chart_data("<script>var chartdata = null;</script>")
+
+
+def test_unchanged_page_is_served_from_local_copy(monkeypatch, page_transport):
+    expected = pd.Series(
+        [40, 42, 45],
+        index=pd.to_datetime(CHART_DATA["labels"]["year"]),
+        name="Altcoin Season Index",
+    )
+    pd.testing.assert_series_equal(
+        AltCoinIndexAPI.get_historical_altcoin_index(), expected
+    )
+
+    def parse(html):
+        raise AssertionError("an unchanged page is not parsed")
+
+    monkeypatch.setattr(AltCoinIndexAPI, "parse_altcoin_index", parse)
+    # a new process starts from the local copy
+    AltCoinIndexAPI.series = None
+    AltCoinIndexAPI.validators = {}
+    pd.testing.assert_series_equal(
+        AltCoinIndexAPI.get_historical_altcoin_index(), expected, check_freq=False
+    )
+
+    assert "If-None-Match" not in page_transport.requests[0].headers
+    assert page_transport.requests[1].headers["If-None-Match"] == '"v1"'
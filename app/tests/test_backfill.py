@@ -0,0 +1,114 @@
+import asyncio
+from typing import Dict, Type
+
+import pandas as pd
+import pytest
+
+from app.candle_store import CandleStore
+from app.exchanges import BinanceAPI, OkxAPI
+from app.exchanges.backfill import (
+    history_start,
+    iter_backfill,
+    page_windows,
+    stitch_pages,
+)
+from app.exchanges.base_exchange import ExchangeAPI
+from app.tests.test_resample import recent_hourly_candles
+
+
+def backfill(
+    exchange_api: Type[ExchangeAPI], symbols, start, store=None
+) -> Dict[str, pd.DataFrame]:
+    async def run():
+        return {
+            symbol: candle_data
+            async for symbol, candle_data in iter_backfill(
+                exchange_api, symbols, "1h", start, store=store
+            )
+        }
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def paged_exchange(fake_exchange) -> Type[ExchangeAPI]:
+    fake_exchange.page_size = 50
+    fake_exchange.max_concurrency = 4
+    fake_exchange.delay = 0.01
+    return fake_exchange
+
+
+def setup_exchange(exchange_api, n_symbols: int, n_bars: int) -> None:
+    exchange_api.candles = {
+        f"C{i}": recent_hourly_candles(n_bars, seed=i) for i in range(n_symbols)
+    }
+
+
+def test_page_windows():
+    assert page_windows(3600 + 10, 3600 * 8, 3600, 3) == [
+        (3600, 3600 * 4),
+        (3600 * 4, 3600 * 7),
+        (3600 * 7, 3600 * 8),
+    ]
+
+
+@pytest.mark.parametrize("exchange_api", [BinanceAPI, OkxAPI])
+def test_single_timeframe_scans_are_not_backfilled(exchange_api):
+    now = 1704067200
+    # OKX pages hold 100 bars, less than the history of a coarse timeframe
+    assert history_start(exchange_api, ("1d",), now) is None
+    assert history_start(exchange_api, ("1w",), now) is None
+    assert history_start(exchange_api, ("1d", "1d"), now) is None
+
+
+def test_multi_timeframe_scans_are_backfilled_beyond_one_page():
+    now = 1704067200
+    # 200 weekly bars take 1400 daily candles, more than an OKX page
+    assert history_start(OkxAPI, ("1d", "1w"), now) == pd.Timestamp(
+        now - 200 * 7 * 86400, unit="s"
+    )
+    assert history_start(OkxAPI, ("1h", "4h"), now) is not None
+    # 1000 hourly Binance candles hold 200 4h bars
+    assert history_start(BinanceAPI, ("1h", "4h"), now) is None
+    assert history_start(BinanceAPI, ("1h", "1d"), now) is not None
+
+
+def test_stitch_pages_keeps_latest_duplicate():
+    first = recent_hourly_candles(3)
+    second = first.iloc[-1:] * 2
+
+    candle_data = stitch_pages([second, None, first.iloc[:0], first])
+
+    assert candle_data.index.equals(first.index)
+    assert candle_data["close"].iloc[-1] == first["close"].iloc[-1]
+
+
+def test_backfill_stitches_pages_within_concurrency(paged_exchange):
+    setup_exchange(paged_exchange, n_symbols=5, n_bars=480)
+    start = paged_exchange.candles["C0"].index[0]
+
+    history = backfill(paged_exchange, list(paged_exchange.candles), start)
+
+    for symbol, candles in paged_exchange.candles.items():
+        pd.testing.assert_frame_equal(history[symbol], candles, check_freq=False)
+    # ten pages of 50 hourly bars per symbol, the last one ahead of the live bar
+    assert len(paged_exchange.requests) == 5 * 10
+    assert all(request.paged for request in paged_exchange.requests)
+    assert paged_exchange.max_in_flight <= paged_exchange.max_concurrency
+
+
+def test_backfill_resumes_from_store(tmp_path, paged_exchange):
+    store = CandleStore(str(tmp_path / "candles.sqlite"))
+    setup_exchange(paged_exchange, n_symbols=2, n_bars=200)
+    start = paged_exchange.candles["C0"].index[0]
+
+    backfill(paged_exchange, ["C0", "C1"], start, store)
+    paged_exchange.requests.clear()
+    history = backfill(paged_exchange, ["C0", "C1"], start, store)
+
+    # only the page of the last stored, live, bar is downloaded again
+    assert len(paged_exchange.requests) == 2
+    for symbol, candles in paged_exchange.candles.items():
+        pd.testing.assert_frame_equal(
+            history[symbol], candles, check_freq=False, check_index_type=False
+        )
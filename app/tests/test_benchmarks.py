@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from app.enums.exchange import Exchange
+from app.exchanges.exchange_provider import ExchangeProvider
+from benchmarks.fixtures import EXCHANGES, load_fixture
+from benchmarks.run import main, replay, reset_caches, tickers_of
+
+
+@pytest.mark.parametrize("exchange", EXCHANGES)
+def test_replay_decodes_fixtures(exchange):
+    fixtures = {name: load_fixture(name, n_symbols=3) for name in EXCHANGES}
+    with replay(fixtures) as transport:
+        reset_caches()
+        tickers = tickers_of(exchange, 3)
+        candle_data = ExchangeProvider.provide(Exchange(exchange)).generate_candle_data(
+            tickers[0]
+        )
+        reset_caches()
+
+    assert len(tickers) == 3
+    assert transport.n_requests == 2
+    assert len(candle_data) > 30
+    assert candle_data.index.is_monotonic_increasing
+
+
+def test_benchmark_writes_results(tmp_path):
+    output = tmp_path / "bench.json"
+    result = CliRunner().invoke(
+        main,
+        ["--exchange", "binance", "--symbols", "2", "--repeat", "1"]
+        + ["--output", str(output)],
+    )
+
+    assert result.exit_code == 0, result.output
+    report = json.loads(output.read_text())
+    assert report["config"]["exchanges"] == ["binance"]
+    assert "decode.binance" in report["results"]
+    assert "cdc_template.warm.binance" in report["results"]
+    assert report["results"]["render_dashboard"]["median_ms"] > 0
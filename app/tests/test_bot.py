@@ -0,0 +1,221 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app import alerts, callback, snapshot
+from app import bot as bot_module
+from app.alerts import AlertEngine
+from app.bot import Bot
+from app.callback import CallBacks
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.report_cache import ReportCache
+from app.snapshot import Snapshot, SnapshotStore, WarmState
+from app.workers import run_in_chart_worker, shutdown_workers
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def send_message(self, chat_id, text) -> None:
+        self.messages.append((chat_id, text))
+
+
+def fake_update_context(args):
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=42))
+    context = SimpleNamespace(args=args, bot=FakeBot())
+    return update, context
+
+
+def test_cdc_scan_does_not_block_event_loop(monkeypatch):
+    def slow_cdc_template(pair, exchange, current, max_concurrency, timeframes):
+        time.sleep(0.3)
+        return f"{exchange} {pair} {current}"
+
+    monkeypatch.setattr(callback, "get_cdc_template", slow_cdc_template)
+    monkeypatch.setattr(snapshot, "_warm_state", WarmState(store=None))
+
+    async def run():
+        update, context = fake_update_context(["usdt"])
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await CallBacks.cdc_callback(update, context, is_current=False)
+        task.cancel()
+        return context.bot.messages, ticks
+
+    try:
+        messages, ticks = asyncio.run(run())
+    finally:
+        shutdown_workers()
+
+    assert messages[-1] == (42, "binance usdt False")
+    assert ticks > 10
+
+
+def test_dashboard_data_is_fetched_off_the_chart_worker(monkeypatch):
+    threads = {}
+
+    def fetch_dashboard_data():
+        threads["fetch"] = threading.current_thread().name
+        time.sleep(0.3)
+        return {}
+
+    def render_bitcoin_template(macro_data):
+        threads["render"] = threading.current_thread().name
+        return "template", b"png"
+
+    monkeypatch.setattr(callback, "fetch_dashboard_data", fetch_dashboard_data)
+    monkeypatch.setattr(callback, "render_bitcoin_template", render_bitcoin_template)
+
+    async def run():
+        dashboard = asyncio.create_task(callback.async_get_bitcoin_template())
+        await asyncio.sleep(0.05)
+        # other charts render while the dashboard waits for its data
+        start = time.perf_counter()
+        await run_in_chart_worker(lambda: None)
+        chart_wait = time.perf_counter() - start
+        return await dashboard, chart_wait
+
+    try:
+        dashboard, chart_wait = asyncio.run(run())
+    finally:
+        shutdown_workers()
+
+    assert dashboard == ("template", b"png")
+    assert chart_wait < 0.2
+    assert threads["fetch"].startswith("worker")
+    assert threads["render"].startswith("chart")
+
+
+def test_stale_reports_are_refreshed_on_their_timeframes(monkeypatch, tmp_path):
+    scans = []
+
+    def cdc_template(pair, exchange, current, max_concurrency, timeframes):
+        scans.append((exchange, pair, current, timeframes))
+        return ""
+
+    async def no_dashboard():
+        return "", b""
+
+    monkeypatch.setattr(callback, "get_cdc_template", cdc_template)
+    monkeypatch.setattr(callback, "async_get_bitcoin_template", no_dashboard)
+    store = SnapshotStore(str(tmp_path / "snapshot.pkl.gz"))
+    # reports that expired before the restart, on different timeframes
+    store.save(
+        Snapshot(
+            created_at=0.0,
+            reports={
+                (Exchange.BINANCE, Pairs.USDT, True, ("1d",), 0): (1.0, ""),
+                (Exchange.BINANCE, Pairs.USDT, True, ("1d",), 1): (2.0, ""),
+                (Exchange.OKEX, Pairs.BTC, True, ("4h", "1d"), 0): (1.0, ""),
+            },
+        )
+    )
+    state = WarmState(store)
+    assert state.restore(ReportCache())
+    monkeypatch.setattr(snapshot, "_warm_state", state)
+
+    try:
+        asyncio.run(callback.refresh_warm_state())
+    finally:
+        shutdown_workers()
+
+    assert sorted(scans) == [
+        (Exchange.BINANCE, Pairs.USDT, True, ("1d",)),
+        (Exchange.OKEX, Pairs.BTC, True, ("4h", "1d")),
+    ]
+
+
+def test_application_registers_commands():
+    application = Bot("123:ABC").build_application()
+    commands = {
+        command for handler in application.handlers[0] for command in handler.commands
+    }
+
+    assert commands == {
+        "dashboard",
+        "cdc",
+        "cdcaction",
+        "open_interest",
+        "subscribe",
+        "unsubscribe",
+        "subscriptions",
+    }
+    assert application.concurrent_updates > 1
+
+
+def test_reports_of_all_exchanges_are_sent_concurrently(monkeypatch):
+    sent = []
+
+    class FakeTelegramBot:
+        def __init__(self, token) -> None:
+            pass
+
+        async def send_message(self, chat_id, text) -> None:
+            sent.append((chat_id, text))
+
+    async def slow_cdc_template(pair, exchange):
+        await asyncio.sleep(0.2)
+        return f"{exchange} {pair}"
+
+    monkeypatch.setattr(bot_module.telegram, "Bot", FakeTelegramBot)
+    monkeypatch.setattr(alerts, "_alert_engine", AlertEngine())
+    monkeypatch.setattr(bot_module, "async_get_cdc_template", slow_cdc_template)
+
+    start = time.perf_counter()
+    asyncio.run(
+        Bot("123:ABC").send_reports({Exchange.BINANCE: "1", Exchange.BITKUB: "2"})
+    )
+
+    assert time.perf_counter() - start < 0.35
+    assert ("1", "binance usdt") in sent
+    assert ("2", "bitkub thb") in sent
+    assert len(sent) == 4
+
+
+def test_reports_are_rendered_once_for_every_chat(monkeypatch):
+    sent = []
+    scans = []
+
+    class FakeTelegramBot:
+        def __init__(self, token) -> None:
+            pass
+
+        async def send_message(self, chat_id, text) -> None:
+            await asyncio.sleep(0.05)
+            sent.append((chat_id, text))
+
+    async def cdc_template(pair, exchange):
+        scans.append((exchange, pair))
+        return f"{exchange} {pair}"
+
+    monkeypatch.setattr(bot_module.telegram, "Bot", FakeTelegramBot)
+    monkeypatch.setattr(bot_module, "async_get_cdc_template", cdc_template)
+    monkeypatch.setattr(alerts, "_alert_engine", AlertEngine())
+    monkeypatch.setenv("TELEGRAM_GLOBAL_RATE", "1000")
+    monkeypatch.setenv("TELEGRAM_CHAT_RATE", "100")
+    every_pair = [Pairs.USDT, Pairs.PERP, Pairs.BTC]
+    destinations = {str(i): every_pair for i in range(20)}
+    destinations["perp"] = [Pairs.PERP]
+
+    start = time.perf_counter()
+    asyncio.run(Bot("123:ABC").send_reports({Exchange.FTX: destinations}))
+
+    assert time.perf_counter() - start < 0.5
+    assert scans == [(Exchange.FTX, pair) for pair in every_pair]
+    assert [text for chat_id, text in sent if chat_id == "0"][1:] == [
+        "ftx usdt",
+        "ftx perp",
+        "ftx btc",
+    ]
+    assert [text for chat_id, text in sent if chat_id == "perp"][1:] == ["ftx perp"]
+    assert len(sent) == 20 * 4 + 2
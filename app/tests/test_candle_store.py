@@ -0,0 +1,130 @@
+import json
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+
+from app.candle_store import CandleStore
+from app.exchanges import BinanceAPI, KucoinAPI, OkxAPI
+from app.http_client import HttpClient, get_http_client, set_http_client
+
+
+def make_candles(
+    closes: List[float], start: str = "2024-01-01", freq: str = "1D"
+) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "open": closes,
+            "close": closes,
+            "high": closes,
+            "low": closes,
+            "volume": [1.0] * len(closes),
+        },
+        index=pd.date_range(start, periods=len(closes), freq=freq),
+    )
+
+
+def test_incremental_sync(tmp_path, fake_exchange):
+    store = CandleStore(str(tmp_path / "candles.sqlite"))
+
+    fake_exchange.candles = {"BTCUSDT": make_candles([1.0, 2.0, 3.0])}
+    first = store.sync(fake_exchange, "BTCUSDT")
+    assert first["close"].tolist() == [1.0, 2.0, 3.0]
+
+    # the live bar closes at a different price and a new bar opens
+    fake_exchange.candles = {"BTCUSDT": make_candles([1.0, 2.0, 3.5, 4.0])}
+    second = store.sync(fake_exchange, "BTCUSDT")
+
+    assert [request.start for request in fake_exchange.requests] == [
+        None,
+        pd.Timestamp("2024-01-03"),
+    ]
+    assert second["close"].tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert second.index.equals(fake_exchange.candles["BTCUSDT"].index)
+
+
+class KlineTransport(BaseAdapter):
+    """
+    Serve hourly klines of `open_times` in the payload of `exchange`,
+    honouring its range and page size parameters
+    """
+
+    def __init__(self, exchange: str, open_times: pd.DatetimeIndex) -> None:
+        super().__init__()
+        self.exchange: str = exchange
+        self.open_times: List[int] = [int(t.timestamp()) for t in open_times]
+        self.requests: List[Dict[str, str]] = []
+
+    def klines(self, params: Dict[str, str]) -> Any:
+        if self.exchange == "binance":
+            # startTime and endTime are inclusive ms
+            start = int(params.get("startTime", 0)) // 1000
+            end = int(params.get("endTime", 10**13)) // 1000
+            rows = [
+                [t * 1000, "1", "1", "1", str(i), "1", 0, "0", 0, "0", "0", "0"]
+                for i, t in enumerate(self.open_times)
+                if start <= t <= end
+            ]
+            return rows[: int(params.get("limit", 500))]
+        if self.exchange == "okex":
+            # before and after are exclusive ms, newest first
+            start = int(params.get("before", -1)) // 1000 + 1
+            end = int(params.get("after", 10**13)) // 1000 - 1
+            rows = [
+                [str(t * 1000), "1", "1", "1", str(i), "1", "0", "0", "1"]
+                for i, t in enumerate(self.open_times)
+                if start <= t <= end
+            ]
+            return {"code": "0", "data": rows[::-1][: int(params.get("limit", 100))]}
+        # kucoin: startAt and endAt are inclusive s, newest first
+        start = int(params.get("startAt", 0))
+        end = int(params.get("endAt", 10**10))
+        rows = [
+            [str(t), "1", str(i), "1", "1", "1", "0"]
+            for i, t in enumerate(self.open_times)
+            if start <= t <= end
+        ]
+        return {"code": "200000", "data": rows[::-1][:1500]}
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        params = {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+        self.requests.append(params)
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps(self.klines(params)).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize(
+    "exchange_api, symbol",
+    [(BinanceAPI, "BTCUSDT"), (OkxAPI, "BTC-USDT"), (KucoinAPI, "BTC-USDT")],
+)
+def test_sync_catches_up_more_than_a_page(tmp_path, exchange_api, symbol):
+    open_times = pd.date_range("2024-01-01", periods=2500, freq="1h")
+    transport = KlineTransport(exchange_api.exchange, open_times)
+    store = CandleStore(str(tmp_path / "candles.sqlite"))
+    interval = exchange_api.get_interval("1h")
+    store.save(
+        exchange_api.exchange, symbol, interval, make_candles([0.0] * 10, freq="1h")
+    )
+
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=transport))
+    try:
+        candle_data = store.sync(exchange_api, symbol, interval)
+    finally:
+        set_http_client(previous_client)
+
+    # the store is 2490 bars behind, the live bar is still reached
+    assert candle_data.index.equals(open_times)
+    assert candle_data["close"].iloc[10:].tolist() == list(range(10, 2500))
+    # one request per page from the last stored bar
+    assert len(transport.requests) == -(-2491 // exchange_api.page_size)
@@ -0,0 +1,57 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from app.charts import ChartCache, chart_key, render_dashboard, render_open_interest
+
+
+def dashboard_data(seed: int = 0, n_days: int = 60) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "close": rng.uniform(20000, 30000, n_days),
+            "Altcoin Season Index": rng.uniform(0, 100, n_days),
+            "Fear and Greed Index": rng.uniform(0, 100, n_days),
+            "Aggregated Open Interest": rng.uniform(1e10, 2e10, n_days),
+        },
+        index=pd.date_range("2023-01-01", periods=n_days, freq="1D"),
+    )
+
+
+def test_render_dashboard_in_memory_and_cached():
+    png = render_dashboard(dashboard_data())
+
+    assert png.startswith(b"\x89PNG")
+    assert render_dashboard(dashboard_data()) is png
+    assert render_dashboard(dashboard_data(seed=1)) is not png
+    assert plt.get_fignums() == []
+
+
+def test_render_open_interest():
+    data = dashboard_data()
+    oi = data["Aggregated Open Interest"]
+
+    png = render_open_interest("Binance", oi, data["close"])
+
+    assert png.startswith(b"\x89PNG")
+    assert render_open_interest("Okex", oi, data["close"]) is not png
+
+
+def test_chart_key_depends_on_values_and_index():
+    data = dashboard_data()
+    shifted = data.copy()
+    shifted.index = shifted.index + pd.Timedelta(days=1)
+
+    assert chart_key("dashboard", [data]) == chart_key("dashboard", [data.copy()])
+    assert chart_key("dashboard", [data]) != chart_key("dashboard", [shifted])
+
+
+def test_chart_cache_evicts_least_recently_used():
+    cache = ChartCache(maxsize=2)
+    cache.put("a", b"a")
+    cache.put("b", b"b")
+    cache.get("a")
+    cache.put("c", b"c")
+
+    assert cache.get("a") == b"a"
+    assert cache.get("b") is None
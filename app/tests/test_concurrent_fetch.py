@@ -0,0 +1,70 @@
+import asyncio
+from typing import List
+
+import pandas as pd
+import pytest
+
+from app.callback import scan_cdc_signals
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.exchanges.concurrent_fetch import iter_candle_data
+from app.indicator_state import IndicatorEngine
+from app.solver import Solver
+from app.tests.test_solver import random_closes
+from app.workers import shutdown_workers
+
+CLOSES = {f"C{i:03d}USDT": close.dropna() for i, close in enumerate(random_closes(60))}
+
+
+def test_concurrent_scans_share_one_fetch_pool(monkeypatch, fake_exchange):
+    monkeypatch.setenv("FETCH_THREADS", "4")
+    shutdown_workers()
+    symbols = [f"C{i:03d}USDT" for i in range(40)]
+    fake_exchange.delay = 0.01
+    fake_exchange.candles = {
+        symbol: pd.DataFrame({"close": [1.0]}) for symbol in symbols
+    }
+
+    async def scan() -> List[str]:
+        return [symbol async for symbol, _ in iter_candle_data(fake_exchange, symbols)]
+
+    async def run():
+        return await asyncio.gather(*[scan() for _ in range(4)])
+
+    try:
+        scans = asyncio.run(run())
+    finally:
+        shutdown_workers()
+
+    assert all(sorted(fetched) == symbols for fetched in scans)
+    # four scans of up to 8 requests each never exceed the shared pool
+    assert len(fake_exchange.threads) <= 4
+    assert all(name.startswith("fetch") for name in fake_exchange.threads)
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("current", [True, False])
+def test_scan_matches_sequential_signals(monkeypatch, fake_exchange, current):
+    monkeypatch.setenv("CANDLE_STORE_PATH", "")
+    fake_exchange.candles = {
+        symbol: close.to_frame("close") for symbol, close in CLOSES.items()
+    }
+    fake_exchange.failing = {"C007USDT"}
+    expected = {
+        symbol: Solver.get_cdc_signal(close, current=current)
+        for symbol, close in sorted(CLOSES.items())
+        if symbol not in fake_exchange.failing
+    }
+
+    try:
+        signals = asyncio.run(
+            scan_cdc_signals(
+                Pairs.USDT, Exchange.BINANCE, current, engine=IndicatorEngine()
+            )
+        )
+    finally:
+        shutdown_workers()
+
+    # every symbol is processed, the failing one is left out of the report
+    assert signals == expected
+    assert list(signals) == list(expected)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from app.delivery import DeliveryQueue
+
+
+class FakeBot:
+    def __init__(self, delay: float = 0.0, errors=()) -> None:
+        self.delay = delay
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text) -> str:
+        await asyncio.sleep(self.delay)
+        if len(self.errors) > 0:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+        return text
+
+
+def test_chats_are_served_in_parallel_and_in_order():
+    bot = FakeBot(delay=0.05)
+
+    async def broadcast():
+        queue = DeliveryQueue(global_rate=1000, chat_rate=1000, chat_burst=10)
+        futures = [
+            queue.send_message(bot, chat_id, f"{chat_id}-{i}")
+            for i in range(4)
+            for chat_id in ["a", "b", "c"]
+        ]
+        start = time.perf_counter()
+        await asyncio.gather(*futures)
+        elapsed = time.perf_counter() - start
+        await queue.close()
+        return elapsed
+
+    elapsed = asyncio.run(broadcast())
+
+    assert elapsed < 0.4
+    for chat_id in ["a", "b", "c"]:
+        texts = [text for chat, text in bot.sent if chat == chat_id]
+        assert texts == [f"{chat_id}-{i}" for i in range(4)]
+
+
+def test_chat_rate_limit():
+    bot = FakeBot()
+
+    async def send_many():
+        queue = DeliveryQueue(global_rate=1000, chat_rate=20, chat_burst=1)
+        start = time.perf_counter()
+        await asyncio.gather(*[queue.send_message(bot, 1, str(i)) for i in range(5)])
+        await queue.close()
+        return time.perf_counter() - start
+
+    assert asyncio.run(send_many()) >= 0.19
+
+
+def test_retry_after_and_network_errors_are_retried():
+    bot = FakeBot(errors=[RetryAfter(1), NetworkError("reset")])
+
+    async def send():
+        queue = DeliveryQueue(backoff=0.01)
+        start = time.perf_counter()
+        result = await queue.send_message(bot, 1, "hello")
+        await queue.close()
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(send())
+
+    assert result == "hello"
+    assert elapsed >= 1
+    assert bot.sent == [(1, "hello")]
+
+
+def test_failed_delivery_does_not_block_the_chat():
+    bot = FakeBot(errors=[NetworkError("down")] * 2 + [BadRequest("bad")])
+
+    async def send():
+        queue = DeliveryQueue(max_attempts=2, backoff=0.01)
+        first = queue.send_message(bot, 1, "first")
+        second = queue.send_message(bot, 1, "second")
+        third = queue.send_message(bot, 1, "third")
+        with pytest.raises(NetworkError):
+            await first
+        with pytest.raises(BadRequest):
+            await second
+        assert await third == "third"
+        await queue.close()
+
+    asyncio.run(send())
+
+
+def test_retry_after_holds_every_chat():
+    bot = FakeBot(errors=[RetryAfter(1)])
+
+    async def send():
+        queue = DeliveryQueue()
+        start = time.perf_counter()
+        flooded = queue.send_message(bot, 1, "flooded")
+        await asyncio.sleep(0.1)
+        # the flood limit applies to the bot, not only to the flooded chat
+        await queue.send_message(bot, 2, "other")
+        elapsed = time.perf_counter() - start
+        await flooded
+        await queue.close()
+        return elapsed
+
+    assert asyncio.run(send()) >= 1
+    assert sorted(bot.sent) == [(1, "flooded"), (2, "other")]
+
+
+def test_idle_chat_workers_exit():
+    bot = FakeBot()
+
+    async def send():
+        queue = DeliveryQueue(idle_timeout=0.05)
+        await asyncio.gather(*[queue.send_message(bot, i, "hello") for i in range(3)])
+        await asyncio.sleep(0.2)
+        idle = (dict(queue._queues), dict(queue._workers))
+        # a chat gets a new worker when it is messaged again
+        result = await queue.send_message(bot, 0, "again")
+        await queue.close()
+        return idle, result
+
+    idle, result = asyncio.run(send())
+
+    assert idle == ({}, {})
+    assert result == "again"
+    assert len(bot.sent) == 4
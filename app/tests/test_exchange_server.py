@@ -0,0 +1,35 @@
+from app.exchanges import BinanceAPI, BitkubAPI
+from app.http_client import HttpClient, get_http_client, set_http_client
+from benchmarks.exchange_server import ServerConfig, point_adapters_at, serve
+from benchmarks.fixtures import EXCHANGES, load_fixture
+
+
+def test_adapters_fetch_from_stand_in_server():
+    fixtures = {exchange: load_fixture(exchange, n_symbols=5) for exchange in EXCHANGES}
+    config = ServerConfig(latency=0.01)
+    with serve(config, fixtures) as server, point_adapters_at(server.base_url):
+        tickers = BitkubAPI.get_thb_tickers()
+        candle_data = BitkubAPI.generate_candle_data(tickers[0])
+
+    assert len(tickers) == 5
+    assert len(candle_data) > 30
+    assert server.stats.served == 2
+    assert server.stats.paths == {"/api/market/symbols": 1, "/tradingview/history": 1}
+    assert BitkubAPI.base_url == "https://api.bitkub.com"
+
+
+def test_client_backs_off_on_rate_limit():
+    fixtures = {"binance": load_fixture("binance", n_symbols=1)}
+    previous_client = get_http_client()
+    set_http_client(HttpClient())
+    try:
+        config = ServerConfig(rate_limit=5, burst=1)
+        with serve(config, fixtures) as server, point_adapters_at(server.base_url):
+            first = BinanceAPI.generate_candle_data("C000USDT")
+            second = BinanceAPI.generate_candle_data("C000USDT")
+    finally:
+        set_http_client(previous_client)
+
+    assert server.stats.rate_limited >= 1
+    assert server.stats.served == 2
+    assert first.equals(second)
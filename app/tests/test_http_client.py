@@ -0,0 +1,46 @@
+import json
+from typing import List
+
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+
+from app.exchanges import BinanceAPI
+from app.http_client import HttpClient, get_http_client, set_http_client
+
+
+class FakeTransport(BaseAdapter):
+    def __init__(self, payload) -> None:
+        super().__init__()
+        self.payload = payload
+        self.requests: List[PreparedRequest] = []
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        self.requests.append(request)
+        response = Response()
+        response.status_code = 200
+        response._content = json.dumps(self.payload).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def test_adapter_uses_injected_transport():
+    klines = [
+        [1704067200000, "1.0", "3.0", "0.5", "2.0", "10.0"] + [0] * 6,
+        [1704153600000, "2.0", "4.0", "1.5", "3.0", "20.0"] + [0] * 6,
+    ]
+    transport = FakeTransport(klines)
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=transport))
+    try:
+        candle_data = BinanceAPI.generate_candle_data("BTCUSDT")
+    finally:
+        set_http_client(previous_client)
+
+    assert len(transport.requests) == 1
+    assert transport.requests[0].url.startswith(f"{BinanceAPI.base_url}/api/v3/klines")
+    assert candle_data["close"].tolist() == [2.0, 3.0]
+    assert candle_data["high"].tolist() == [3.0, 4.0]
@@ -0,0 +1,123 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from app.indicator_state import IndicatorEngine, IndicatorState, IndicatorStateStore
+from app.solver import Solver
+from app.tests.test_solver import random_closes
+
+
+@pytest.mark.parametrize("current", [True, False])
+def test_incremental_signal_matches_full_recompute(tmp_path, current):
+    closes = random_closes(100, seed=2)
+    store = IndicatorStateStore(str(tmp_path / "indicator_state.sqlite"))
+
+    for n_new_bars in [0, 1, 5]:
+        # reload persisted state on every run like separate cron jobs
+        engine = IndicatorEngine(store)
+        for i, close in enumerate(closes):
+            src = close.iloc[: len(close) - 5 + n_new_bars]
+            signal = engine.get_cdc_signal("binance", str(i), "1d", src, current)
+            assert signal == Solver.get_cdc_signal(src, current=current)
+        engine.save()
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_seeded_state_matches_step_by_step_replay():
+    for close in random_closes(50, seed=4):
+        state = IndicatorState()
+        for open_time, value in zip(close.index.as_unit("s").asi8, close.values):
+            state = state.step(float(value), int(open_time))
+
+        seeded = IndicatorState.from_closes(
+            close.to_numpy(), int(close.index.as_unit("s").asi8[-1])
+        )
+
+        # NaN never compares equal, compare their serialized form
+        assert seeded.to_json() == state.to_json()
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_history_without_overlap_is_replayed_in_full():
+    close = random_closes(1, seed=6)[0].dropna()
+    close = close.iloc[-200:]
+    engine = IndicatorEngine()
+    engine.update("binance", "BTCUSDT", "1d", close.iloc[:100])
+
+    # a listing gap: the fetched history starts after the stored state
+    later = close.iloc[120:]
+    state = engine.update("binance", "BTCUSDT", "1d", later)
+
+    assert state.n_bars == len(later) - 1
+    assert (
+        state.to_json()
+        == IndicatorState.from_closes(
+            later.iloc[:-1].to_numpy(), int(later.index[-2].timestamp())
+        ).to_json()
+    )
+    for current in [True, False]:
+        assert engine.get_cdc_signal(
+            "binance", "BTCUSDT", "1d", later, current
+        ) == Solver.get_cdc_signal(later, current=current)
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_live_bar_ticks_do_not_advance_the_state():
+    close = random_closes(1, seed=7)[0].dropna()
+    engine = IndicatorEngine()
+    state = engine.update("binance", "BTCUSDT", "1d", close)
+
+    live = close.copy()
+    for price in [1.2, 0.7, 1.05, 0.9]:
+        # the live bar keeps its open time while its price moves
+        live.iloc[-1] = close.iloc[-1] * price
+        signal = engine.get_cdc_signal("binance", "BTCUSDT", "1d", live)
+
+        assert engine.update("binance", "BTCUSDT", "1d", live) is state
+        assert signal == Solver.get_cdc_signal(live)
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_concurrent_scans_save_and_reload_every_state(tmp_path):
+    closes = [close.dropna() for close in random_closes(40, seed=8)]
+    store = IndicatorStateStore(str(tmp_path / "indicator_state.sqlite"))
+    engine = IndicatorEngine(store)
+    errors = []
+
+    def scan(exchange: str) -> None:
+        try:
+            for i, close in enumerate(closes):
+                engine.update(exchange, str(i), "1d", close)
+                engine.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=scan, args=(exchange,))
+        for exchange in ["binance", "okex", "kucoin", "bitkub"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.save()
+
+    restored = IndicatorEngine(store)
+    assert errors == []
+    assert len(restored._states) == 4 * len(closes)
+    for key, state in engine._states.items():
+        assert restored._states[key].to_json() == state.to_json()
+    # a new run continues from the persisted state
+    close = closes[0]
+    later = pd.concat(
+        [
+            close,
+            pd.Series(
+                [close.iloc[-1] * 1.1], index=[close.index[-1] + pd.Timedelta(days=1)]
+            ),
+        ]
+    )
+    assert restored.get_cdc_signal("okex", "0", "1d", later) == Solver.get_cdc_signal(
+        later
+    )
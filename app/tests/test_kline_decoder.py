@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.exchanges import BinanceAPI, BitkubAPI, KucoinAPI, OkxAPI
+from app.exchanges.kline_decoder import decode_kline_rows, to_datetime_index
+from app.http_client import HttpClient, get_http_client, set_http_client
+from app.tests.test_http_client import FakeTransport
+
+DAY_1 = 1704067200  # 2024-01-01
+DAY_2 = 1704153600  # 2024-01-02
+
+# candle of day 1 and day 2 in the raw payload of every exchange
+PAYLOADS: Dict[str, Any] = {
+    # ms open times, string numbers, oldest first, 12 fields
+    "binance": [
+        [DAY_1 * 1000, "1.0", "3.0", "0.5", "2.0", "10.0", 0, "0", 0, "0", "0", "0"],
+        [DAY_2 * 1000, "2.0", "4.0", "1.5", "3.0", "20.0", 0, "0", 0, "0", "0", "0"],
+    ],
+    # ms open times as strings, newest first
+    "okex": {
+        "code": "0",
+        "data": [
+            [str(DAY_2 * 1000), "2.0", "4.0", "1.5", "3.0", "20.0", "0", "0", "1"],
+            [str(DAY_1 * 1000), "1.0", "3.0", "0.5", "2.0", "10.0", "0", "0", "1"],
+        ],
+    },
+    # s open times as strings, newest first, close before high and low
+    "kucoin": {
+        "code": "200000",
+        "data": [
+            [str(DAY_2), "2.0", "3.0", "4.0", "1.5", "20.0", "0"],
+            [str(DAY_1), "1.0", "2.0", "3.0", "0.5", "10.0", "0"],
+        ],
+    },
+    # tradingview format with s open times, one array per column
+    "bitkub": {
+        "s": "ok",
+        "t": [DAY_1, DAY_2],
+        "o": [1.0, 2.0],
+        "h": [3.0, 4.0],
+        "l": [0.5, 1.5],
+        "c": [2.0, 3.0],
+        "v": [10.0, 20.0],
+    },
+}
+FETCHES: Dict[str, Callable[[], pd.DataFrame]] = {
+    "binance": lambda: BinanceAPI.generate_candle_data("BTCUSDT"),
+    "okex": lambda: OkxAPI.generate_candle_data("BTC-USDT"),
+    "kucoin": lambda: KucoinAPI.generate_candle_data("BTC-USDT"),
+    "bitkub": lambda: BitkubAPI.generate_candle_data("BTC_THB"),
+}
+
+
+@pytest.mark.parametrize("exchange", list(PAYLOADS))
+def test_candles_are_decoded_oldest_first_with_datetime_index(exchange):
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=FakeTransport(PAYLOADS[exchange])))
+    try:
+        candle_data = FETCHES[exchange]()
+    finally:
+        set_http_client(previous_client)
+
+    assert list(candle_data.index) == [
+        pd.Timestamp("2024-01-01"),
+        pd.Timestamp("2024-01-02"),
+    ]
+    assert candle_data.to_dict("list") == {
+        "open": [1.0, 2.0],
+        "close": [2.0, 3.0],
+        "high": [3.0, 4.0],
+        "low": [0.5, 1.5],
+        "volume": [10.0, 20.0],
+    }
+    assert all(dtype == np.float64 for dtype in candle_data.dtypes)
+
+
+def test_ms_and_s_open_times_decode_to_the_same_index():
+    assert to_datetime_index([DAY_1 * 1000 + 999], unit="ms").equals(
+        to_datetime_index([str(DAY_1)], unit="s")
+    )
+
+
+def test_empty_klines_decode_to_empty_candle_data():
+    candle_data = decode_kline_rows([], time_idx=0, column_idx=[1, 4, 2, 3, 5])
+
+    assert len(candle_data) == 0
+    assert isinstance(candle_data.index, pd.DatetimeIndex)
+    assert list(candle_data.columns) == ["open", "close", "high", "low", "volume"]
@@ -0,0 +1,29 @@
+from app.enums.exchange import Exchange
+from app.exchanges.exchange_provider import ExchangeProvider
+from benchmarks.import_time import loaded_modules
+
+
+def test_bot_does_not_load_plotting_stack_or_adapters():
+    loaded = loaded_modules("import send_summary")
+
+    assert "telegram" in loaded
+    for module in ["matplotlib", "bs4", "ta", "app.exchanges.binance_api"]:
+        assert module not in loaded
+
+
+def test_provider_imports_only_requested_adapter():
+    loaded = loaded_modules(
+        "from app.exchanges.exchange_provider import ExchangeProvider;"
+        " from app.enums.exchange import Exchange;"
+        " ExchangeProvider.provide(Exchange.BITKUB)"
+    )
+
+    assert "app.exchanges.bitkub_api" in loaded
+    assert "app.exchanges.binance_api" not in loaded
+    assert "matplotlib" not in loaded
+
+
+def test_provider_returns_adapter_classes():
+    from app.exchanges import BitkubAPI
+
+    assert ExchangeProvider.provide(Exchange.BITKUB) is BitkubAPI
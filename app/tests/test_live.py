@@ -0,0 +1,131 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from app.enums.exchange import Exchange
+from app.exchanges.exchange_provider import ExchangeProvider
+from app.exchanges.kline_stream import KlineUpdate, OkxKlineStream
+from app.exchanges.okx_api import OkxAPI
+from app.indicator_state import IndicatorEngine
+from app.live import KlineStreamer, LiveSignals
+from app.solver import Solver
+from app.tests.test_solver import random_closes
+
+
+def unix_time(timestamp: pd.Timestamp) -> int:
+    return int(pd.Timestamp(timestamp).timestamp())
+
+
+def test_live_signals_follow_ticks():
+    closes = [close.dropna() for close in random_closes(5, seed=3)]
+    closes = [close for close in closes if len(close) > 40]
+    changes = []
+    live = LiveSignals(on_change=lambda *change: changes.append(change))
+    engine = IndicatorEngine()
+    for i, close in enumerate(closes):
+        state = engine.update("binance", str(i), "1d", close)
+        live.seed(str(i), state, unix_time(close.index[-1]), close.iloc[-1])
+
+    close = closes[0].copy()
+    n_evaluations = live.n_evaluations
+    for price in [close.iloc[-1] * 1.5, close.iloc[-1] * 0.5]:
+        # the live bar moves
+        close.iloc[-1] = price
+        live.apply(KlineUpdate("0", unix_time(close.index[-1]), *[price] * 4, 1.0))
+        assert live.signals()["0"] == Solver.get_cdc_signal(close)
+
+    # the live bar closes and a new one opens
+    next_open = close.index[-1] + pd.Timedelta(days=1)
+    close[next_open] = close.iloc[-1] * 1.1
+    live.apply(KlineUpdate("0", unix_time(next_open), *[close.iloc[-1]] * 4, 1.0))
+    assert live.signals()["0"] == Solver.get_cdc_signal(close)
+
+    # other symbols were not evaluated again
+    assert live.n_evaluations == n_evaluations + 3
+    assert not live.apply(KlineUpdate("unknown", 0, 1.0, 1.0, 1.0, 1.0, 1.0))
+    assert all(symbol == "0" for symbol, _, _ in changes)
+
+
+def test_okx_streamed_bars_open_with_history():
+    pytest.importorskip("aiohttp")
+    from benchmarks.kline_stream_server import encode_kline
+
+    open_time = unix_time("2024-01-03")
+    interval = OkxAPI.get_interval("1d")
+    (update,) = OkxKlineStream.parse(
+        encode_kline("okex", "BTC-USDT", interval, open_time, 1.0, 1.0)
+    )
+    assert update.open_time == open_time
+    # Hong Kong aligned daily bars open at 16:00 UTC the day before
+    (update,) = OkxKlineStream.parse(
+        encode_kline("okex", "BTC-USDT", "1D", open_time, 1.0, 1.0)
+    )
+    assert update.open_time == open_time - 8 * 3600
+
+
+@pytest.mark.parametrize("exchange", ["binance", "okex", "kucoin"])
+def test_stream_from_stand_in_server(monkeypatch, exchange):
+    pytest.importorskip("aiohttp")
+    from benchmarks.exchange_server import point_adapters_at, serve
+    from benchmarks.fixtures import load_fixture
+    from benchmarks.kline_stream_server import KlineStreamServer, point_streams_at
+
+    monkeypatch.setenv("CANDLE_STORE_PATH", "")
+    fixtures = {exchange: load_fixture(exchange, n_symbols=3)}
+
+    async def wait_evaluations(live: LiveSignals, n: int) -> None:
+        for _ in range(500):
+            if live.n_evaluations >= n:
+                return
+            await asyncio.sleep(0.01)
+        raise TimeoutError("update was not applied")
+
+    async def run(symbols, candle_data):
+        server = KlineStreamServer()
+        await server.start()
+        streamer = KlineStreamer(Exchange(exchange), symbols, engine=IndicatorEngine())
+        with point_streams_at(server):
+            task = asyncio.create_task(streamer.run())
+            try:
+                await server.wait_subscribed(exchange, symbols)
+                assert streamer.live.ready
+
+                close = candle_data["close"].copy()
+                n_evaluations = streamer.live.n_evaluations
+                close.iloc[-1] *= 1.3
+                await server.push(
+                    exchange, symbols[0], unix_time(close.index[-1]), close.iloc[-1]
+                )
+                await wait_evaluations(streamer.live, n_evaluations + 1)
+                assert streamer.live.signals()[symbols[0]] == Solver.get_cdc_signal(
+                    close
+                )
+                # only the symbol that ticked was evaluated
+                assert streamer.live.n_evaluations == n_evaluations + 1
+
+                # the live bar closes and a new one opens
+                next_open = close.index[-1] + pd.Timedelta(days=1)
+                close[next_open] = close.iloc[-1] * 0.8
+                await server.push(
+                    exchange, symbols[0], unix_time(next_open), close.iloc[-1]
+                )
+                await wait_evaluations(streamer.live, n_evaluations + 2)
+                assert streamer.live.signals()[symbols[0]] == Solver.get_cdc_signal(
+                    close
+                )
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await server.close()
+
+    with (
+        serve(fixtures=fixtures) as rest_server,
+        point_adapters_at(rest_server.base_url),
+    ):
+        exchange_api = ExchangeProvider.provide(Exchange(exchange))
+        symbols = exchange_api.get_usdt_tickers()
+        candle_data = exchange_api.generate_candle_data(
+            symbols[0], interval=exchange_api.get_interval("1d")
+        )
+        asyncio.run(run(symbols, candle_data))
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from app.macro_data import MacroData, MacroSource
+
+
+class FakeSource:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self) -> int:
+        self.calls += 1
+        time.sleep(self.delay)
+        self.release.wait()
+        if self.fail:
+            raise ConnectionError("site is down")
+        return self.calls
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def macro_data(sources, timeout: float = 1.0):
+    clock = Clock()
+    ttls = {"minutes": 300, "hours": 3600 * 6}
+    data = MacroData(
+        {
+            name: MacroSource(source, ttls.get(name, 60))
+            for name, source in sources.items()
+        },
+        timeout=timeout,
+        clock=clock,
+    )
+    return data, clock
+
+
+def test_sources_are_fetched_concurrently_and_cached_per_ttl():
+    sources = {name: FakeSource(delay=0.2) for name in ["minutes", "hours", "btc"]}
+    data, clock = macro_data(sources)
+
+    start = time.perf_counter()
+    assert data.get_many(list(sources)) == {"minutes": 1, "hours": 1, "btc": 1}
+    assert time.perf_counter() - start < 0.35
+
+    clock.now = 600
+    data.get_many(list(sources), revalidate=True)
+    assert [source.calls for source in sources.values()] == [2, 1, 2]
+
+
+def test_stale_value_is_served_while_refreshing():
+    source = FakeSource()
+    data, clock = macro_data({"minutes": source})
+    assert data.get("minutes") == 1
+
+    clock.now = 600
+    source.release.clear()
+    start = time.perf_counter()
+    # served from cache, refreshed in the background
+    assert data.get("minutes") == 1
+    assert data.get("minutes") == 1
+    assert time.perf_counter() - start < 0.1
+    source.release.set()
+    for _ in range(100):
+        if data.get("minutes") == 2:
+            break
+        time.sleep(0.01)
+
+    assert data.get("minutes") == 2
+    # concurrent readers shared one refresh
+    assert source.calls == 2
+
+
+def test_failed_or_slow_refresh_falls_back_to_stale_value():
+    source = FakeSource()
+    data, clock = macro_data({"minutes": source}, timeout=0.1)
+    assert data.get("minutes") == 1
+
+    clock.now = 600
+    source.fail = True
+    assert data.get_many(["minutes"], revalidate=True) == {"minutes": 1}
+
+    source.fail = False
+    source.release.clear()
+    start = time.perf_counter()
+    assert data.get_many(["minutes"], revalidate=True) == {"minutes": 1}
+    assert time.perf_counter() - start < 0.3
+    source.release.set()
+
+
+def test_source_without_value_raises():
+    source = FakeSource()
+    source.fail = True
+    data, _ = macro_data({"minutes": source}, timeout=0.1)
+
+    with pytest.raises(ConnectionError):
+        data.get("minutes")
+
+    source.fail = False
+    source.release.clear()
+    with pytest.raises(TimeoutError):
+        data.get("minutes")
+    source.release.set()
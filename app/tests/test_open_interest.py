@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app import callback, charts
+from app.callback import CallBacks
+from app.open_interest import (
+    AGGREGATED,
+    OpenInterestHistory,
+    OpenInterestStore,
+)
+from app.workers import shutdown_workers
+
+
+def open_interest_points(n_points: int = 24 * 30, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # hourly points starting on a Wednesday, a new exchange listed midway
+    index = pd.date_range("2024-01-03 05:00", periods=n_points, freq="h")
+    points = pd.DataFrame(
+        {
+            "binance": rng.uniform(1e9, 2e9, n_points),
+            "okex": rng.uniform(5e8, 1e9, n_points),
+            "bybit": rng.uniform(5e8, 1e9, n_points),
+        },
+        index=index,
+    )
+    points.iloc[: n_points // 2, 2] = np.nan
+    return points
+
+
+def test_levels_follow_incremental_updates(tmp_path):
+    points = open_interest_points()
+    history = OpenInterestHistory(OpenInterestStore(str(tmp_path / "oi.sqlite")))
+
+    assert history.update(points.iloc[:100]) == 100
+    # pages overlap, the last known point is still moving until the next page
+    moving = points.iloc[90:400].copy()
+    moving.iloc[-1] *= 1.1
+    assert history.update(moving) == 300
+    assert history.series("binance").iloc[-1] == moving["binance"].iloc[-1]
+    assert history.update(points.iloc[399:]) == len(points) - 400
+    assert history.update(points) == 0
+
+    expected = points.copy()
+    expected[AGGREGATED] = expected.fillna(0).sum(axis=1)
+    daily = expected.resample("1D").mean()
+    weekly = expected.resample("W-MON", label="left", closed="left").mean()
+
+    # a new process reads the same levels from the store
+    restored = OpenInterestHistory(OpenInterestStore(str(tmp_path / "oi.sqlite")))
+    for oi in [history, restored]:
+        assert set(oi.exchanges()) == {"binance", "okex", "bybit", AGGREGATED}
+        for exchange in oi.exchanges():
+            np.testing.assert_allclose(oi.series(exchange), expected[exchange])
+            np.testing.assert_allclose(oi.series(exchange, "1d"), daily[exchange])
+            np.testing.assert_allclose(oi.series(exchange, "1w"), weekly[exchange])
+        assert oi.series(AGGREGATED, "1d").index.equals(daily.index)
+        assert oi.series(AGGREGATED, "1w").index.equals(weekly.index)
+        assert oi.series(AGGREGATED).name == "Aggregated Open Interest"
+
+
+def test_only_new_points_are_stored(tmp_path):
+    points = open_interest_points(48)
+    store = OpenInterestStore(str(tmp_path / "oi.sqlite"))
+    saved = []
+    save = store.save
+    store.save = lambda new_points: saved.append(len(new_points)) or save(new_points)
+    history = OpenInterestHistory(store)
+
+    history.update(points.iloc[:40])
+    history.update(points)
+
+    # the last known point is written again with the new ones
+    assert saved == [40, 9]
+
+
+def run_open_interest_callback(monkeypatch, points: pd.DataFrame, args) -> List[str]:
+    history = OpenInterestHistory()
+    history.update(points)
+    macro_data = {
+        "open_interest": history,
+        "btc_usdt": pd.DataFrame({"close": points["okex"]}),
+    }
+    messages = []
+
+    async def send_message(chat_id, context, message) -> None:
+        messages.append(message)
+
+    async def send_photo(chat_id, context, photo, message="") -> None:
+        pass
+
+    monkeypatch.setattr(
+        callback, "get_macro_data", lambda: SimpleNamespace(get=macro_data.get)
+    )
+    monkeypatch.setattr(callback, "send_message", send_message)
+    monkeypatch.setattr(callback, "send_photo", send_photo)
+    monkeypatch.setattr(charts, "render_open_interest", lambda *args: b"png")
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=42))
+    context = SimpleNamespace(args=args)
+
+    try:
+        asyncio.run(CallBacks.open_interest_callback(update, context))
+    finally:
+        shutdown_workers()
+    return messages
+
+
+def test_open_interest_callback_prints_whole_dollars(monkeypatch):
+    points = open_interest_points(48)
+    points.iloc[-1, 0] = 12_345_678.4
+
+    messages = run_open_interest_callback(monkeypatch, points, ["binance"])
+
+    assert messages[-1].startswith(
+        "💰 Binance Future Open Interest:\n    $12,345,678 ("
+    )
+
+
+def test_open_interest_callback_with_a_single_point(monkeypatch):
+    points = open_interest_points(1)
+    points.iloc[-1, 0] = 12_345_678.4
+
+    messages = run_open_interest_callback(monkeypatch, points, ["binance"])
+    # a daily level of a single point
+    messages += run_open_interest_callback(monkeypatch, points, ["binance", "1d"])
+
+    assert messages == ["💰 Binance Future Open Interest:\n    $12,345,678\n\n"] * 2
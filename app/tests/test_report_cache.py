@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.report_cache import DAY, ReportCache, report_expiry
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_report_expires_at_next_close():
+    clock = FakeClock(10 * DAY + 3600)
+    cache = ReportCache(clock)
+    last_close, expires_at = report_expiry(clock(), current=False)
+    assert last_close == 10 * DAY
+    assert expires_at == 11 * DAY
+
+    assert cache.get_or_compute("key", lambda: "first", expires_at) == "first"
+    clock.now = 11 * DAY - 1
+    assert cache.get_or_compute("key", lambda: "second", expires_at) == "first"
+    clock.now = 11 * DAY
+    assert cache.get("key") is None
+
+
+def test_current_report_has_short_ttl(monkeypatch):
+    monkeypatch.setenv("CDC_REPORT_TTL", "60")
+    _, expires_at = report_expiry(10 * DAY + 3600, current=True)
+    assert expires_at == 10 * DAY + 3660
+    _, expires_at = report_expiry(11 * DAY - 10, current=True)
+    assert expires_at == 11 * DAY
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = ReportCache()
+    calls = []
+    started = threading.Event()
+
+    def compute() -> str:
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "report"
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [
+            executor.submit(cache.get_or_compute, "key", compute, time.time() + 60)
+            for _ in range(8)
+        ]
+        reports = [future.result() for future in futures]
+
+    assert reports == ["report"] * 8
+    assert len(calls) == 1
+
+
+def test_async_requests_share_one_computation():
+    cache = ReportCache()
+    calls = []
+
+    async def compute() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "report"
+
+    async def request_many():
+        expires_at = time.time() + 60
+        return await asyncio.gather(
+            *[cache.aget_or_compute("key", compute, expires_at) for _ in range(5)]
+        )
+
+    assert asyncio.run(request_many()) == ["report"] * 5
+    assert len(calls) == 1
+
+
+def test_failed_computation_is_not_cached():
+    cache = ReportCache()
+
+    def fail() -> str:
+        raise RuntimeError("exchange is down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("key", fail, time.time() + 60)
+    assert cache.get_or_compute("key", lambda: "report", time.time() + 60) == "report"
@@ -0,0 +1,96 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import callback as callback_module
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.indicator_state import IndicatorEngine
+from app.resample import finest_timeframe, resample_candles
+from app.solver import Solver
+
+
+def hourly_candles(n_bars: int, start: str = "2024-01-01", seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_ = np.concatenate(([100.0], close[:-1]))
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "close": close,
+            "high": np.maximum(open_, close) * 1.01,
+            "low": np.minimum(open_, close) * 0.99,
+            "volume": rng.uniform(1, 10, n_bars),
+        },
+        index=pd.date_range(start, periods=n_bars, freq="1h"),
+    )
+
+
+@pytest.mark.parametrize("timeframe, freq", [("4h", "4h"), ("1d", "1D")])
+def test_resample_matches_pandas(timeframe, freq):
+    candles = hourly_candles(24 * 10 + 7)
+    expected = candles.resample(freq).agg(
+        {"open": "first", "close": "last", "high": "max", "low": "min", "volume": "sum"}
+    )
+
+    resampled = resample_candles(candles, timeframe)
+
+    pd.testing.assert_frame_equal(resampled, expected, check_freq=False)
+
+
+def test_partial_bar_and_weekly_alignment():
+    # 2024-01-01 is a Monday, the last week has three days only
+    candles = hourly_candles(24 * 17)
+
+    weekly = resample_candles(candles, "1w")
+
+    assert weekly.index.tolist() == [
+        pd.Timestamp("2024-01-01"),
+        pd.Timestamp("2024-01-08"),
+        pd.Timestamp("2024-01-15"),
+    ]
+    assert weekly["close"].iloc[-1] == candles["close"].iloc[-1]
+    assert weekly["volume"].iloc[-1] == pytest.approx(
+        candles["volume"].iloc[-24 * 3 :].sum()
+    )
+
+
+def test_finest_timeframe():
+    assert finest_timeframe(["1d", "4h", "1w"]) == "4h"
+    with pytest.raises(ValueError):
+        finest_timeframe(["1d", "3m"])
+
+
+def recent_hourly_candles(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    # the last bar is the live one
+    start = pd.Timestamp.utcnow().tz_localize(None).floor("h") - pd.Timedelta(
+        hours=n_bars - 1
+    )
+    return hourly_candles(n_bars, start=str(start), seed=seed)
+
+
+def test_one_download_serves_every_timeframe(monkeypatch, fake_exchange):
+    monkeypatch.setattr(callback_module, "get_candle_store", lambda: None)
+    fake_exchange.candles = {
+        ticker: recent_hourly_candles(24 * 60, seed=i)
+        for i, ticker in enumerate(["C0", "C1", "C2"])
+    }
+
+    signals = asyncio.run(
+        callback_module.scan_cdc_timeframes(
+            Pairs.USDT,
+            Exchange.BINANCE,
+            ("1d", "1h", "4h"),
+            engine=IndicatorEngine(),
+        )
+    )
+
+    # history is only downloaded page by page
+    assert all(request.paged for request in fake_exchange.requests)
+    assert {request.interval for request in fake_exchange.requests} == {"1h"}
+    for ticker, candles in fake_exchange.candles.items():
+        for timeframe in ["1h", "4h", "1d"]:
+            close = resample_candles(candles, timeframe)["close"]
+            assert signals[timeframe][ticker] == Solver.get_cdc_signal(close)
@@ -1,6 +1,13 @@
+import os
+
+import click
+import pytest
+
 from app.callback import get_cdc_template
 from app.enums.exchange import Exchange
+from app.bot import report_pairs
 from app.enums.pairs import Pairs
+from send_summary import EXCHANGES, chat_destinations, select_chat_ids
 
 
 def test_okex():
@@ -20,3 +27,52 @@ def test_binance():
 def test_kucoin():
     get_cdc_template(Pairs.USDT, Exchange.KUCOIN)
     get_cdc_template(Pairs.BTC, Exchange.KUCOIN)
+
+
+def test_chat_destinations(monkeypatch):
+    monkeypatch.setenv("BINANCE_CHAT_ID", "1, 2")
+    monkeypatch.setenv("BINANCE_USDT_CHAT_ID", "2,3")
+    monkeypatch.setenv("KUCOIN_CHAT_ID", "")
+    monkeypatch.delenv("KUCOIN_USDT_CHAT_ID", raising=False)
+
+    destinations = {name: chat_destinations(name) for name in ["binance", "kucoin"]}
+
+    assert destinations["binance"] == {
+        "1": [Pairs.USDT],
+        "2": [Pairs.USDT],
+        "3": [Pairs.USDT],
+    }
+    assert select_chat_ids("all", destinations) == {
+        Exchange.BINANCE: destinations["binance"]
+    }
+    with pytest.raises(click.BadParameter):
+        select_chat_ids("kucoin", destinations)
+
+
+def read_workflow(name: str) -> str:
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "..", ".github", "workflows", name
+    )
+    with open(path) as f:
+        return f.read()
+
+
+def test_daily_report_workflow_installs_like_the_test_workflow():
+    workflow = read_workflow("daily_report.yml")
+
+    assert "requirements.txt" not in workflow
+    assert "python-version: 3.11" in workflow
+    assert "poetry install --without=dev" in read_workflow("pytest.yml")
+    assert "poetry install --without=dev" in workflow
+
+
+def test_daily_report_workflow_forwards_every_chat_id():
+    workflow = read_workflow("daily_report.yml")
+
+    for name in EXCHANGES:
+        envs = [f"{name.upper()}_CHAT_ID"] + [
+            f"{name.upper()}_{pair.upper()}_CHAT_ID"
+            for pair in report_pairs(Exchange(name))
+        ]
+        for env in envs:
+            assert f"{env}: ${{{{ secrets.{env} }}}}" in workflow
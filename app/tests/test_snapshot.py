@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.report_cache import DAY, ReportCache
+from app.snapshot import SnapshotStore, WarmState
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_warm_state_survives_restart(tmp_path):
+    path = str(tmp_path / "snapshot.pkl.gz")
+    clock = FakeClock(10 * DAY + 3600)
+    report_cache = ReportCache(clock)
+    closed_key = (Exchange.BINANCE, Pairs.USDT, False, 10 * DAY)
+    live_key = (Exchange.BINANCE, Pairs.USDT, True, 10 * DAY)
+    report_cache.get_or_compute(closed_key, lambda: "closed", 11 * DAY)
+    report_cache.get_or_compute(live_key, lambda: "live", clock.now + 900)
+
+    state = WarmState(SnapshotStore(path))
+    data = pd.DataFrame({"close": [1.0, 2.0]})
+    state.set_dashboard("template", data, b"png")
+    state.save(report_cache)
+
+    # restart an hour later, the live report has expired in the meantime
+    clock.now += 3600
+    restored_cache = ReportCache(clock)
+    restored = WarmState(SnapshotStore(path))
+    assert restored.restore(restored_cache)
+
+    _, template, png = restored.get_dashboard()
+    assert (template, png) == ("template", b"png")
+    assert restored_cache.get(closed_key) == "closed"
+    assert restored_cache.get(live_key) is None
+    assert list(restored.pop_stale_reports()) == [live_key]
+    assert restored.pop_stale_reports() == {}
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "snapshot.pkl.gz"
+    path.write_bytes(b"not a snapshot")
+
+    state = WarmState(SnapshotStore(str(path)))
+
+    assert not state.restore(ReportCache())
+    assert state.get_dashboard() is None
+    assert not WarmState(SnapshotStore(str(tmp_path / "missing"))).restore(
+        ReportCache()
+    )
+
+
+def test_concurrent_saves_leave_one_readable_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.pkl.gz")
+    report_cache = ReportCache()
+    state = WarmState(SnapshotStore(path))
+    state.set_dashboard("template", pd.DataFrame({"close": range(10_000)}), b"png")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: state.save(report_cache), range(32)))
+
+    assert os.listdir(tmp_path) == ["snapshot.pkl.gz"]
+    restored = WarmState(SnapshotStore(path))
+    assert restored.restore(ReportCache())
+    assert restored.get_dashboard()[1] == "template"
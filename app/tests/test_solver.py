@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta import trend
+
+from app import indicators
+from app.enums.signal import Signal
+from app.indicators import stack_close_prices
+from app.solver import Solver
+
+
+def random_closes(n_tickers: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    closes = []
+    for i in range(n_tickers):
+        n_bars = int(rng.integers(10, 400))
+        returns = rng.normal(0, 0.05, n_bars)
+        close = pd.Series(
+            100 * np.exp(np.cumsum(returns)),
+            index=pd.date_range("2022-01-01", periods=n_bars, freq="1D"),
+        )
+        if i % 10 == 0:
+            # missing candles, as produced by resampling OKX/FTX data
+            close.iloc[rng.integers(0, n_bars, 3)] = np.nan
+        closes.append(close)
+    return closes
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("current", [True, False])
+def test_batch_signal_matches_per_ticker(current):
+    closes = random_closes()
+    expected = [Solver.get_cdc_signal(close, current=current) for close in closes]
+
+    signals = Solver.get_cdc_signals(stack_close_prices(closes), current=current)
+
+    assert signals == expected
+    assert len(set(expected)) == 7  # every signal and None are covered
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_stoch_rsi_cross_under_above_zero_macd():
+    # a rally whose StochRSI K crosses under D above 70 on the last bar
+    rng = np.random.default_rng(12)
+    close = pd.Series(
+        100 * np.exp(np.cumsum(rng.normal(0.01, 0.03, 120))),
+        index=pd.date_range("2022-01-01", periods=120, freq="1D"),
+    )
+    matrix = stack_close_prices([close])
+    macd = indicators.macd(matrix)[0]
+    k, d = indicators.stoch_rsi_kd(matrix)
+    kd_diff = k[0] - d[0]
+    assert macd[-2] > 0 and macd[-1] > 0
+    assert kd_diff[-1] < 0 < kd_diff[-2] and k[0, -1] > 70
+
+    # SellMore needs a negative MACD
+    assert Solver.get_cdc_signal(close) == Signal.Bullish
+    assert Solver.get_cdc_signals(matrix) == [Signal.Bullish]
+
+
+def test_solve_cdc_cross():
+    close = random_closes(1, seed=1)[0].dropna()
+    original = close.copy()
+
+    price, template = Solver.solve_cdc_cross(close)
+
+    assert close.equals(original)
+    assert template.startswith(f"If today's price closed at ${price:.4f}")
+
+    crossed = close.copy()
+    crossed.iloc[-1] = price
+    ema_diff = (
+        trend.ema_indicator(crossed, 12).iloc[-1]
+        - trend.ema_indicator(crossed, 26).iloc[-1]
+    )
+    assert abs(ema_diff) < 1e-9 * price
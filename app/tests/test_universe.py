@@ -0,0 +1,244 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import pytest
+
+from app.exchanges import BinanceAPI, BitkubAPI, FtxAPI, KucoinAPI, OkxAPI
+from app.http_client import HttpClient, get_http_client, set_http_client
+from app.tests.test_http_client import FakeTransport
+
+DASHED_SYMBOLS: List[str] = [
+    "BTC-USDT",
+    "ETH-USDT",
+    "ETH-BTC",
+    "LINK-BTC",
+    "BTC3L-USDT",
+    "ETH3S-USDT",
+    "ETHUP-USDT",
+    "ETHDOWN-USDT",
+    "SUPER-USDT",
+    "BULL-USDT",
+    "BEAR-BTC",
+    "DAI-USDT",
+    "USDT-DAI",
+    "USDC-USDT",
+    "USDT-BTC",
+    "BTC-USDC",
+    "WBTC-BTC",
+    "BTC-EUR",
+]
+FTX_SYMBOLS: List[str] = [
+    "BTC/USD",
+    "ETH/USD",
+    "ETH/BTC",
+    "ETH/USDT",
+    "USDT/USD",
+    "BTC-PERP",
+    "ETH-PERP",
+    "ETHBULL/USD",
+    "ETHBEAR/USD",
+    "HALF/USD",
+    "HEDGE/USD",
+    "SUPER/USD",
+    "DAI/USD",
+    "BTC-0325/BTC",
+    "LINK/BTC",
+    "WBTC/BTC",
+]
+BITKUB_SYMBOLS: List[str] = [
+    "THB_BTC",
+    "THB_ETH",
+    "THB_USDT",
+    "THB_DAI",
+    "THB_BULL",
+    "THB_DOWN",
+    "USDT_THB",
+    "THB_THB",
+    "BTC_ETH",
+]
+
+
+# filters of the adapters before they shared `SymbolRule`
+def baseline_kucoin_usdt(s: str) -> bool:
+    return (
+        s[:4] != "USDT"
+        and "USDT" in s
+        and "UP" not in s
+        and "DOWN" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and "3L" not in s
+        and "3S" not in s
+        and s.count("USD") == 1
+        and "DAI" not in s
+    )
+
+
+def baseline_btc(s: str) -> bool:
+    # Kucoin and OKX
+    return (
+        s[:3] != "BTC"
+        and "USD" not in s
+        and "BTC" in s
+        and "DOWN" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and "DAI" not in s
+        and s.count("BTC") == 1
+    )
+
+
+def baseline_okx_usdt(s: str) -> bool:
+    return (
+        "USDT" in s
+        and "DOWN" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and "DAI" not in s
+        and s.count("USDT") == 1
+    )
+
+
+def baseline_ftx_usdt(s: str) -> bool:
+    return (
+        s[:3] != "USD"
+        and "USD" in s
+        and "USDT" not in s
+        and "UP" not in s
+        and "DOWN" not in s
+        and "HALF/" not in s
+        and "HEDGE/" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and s.count("USD") == 1
+        and "DAI" not in s
+    )
+
+
+def baseline_ftx_btc(s: str) -> bool:
+    return (
+        s[:3] != "BTC"
+        and "USD" not in s
+        and "BTC" in s
+        and "UP" not in s
+        and "DOWN" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and s.count("BTC") == 1
+        and "DAI" not in s
+        and "-" not in s
+    )
+
+
+def baseline_bitkub_thb(s: str) -> bool:
+    return (
+        s[:4] != "USDT"
+        and "THB" in s
+        and "USD" not in s
+        and "DOWN" not in s
+        and "BEAR" not in s
+        and "BULL" not in s
+        and "DAI" not in s
+        and s.count("THB") == 1
+    )
+
+
+@pytest.mark.parametrize(
+    "exchange_api, get_tickers, symbols, baseline",
+    [
+        (KucoinAPI, "get_usdt_tickers", DASHED_SYMBOLS, baseline_kucoin_usdt),
+        (KucoinAPI, "get_btc_tickers", DASHED_SYMBOLS, baseline_btc),
+        (OkxAPI, "get_usdt_tickers", DASHED_SYMBOLS, baseline_okx_usdt),
+        (OkxAPI, "get_btc_tickers", DASHED_SYMBOLS, baseline_btc),
+        (FtxAPI, "get_usdt_tickers", FTX_SYMBOLS, baseline_ftx_usdt),
+        (FtxAPI, "get_btc_tickers", FTX_SYMBOLS, baseline_ftx_btc),
+        (FtxAPI, "get_perp_tickers", FTX_SYMBOLS, lambda s: "PERP" in s),
+    ],
+)
+def test_symbol_rules_match_baseline_filters(
+    monkeypatch, exchange_api, get_tickers, symbols, baseline: Callable
+):
+    monkeypatch.setattr(exchange_api, "get_universe", lambda: symbols)
+
+    tickers = getattr(exchange_api, get_tickers)()
+
+    assert tickers == [symbol for symbol in symbols if baseline(symbol)]
+    assert len(tickers) > 0
+
+
+def test_thb_rule_matches_bitkub_baseline_filter(monkeypatch):
+    monkeypatch.setattr(BitkubAPI, "get_universe", lambda: BITKUB_SYMBOLS)
+
+    assert BitkubAPI.get_thb_tickers() == [
+        f"{symbol[4:]}_{symbol[:3]}"
+        for symbol in BITKUB_SYMBOLS
+        if baseline_bitkub_thb(symbol)
+    ]
+
+
+def test_usdt_and_btc_tickers_share_one_universe_snapshot():
+    symbols = ["BTCUSDT", "ETHUSDT", "ETHBTC", "BTCUPUSDT", "USDTDAI"]
+    transport = FakeTransport([{"symbol": symbol} for symbol in symbols])
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=transport))
+    BinanceAPI._universe = None
+    try:
+        usdt_tickers = BinanceAPI.get_usdt_tickers()
+        btc_tickers = BinanceAPI.get_btc_tickers()
+    finally:
+        BinanceAPI._universe = None
+        set_http_client(previous_client)
+
+    assert len(transport.requests) == 1
+    assert usdt_tickers == ["BTCUSDT", "ETHUSDT"]
+    assert btc_tickers == ["ETHBTC"]
+
+
+def test_universe_is_fetched_again_after_its_ttl(monkeypatch):
+    transport = FakeTransport([{"symbol": "BTCUSDT"}])
+    previous_client = get_http_client()
+    set_http_client(HttpClient(transport=transport))
+    monkeypatch.setattr(BinanceAPI, "universe_ttl", 0.05)
+    BinanceAPI._universe = None
+    try:
+        BinanceAPI.get_usdt_tickers()
+        BinanceAPI.get_usdt_tickers()
+        assert len(transport.requests) == 1
+
+        time.sleep(0.1)
+        transport.payload = [{"symbol": "BTCUSDT"}, {"symbol": "ETHUSDT"}]
+        assert BinanceAPI.get_usdt_tickers() == ["BTCUSDT", "ETHUSDT"]
+    finally:
+        BinanceAPI._universe = None
+        set_http_client(previous_client)
+
+    assert len(transport.requests) == 2
+
+
+def test_slow_universe_does_not_hold_other_exchanges():
+    release = threading.Event()
+    fetches: List[str] = []
+
+    class SlowAPI(BinanceAPI):
+        @staticmethod
+        def fetch_universe() -> List[str]:
+            fetches.append("slow")
+            release.wait(5)
+            return ["BTCUSDT"]
+
+    class FastAPI(KucoinAPI):
+        @staticmethod
+        def fetch_universe() -> List[str]:
+            return ["BTC-USDT"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        slow = [pool.submit(SlowAPI.get_universe) for _ in range(3)]
+        # the fast exchange answers while the slow one is still fetching
+        assert pool.submit(FastAPI.get_universe).result(timeout=1) == ["BTC-USDT"]
+        release.set()
+        assert [future.result() for future in slow] == [["BTCUSDT"]] * 3
+
+    # concurrent lookups of one exchange share its fetch
+    assert fetches == ["slow"]
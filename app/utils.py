@@ -1,37 +1,11 @@
-import time
+from .delivery import get_delivery_queue
 
-from loguru import logger
-from telegram.error import NetworkError
 
+async def send_message(chat_id, context, message) -> None:
+    """Send `message` to `chat_id` through the delivery queue"""
+    await get_delivery_queue().send_message(context.bot, chat_id, message)
 
-def send_message(chat_id, context, message) -> None:
-    is_sent: bool = False
-    while not is_sent:
-        try:
-            context.bot.send_message(
-                chat_id=chat_id,
-                text=message,
-            )
-            is_sent = True
-        except NetworkError as e:
-            logger.warning("Error sending message. Retrying in 0.5 second...")
-            logger.exception(e)
-            time.sleep(0.5)
-            continue
 
-
-def send_photo(chat_id, context, img_path, message="") -> None:
-    is_sent: bool = False
-    while not is_sent:
-        try:
-            context.bot.send_photo(
-                photo=open(img_path, "rb"),
-                chat_id=chat_id,
-                caption=message,
-            )
-            is_sent = True
-        except NetworkError as e:
-            logger.warning("Error sending message. Retrying in 0.5 second...")
-            logger.exception(e)
-            time.sleep(0.5)
-            continue
+async def send_photo(chat_id, context, photo: bytes, message="") -> None:
+    """Send PNG bytes `photo` to `chat_id` through the delivery queue"""
+    await get_delivery_queue().send_photo(context.bot, chat_id, photo, message)
@@ -0,0 +1,71 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_worker_pool: Optional[ThreadPoolExecutor] = None
+_chart_pool: Optional[ThreadPoolExecutor] = None
+_fetch_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_worker_pool() -> ThreadPoolExecutor:
+    """
+    Bounded pool running market scans and other blocking work off the
+    event loop. Its size is set by `WORKER_THREADS` (default to 4)
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("WORKER_THREADS", "4")),
+            thread_name_prefix="worker",
+        )
+    return _worker_pool
+
+
+def get_chart_pool() -> ThreadPoolExecutor:
+    """
+    Single-thread pool for chart rendering, which is CPU bound and
+    would otherwise compete with scans for the worker pool
+    """
+    global _chart_pool
+    if _chart_pool is None:
+        _chart_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart")
+    return _chart_pool
+
+
+def get_fetch_pool() -> ThreadPoolExecutor:
+    """
+    Pool shared by the candle downloads of every market scan, so
+    concurrent scans do not add threads of their own. Its size is set
+    by `FETCH_THREADS` (default to 32)
+    """
+    global _fetch_pool
+    if _fetch_pool is None:
+        _fetch_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv("FETCH_THREADS", "32")),
+            thread_name_prefix="fetch",
+        )
+    return _fetch_pool
+
+
+async def run_in_worker(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking `func` in the worker pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_worker_pool(), partial(func, *args, **kwargs))
+
+
+async def run_in_chart_worker(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `func`, which renders charts, in the chart pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_chart_pool(), partial(func, *args, **kwargs))
+
+
+def shutdown_workers() -> None:
+    global _worker_pool, _chart_pool, _fetch_pool
+    for pool in [_worker_pool, _chart_pool, _fetch_pool]:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    _worker_pool, _chart_pool, _fetch_pool = None, None, None
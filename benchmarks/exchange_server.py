@@ -0,0 +1,272 @@
+"""
+Local stand-in for the exchange REST APIs.
+
+Serves the Binance, Kucoin, OKX, Bitkub and FTX endpoints used by the
+adapters from fixtures, with configurable latency, jitter, error rate
+and 429 rate limiting, so scan concurrency and backoff can be measured
+on a laptop without touching the real exchanges:
+
+    python -m benchmarks.exchange_server --latency 0.08 --rate-limit 20
+    python -m benchmarks.exchange_server --scan binance --latency 0.08
+"""
+
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+import click
+
+from .fixtures import EXCHANGES, ExchangeFixture, load_fixture
+from .replay import route
+
+
+@dataclass
+class ServerConfig:
+    """
+    Arguments
+    ---------
+    latency: float
+        Seconds added to every response
+    jitter: float
+        Standard deviation in seconds of a gaussian noise added to `latency`
+    error_rate: float
+        Probability of answering a request with a 500 error
+    rate_limit: Optional[float]
+        Requests per second accepted before answering 429 with a
+        `Retry-After` header. Unlimited when None
+    burst: int
+        Number of requests accepted at once when `rate_limit` is set
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: Optional[float] = None
+    burst: int = 10
+    seed: int = 0
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    served: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    paths: Dict[str, int] = field(default_factory=dict)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate: float = rate
+        self.capacity: float = float(burst)
+        self.tokens: float = float(burst)
+        self.updated_at: float = time.monotonic()
+
+    def acquire(self) -> float:
+        """Take a token, or return seconds to wait until one is available"""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ExchangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures: Dict[str, ExchangeFixture],
+        config: ServerConfig,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        super().__init__((host, port), ExchangeRequestHandler)
+        self.fixtures: Dict[str, ExchangeFixture] = fixtures
+        self.config: ServerConfig = config
+        self.stats: ServerStats = ServerStats()
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.bucket: Optional[TokenBucket] = None
+        if config.rate_limit is not None:
+            self.bucket = TokenBucket(config.rate_limit, config.burst)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ExchangeRequestHandler(BaseHTTPRequestHandler):
+    server: ExchangeServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def _reply(
+        self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        server, config, stats = self.server, self.server.config, self.server.stats
+        with server.lock:
+            stats.requests += 1
+            path = self.path.split("?", 1)[0]
+            stats.paths[path] = stats.paths.get(path, 0) + 1
+            wait = 0.0 if server.bucket is None else server.bucket.acquire()
+            if wait > 0:
+                stats.rate_limited += 1
+            is_error = wait == 0 and server.random.random() < config.error_rate
+            delay = max(0.0, server.random.gauss(config.latency, config.jitter))
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+
+        try:
+            if wait > 0:
+                retry_after = str(math.ceil(wait))
+                self._reply(429, b'{"code": 429}', {"Retry-After": retry_after})
+                return
+
+            time.sleep(delay)
+            body: Optional[bytes] = route(server.fixtures, self.path)
+            if is_error:
+                with server.lock:
+                    stats.errors += 1
+                self._reply(500, b'{"code": 500}')
+            elif body is None:
+                self._reply(404, b'{"code": 404}')
+            else:
+                with server.lock:
+                    stats.served += 1
+                self._reply(200, body)
+        finally:
+            with server.lock:
+                stats.in_flight -= 1
+
+
+@contextmanager
+def serve(
+    config: Optional[ServerConfig] = None,
+    fixtures: Optional[Dict[str, ExchangeFixture]] = None,
+    port: int = 0,
+) -> Iterator[ExchangeServer]:
+    """Run an `ExchangeServer` in a background thread"""
+    if fixtures is None:
+        fixtures = {exchange: load_fixture(exchange) for exchange in EXCHANGES}
+    server = ExchangeServer(fixtures, config or ServerConfig(), port=port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+@contextmanager
+def point_adapters_at(base_url: str) -> Iterator[None]:
+    """Point the `base_url` of every exchange adapter at `base_url`"""
+    from app.exchanges.exchange_provider import ExchangeProvider
+
+    adapters: List = [
+        ExchangeProvider.provide(exchange)
+        for exchange in ExchangeProvider.exchangeMapper
+    ]
+    previous: List[str] = [adapter.base_url for adapter in adapters]
+    for adapter in adapters:
+        adapter.base_url = base_url
+        adapter._universe = None
+    try:
+        yield
+    finally:
+        for adapter, url in zip(adapters, previous):
+            adapter.base_url = url
+            adapter._universe = None
+
+
+@click.command()
+@click.option("--port", default=8080, help="port to listen on (0 for any)")
+@click.option("--latency", default=0.0, help="seconds added to every response")
+@click.option("--jitter", default=0.0, help="standard deviation of the latency")
+@click.option("--error-rate", default=0.0, help="probability of a 500 error")
+@click.option("--rate-limit", default=None, type=float, help="requests per second")
+@click.option("--burst", default=10, help="requests accepted at once")
+@click.option("--symbols", default=400, help="synthetic markets per exchange")
+@click.option(
+    "--scan",
+    type=click.Choice(EXCHANGES),
+    default=None,
+    help="run one market scan against the server and report, then exit",
+)
+@click.option("--max-concurrency", default=None, type=int)
+def main(
+    port: int,
+    latency: float,
+    jitter: float,
+    error_rate: float,
+    rate_limit: Optional[float],
+    burst: int,
+    symbols: int,
+    scan: Optional[str],
+    max_concurrency: Optional[int],
+) -> None:
+    config = ServerConfig(latency, jitter, error_rate, rate_limit, burst)
+    fixtures = {exchange: load_fixture(exchange, symbols) for exchange in EXCHANGES}
+
+    if scan is None:
+        server = ExchangeServer(fixtures, config, port=port)
+        click.echo(f"Serving exchange APIs on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+
+    import os
+
+    from loguru import logger
+
+    from app.callback import get_cdc_template
+    from app.enums.exchange import Exchange
+    from app.enums.pairs import Pairs
+
+    logger.disable("app")
+    os.environ["CANDLE_STORE_PATH"] = ""
+    os.environ["INDICATOR_STATE_PATH"] = ""
+    os.environ["ALERT_STORE_PATH"] = ""
+    pair = Pairs.THB if scan == "bitkub" else Pairs.USDT
+    with serve(config, fixtures, port) as server, point_adapters_at(server.base_url):
+        start = time.perf_counter()
+        get_cdc_template(pair, Exchange(scan), max_concurrency=max_concurrency)
+        elapsed = time.perf_counter() - start
+
+    stats = server.stats
+    click.echo(
+        f"{scan}: {elapsed:.2f} s, {stats.requests} requests"
+        f" ({stats.served} served, {stats.rate_limited} rate limited,"
+        f" {stats.errors} errors), {stats.max_in_flight} max in flight"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Exchange payload fixtures for offline benchmarks.
+
+Recorded payloads live in `benchmarks/fixtures/<exchange>/` as
+`universe.json` and `klines/<symbol>.json`. When an exchange has no
+recording, deterministic synthetic payloads in the exchange's wire
+format are generated instead so the suite always runs offline.
+Record real payloads with
+
+    python -m benchmarks.fixtures --exchange binance --symbols 50
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import quote, unquote
+
+import click
+import numpy as np
+
+FIXTURE_DIR: str = os.path.join(os.path.dirname(__file__), "fixtures")
+EXCHANGES: List[str] = ["binance", "okex", "kucoin", "bitkub", "ftx"]
+DAY: int = 86400
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.encode())
+
+
+def synthetic_symbols(exchange: str, n_symbols: int) -> List[str]:
+    bases = [f"C{i:03d}" for i in range(n_symbols)]
+    match exchange:
+        case "binance":
+            return [f"{base}USDT" for base in bases]
+        case "okex" | "kucoin":
+            return [f"{base}-USDT" for base in bases]
+        case "bitkub":
+            # market symbols are quoted first, e.g. THB_BTC
+            return [f"THB_{base}" for base in bases]
+        case "ftx":
+            return [f"{base}/USD" for base in bases]
+    raise ValueError(f"Unknown exchange: {exchange}")
+
+
+def synthetic_universe(exchange: str, symbols: List[str]) -> bytes:
+    match exchange:
+        case "binance":
+            payload = [{"symbol": s, "price": "1.0"} for s in symbols]
+        case "okex":
+            payload = {"code": "0", "data": [{"instId": s} for s in symbols]}
+        case "kucoin":
+            payload = {"code": "200000", "data": [{"symbol": s} for s in symbols]}
+        case "bitkub":
+            payload = {"error": 0, "result": [{"symbol": s} for s in symbols]}
+        case "ftx":
+            payload = {"success": True, "result": [{"name": s} for s in symbols]}
+    return json.dumps(payload).encode()
+
+
+def synthetic_klines(
+    exchange: str, symbol: str, n_bars: int = 500, end_time: int = 1704067200
+) -> bytes:
+    """Random-walk daily candles of `symbol` in the exchange's format"""
+    rng = np.random.default_rng(_seed(symbol))
+    close = 10 ** rng.uniform(-3, 4) * np.exp(np.cumsum(rng.normal(0, 0.04, n_bars)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, n_bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, n_bars))
+    volume = rng.uniform(1e3, 1e6, n_bars)
+    open_time = end_time - DAY * np.arange(n_bars)[::-1]
+
+    def fmt(values: np.ndarray) -> List[str]:
+        return [f"{v:.8g}" for v in values]
+
+    o, h, lo, c, v = map(fmt, [open_, high, low, close, volume])
+    rows = range(n_bars)
+    match exchange:
+        case "binance":
+            payload = [
+                [int(open_time[i]) * 1000, o[i], h[i], lo[i], c[i], v[i]]
+                + [int(open_time[i] + DAY) * 1000 - 1, "0", 100, "0", "0", "0"]
+                for i in rows
+            ]
+        case "okex":
+            payload = {
+                "code": "0",
+                "data": [
+                    [str(open_time[i] * 1000), o[i], h[i], lo[i], c[i], v[i]]
+                    + ["0", "0", "1"]
+                    for i in rows[::-1]
+                ],
+            }
+        case "kucoin":
+            payload = {
+                "code": "200000",
+                "data": [
+                    [str(open_time[i]), o[i], c[i], h[i], lo[i], v[i], "0"]
+                    for i in rows[::-1]
+                ],
+            }
+        case "bitkub":
+            payload = {
+                "s": "ok",
+                "t": open_time.tolist(),
+                "o": open_.tolist(),
+                "h": high.tolist(),
+                "l": low.tolist(),
+                "c": close.tolist(),
+                "v": volume.tolist(),
+            }
+        case "ftx":
+            payload = {
+                "success": True,
+                "result": [
+                    {
+                        "startTime": datetime.fromtimestamp(
+                            int(open_time[i]), tz=timezone.utc
+                        ).strftime("%Y-%m-%dT%H:%M:%S+00:00"),
+                        "time": int(open_time[i]) * 1000,
+                        "open": open_[i],
+                        "high": high[i],
+                        "low": low[i],
+                        "close": close[i],
+                        "volume": volume[i],
+                    }
+                    for i in rows
+                ],
+            }
+    return json.dumps(payload).encode()
+
+
+class ExchangeFixture:
+    """Universe and kline payloads of one exchange"""
+
+    def __init__(
+        self,
+        exchange: str,
+        universe: bytes,
+        klines: Dict[str, bytes],
+        recorded: bool,
+    ) -> None:
+        self.exchange: str = exchange
+        self.universe: bytes = universe
+        self.recorded: bool = recorded
+        self._klines: Dict[str, bytes] = klines
+        self._recorded_symbols: List[str] = sorted(klines)
+
+    def klines(self, symbol: str) -> bytes:
+        if symbol in self._klines:
+            return self._klines[symbol]
+        if self.recorded:
+            # reuse recordings for symbols that were not recorded
+            idx = _seed(symbol) % len(self._recorded_symbols)
+            return self._klines[self._recorded_symbols[idx]]
+        self._klines[symbol] = synthetic_klines(self.exchange, symbol)
+        return self._klines[symbol]
+
+
+def load_fixture(exchange: str, n_symbols: Optional[int] = None) -> ExchangeFixture:
+    """
+    Load recorded payloads of `exchange`, or synthesize `n_symbols`
+    (default to 400) markets when nothing is recorded
+    """
+    exchange_dir: str = os.path.join(FIXTURE_DIR, exchange)
+    universe_path: str = os.path.join(exchange_dir, "universe.json")
+    klines_dir: str = os.path.join(exchange_dir, "klines")
+    if os.path.exists(universe_path) and os.path.isdir(klines_dir):
+        with open(universe_path, "rb") as f:
+            universe = f.read()
+        klines: Dict[str, bytes] = {}
+        for filename in os.listdir(klines_dir):
+            with open(os.path.join(klines_dir, filename), "rb") as f:
+                klines[unquote(filename[: -len(".json")])] = f.read()
+        if len(klines) > 0:
+            return ExchangeFixture(exchange, universe, klines, recorded=True)
+
+    symbols = synthetic_symbols(exchange, n_symbols or 400)
+    universe = synthetic_universe(exchange, symbols)
+    return ExchangeFixture(exchange, universe, {}, recorded=False)
+
+
+@click.command()
+@click.option("--exchange", type=click.Choice(EXCHANGES), required=True)
+@click.option("--symbols", default=50, help="number of kline payloads to record")
+def record(exchange: str, symbols: int) -> None:
+    """Record live universe and kline payloads of an exchange"""
+    from app.enums.exchange import Exchange
+    from app.enums.pairs import Pairs
+    from app.exchanges.exchange_provider import ExchangeProvider
+    from app.http_client import get_http_client
+
+    exchange_api = ExchangeProvider.provide(Exchange(exchange))
+    pair = Pairs.THB if exchange == "bitkub" else Pairs.USDT
+    tickers = {
+        Pairs.THB: exchange_api.get_thb_tickers,
+        Pairs.USDT: exchange_api.get_usdt_tickers,
+    }[pair]()[:symbols]
+
+    # capture raw response bodies seen by the shared client
+    client = get_http_client()
+    bodies: List[bytes] = []
+    session_get = client.session.get
+
+    def recording_get(*args, **kwargs):
+        response = session_get(*args, **kwargs)
+        bodies.append(response.content)
+        return response
+
+    client.session.get = recording_get
+    exchange_api._universe = None
+    exchange_api.get_universe()
+    universe = bodies.pop()
+
+    klines_dir = os.path.join(FIXTURE_DIR, exchange, "klines")
+    os.makedirs(klines_dir, exist_ok=True)
+    with open(os.path.join(FIXTURE_DIR, exchange, "universe.json"), "wb") as f:
+        f.write(universe)
+    for ticker in tickers:
+        exchange_api.generate_candle_data(ticker)
+        with open(
+            os.path.join(klines_dir, f"{quote(ticker, safe='')}.json"), "wb"
+        ) as f:
+            f.write(bodies.pop())
+    click.echo(f"Recorded {len(tickers)} {exchange} kline payloads to {klines_dir}")
+
+
+if __name__ == "__main__":
+    record()
@@ -0,0 +1,88 @@
+"""
+Measure cold import time of the bot entry points.
+
+Every measurement imports the module in a fresh interpreter with
+`python -X importtime` and reports the cumulative import time along
+with the heavy dependencies that got loaded:
+
+    python -m benchmarks.import_time --output import_time.json
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+import click
+
+ROOT_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS: List[str] = ["run_bot", "send_summary", "app.bot", "app.callback"]
+HEAVY_MODULES: List[str] = [
+    "matplotlib",
+    "bs4",
+    "ta",
+    "pandas",
+    "numpy",
+    "telegram",
+    "app.exchanges.binance_api",
+    "app.exchanges.bitkub_api",
+    "app.exchanges.ftx_api",
+    "app.exchanges.kucoin_api",
+    "app.exchanges.okx_api",
+]
+
+
+def loaded_modules(statement: str, modules: List[str] = HEAVY_MODULES) -> List[str]:
+    """Which of `modules` are imported after running `statement`"""
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT_DIR,
+    ).stdout.split()
+    return [module for module in modules if module in output]
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative time to import `module` in a fresh interpreter"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT_DIR,
+    ).stderr
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000
+    raise ValueError(f"{module} not found in import time report")
+
+
+@click.command()
+@click.option("--repeat", default=5, help="fresh interpreters per entry point")
+@click.option("--output", default=None, help="write results to this JSON file")
+def main(repeat: int, output: Optional[str]) -> None:
+    results: Dict[str, Dict] = {}
+    for module in ENTRY_POINTS:
+        timings = [import_time_ms(module) for _ in range(repeat)]
+        results[module] = {
+            "min_ms": min(timings),
+            "loaded": loaded_modules(f"import {module}"),
+        }
+        click.echo(
+            f"{module:<16} {min(timings):>8.1f} ms"
+            f"  loads {', '.join(results[module]['loaded']) or '-'}"
+        )
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Local stand-in for the exchange kline WebSocket streams.
+
+Speaks the Binance combined stream, OKX business channel and Kucoin
+public channel protocols closely enough for `app.live.KlineStreamer`:
+subscriptions, pings and kline pushes. Updates are pushed explicitly
+with `KlineStreamServer.push`, or as random ticks from the command line
+to measure how fast live signals follow the stream:
+
+    python -m benchmarks.kline_stream_server --stream binance --rate 500
+"""
+
+import asyncio
+import json
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+import click
+from aiohttp import WSMsgType, web
+
+
+@dataclass
+class StreamStats:
+    connections: int = 0
+    subscribe_messages: int = 0
+    pushed: int = 0
+
+
+# OKX bars of 6 hours and more open at Hong Kong (UTC+8) midnight unless
+# their interval ends with "utc"
+OKX_BAR_SECONDS: Dict[str, int] = {"6H": 21600, "12H": 43200, "1D": 86400, "1W": 604800}
+HONG_KONG_OFFSET: int = 8 * 3600
+
+
+def okx_open_time(open_time: int, interval: str) -> int:
+    """Open time OKX reports for the `interval` bar live at `open_time`"""
+    seconds: Optional[int] = OKX_BAR_SECONDS.get(interval)
+    if seconds is None:
+        return open_time
+    # unix time 0 is a Thursday, OKX weeks start on Monday
+    origin: int = -HONG_KONG_OFFSET - (3 * 86400 if interval == "1W" else 0)
+    return (open_time - origin) // seconds * seconds + origin
+
+
+def encode_kline(
+    exchange: str,
+    symbol: str,
+    interval: str,
+    open_time: int,
+    close: float,
+    volume: float,
+) -> str:
+    """
+    Kline push of `exchange` for the bar live at `open_time` (unix seconds),
+    reported with the open time the exchange uses for `interval`
+    """
+    # flat bars, the stream only needs to move the close
+    price: str = str(close)
+    if exchange == "binance":
+        return json.dumps(
+            {
+                "stream": f"{symbol.lower()}@kline_{interval}",
+                "data": {
+                    "e": "kline",
+                    "E": int(time.time() * 1000),
+                    "s": symbol,
+                    "k": {
+                        "t": open_time * 1000,
+                        "s": symbol,
+                        "i": interval,
+                        "o": price,
+                        "c": price,
+                        "h": price,
+                        "l": price,
+                        "v": str(volume),
+                        "x": False,
+                    },
+                },
+            }
+        )
+    if exchange == "okex":
+        open_time = okx_open_time(open_time, interval)
+        return json.dumps(
+            {
+                "arg": {"channel": f"candle{interval}", "instId": symbol},
+                "data": [
+                    [str(open_time * 1000), *[price] * 4, str(volume), "0", "0", "0"]
+                ],
+            }
+        )
+    return json.dumps(
+        {
+            "type": "message",
+            "topic": f"/market/candles:{symbol}_{interval}",
+            "subject": "trade.candles.update",
+            "data": {
+                "symbol": symbol,
+                "candles": [str(open_time), *[price] * 4, str(volume), "0"],
+                "time": time.time_ns(),
+            },
+        }
+    )
+
+
+class KlineStreamServer:
+    """
+    Serve kline streams on `ws://host:port`: `/stream` (Binance),
+    `/ws/v5/business` (OKX) and `/kucoin` (Kucoin, whose token is issued
+    by `POST /api/v1/bullet-public`)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.stats: StreamStats = StreamStats()
+        # subscribed symbol to interval of every connection
+        self.connections: Dict[str, Dict[web.WebSocketResponse, Dict[str, str]]] = {
+            "binance": {},
+            "okex": {},
+            "kucoin": {},
+        }
+        self._runner: Optional[web.AppRunner] = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/stream", self._binance)
+        self.app.router.add_get("/ws/v5/business", self._okx)
+        self.app.router.add_get("/kucoin", self._kucoin)
+        self.app.router.add_post("/api/v1/bullet-public", self._kucoin_token)
+
+    @property
+    def base_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        for connections in self.connections.values():
+            for ws in list(connections):
+                await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def subscribed(self, exchange: str) -> Set[str]:
+        return {
+            symbol
+            for symbols in self.connections[exchange].values()
+            for symbol in symbols
+        }
+
+    async def wait_subscribed(
+        self, exchange: str, symbols: Iterable[str], timeout: float = 5.0
+    ) -> None:
+        keys = {
+            symbol.lower() if exchange == "binance" else symbol for symbol in symbols
+        }
+        deadline = time.monotonic() + timeout
+        while not keys <= self.subscribed(exchange):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{exchange} symbols were not subscribed")
+            await asyncio.sleep(0.01)
+
+    async def push(
+        self,
+        exchange: str,
+        symbol: str,
+        open_time: int,
+        close: float,
+        volume: float = 1.0,
+    ) -> int:
+        """Send a kline update to every connection subscribed to `symbol`"""
+        key: str = symbol.lower() if exchange == "binance" else symbol
+        n_sent: int = 0
+        for ws, symbols in list(self.connections[exchange].items()):
+            if key in symbols and not ws.closed:
+                await ws.send_str(
+                    encode_kline(
+                        exchange, symbol, symbols[key], open_time, close, volume
+                    )
+                )
+                n_sent += 1
+        self.stats.pushed += n_sent
+        return n_sent
+
+    async def _serve(self, request: web.Request, exchange: str, on_message):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats.connections += 1
+        self.connections[exchange][ws] = {}
+        if exchange == "kucoin":
+            await ws.send_str(json.dumps({"id": "welcome", "type": "welcome"}))
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    await on_message(ws, self.connections[exchange][ws], message.data)
+        finally:
+            del self.connections[exchange][ws]
+        return ws
+
+    async def _binance(self, request: web.Request) -> web.WebSocketResponse:
+        async def on_message(ws, symbols: Dict[str, str], data: str) -> None:
+            payload = json.loads(data)
+            if payload.get("method") == "SUBSCRIBE":
+                self.stats.subscribe_messages += 1
+                for stream in payload["params"]:
+                    symbol, interval = stream.split("@kline_")
+                    symbols[symbol] = interval
+                await ws.send_str(json.dumps({"result": None, "id": payload["id"]}))
+
+        return await self._serve(request, "binance", on_message)
+
+    async def _okx(self, request: web.Request) -> web.WebSocketResponse:
+        async def on_message(ws, symbols: Dict[str, str], data: str) -> None:
+            if data == "ping":
+                await ws.send_str("pong")
+                return
+            payload = json.loads(data)
+            if payload.get("op") == "subscribe":
+                self.stats.subscribe_messages += 1
+                for arg in payload["args"]:
+                    symbols[arg["instId"]] = arg["channel"][len("candle") :]
+                    await ws.send_str(json.dumps({"event": "subscribe", "arg": arg}))
+
+        return await self._serve(request, "okex", on_message)
+
+    async def _kucoin(self, request: web.Request) -> web.WebSocketResponse:
+        async def on_message(ws, symbols: Dict[str, str], data: str) -> None:
+            payload = json.loads(data)
+            if payload.get("type") == "ping":
+                await ws.send_str(json.dumps({"id": payload["id"], "type": "pong"}))
+            elif payload.get("type") == "subscribe":
+                self.stats.subscribe_messages += 1
+                topics = payload["topic"].split(":", 1)[1]
+                for topic in topics.split(","):
+                    symbol, interval = topic.rsplit("_", 1)
+                    symbols[symbol] = interval
+                await ws.send_str(json.dumps({"id": payload["id"], "type": "ack"}))
+
+        return await self._serve(request, "kucoin", on_message)
+
+    async def _kucoin_token(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "code": "200000",
+                "data": {
+                    "token": "stand-in",
+                    "instanceServers": [
+                        {
+                            "endpoint": f"{self.base_url}/kucoin",
+                            "protocol": "websocket",
+                            "pingInterval": 18000,
+                            "pingTimeout": 10000,
+                        }
+                    ],
+                },
+            }
+        )
+
+
+@contextmanager
+def point_streams_at(server: KlineStreamServer) -> Iterator[None]:
+    """Point every kline stream at `server`"""
+    from app.exchanges.kline_stream import (
+        BinanceKlineStream,
+        KucoinKlineStream,
+        OkxKlineStream,
+    )
+
+    previous = (
+        BinanceKlineStream.url,
+        OkxKlineStream.url,
+        KucoinKlineStream.token_url,
+    )
+    BinanceKlineStream.url = f"{server.base_url}/stream"
+    OkxKlineStream.url = f"{server.base_url}/ws/v5/business"
+    KucoinKlineStream.token_url = f"{server.http_url}/api/v1/bullet-public"
+    try:
+        yield
+    finally:
+        (
+            BinanceKlineStream.url,
+            OkxKlineStream.url,
+            KucoinKlineStream.token_url,
+        ) = previous
+
+
+async def tick(
+    server: KlineStreamServer, exchange: str, rate: float, seed: int = 0
+) -> None:
+    """Push `rate` random walk updates per second to subscribed symbols"""
+    rng = random.Random(seed)
+    closes: Dict[str, float] = {}
+    bar: int = 86400
+    while True:
+        symbols = sorted(server.subscribed(exchange))
+        if len(symbols) == 0:
+            await asyncio.sleep(0.1)
+            continue
+        symbol = rng.choice(symbols)
+        closes[symbol] = close = closes.get(symbol, 100.0) * (1 + rng.gauss(0, 0.01))
+        open_time = int(time.time()) // bar * bar
+        # binance stream names are lower case
+        name = symbol.upper() if exchange == "binance" else symbol
+        await server.push(exchange, name, open_time, close)
+        await asyncio.sleep(1 / rate)
+
+
+@click.command()
+@click.option("--port", default=8081, help="port to listen on (0 for any)")
+@click.option(
+    "--stream",
+    type=click.Choice(["binance", "okex", "kucoin"]),
+    default="binance",
+    help="exchange whose stream is measured",
+)
+@click.option("--symbols", default=400, help="synthetic markets to stream")
+@click.option("--rate", default=500.0, help="updates pushed per second")
+@click.option("--duration", default=10.0, help="seconds to measure")
+def main(port: int, stream: str, symbols: int, rate: float, duration: float) -> None:
+    import os
+
+    from loguru import logger
+
+    from app.callback import get_tickers
+    from app.enums.exchange import Exchange
+    from app.enums.pairs import Pairs
+    from app.exchanges.exchange_provider import ExchangeProvider
+    from app.live import KlineStreamer
+
+    from .exchange_server import point_adapters_at, serve
+    from .fixtures import EXCHANGES, load_fixture
+
+    logger.disable("app")
+    os.environ["CANDLE_STORE_PATH"] = ""
+    os.environ["INDICATOR_STATE_PATH"] = ""
+    os.environ["ALERT_STORE_PATH"] = ""
+    fixtures = {exchange: load_fixture(exchange, symbols) for exchange in EXCHANGES}
+
+    async def measure(streamer: KlineStreamer) -> None:
+        server = KlineStreamServer(port=port)
+        await server.start()
+        with point_streams_at(server):
+            task = asyncio.create_task(streamer.run())
+            await server.wait_subscribed(stream, streamer.symbols, timeout=60)
+            ticker = asyncio.create_task(tick(server, stream, rate))
+            start_evaluations = streamer.live.n_evaluations
+            start = time.perf_counter()
+            await asyncio.sleep(duration)
+            elapsed = time.perf_counter() - start
+            n_evaluations = streamer.live.n_evaluations - start_evaluations
+            ticker.cancel()
+            task.cancel()
+            await asyncio.gather(ticker, task, return_exceptions=True)
+        await server.close()
+        click.echo(
+            f"{stream}: {len(streamer.symbols)} symbols over"
+            f" {server.stats.connections} connections,"
+            f" {server.stats.pushed / elapsed:.0f} updates/s pushed,"
+            f" {n_evaluations / elapsed:.0f} signals/s evaluated"
+        )
+
+    with (
+        serve(fixtures=fixtures) as rest_server,
+        point_adapters_at(rest_server.base_url),
+    ):
+        exchange_api = ExchangeProvider.provide(Exchange(stream))
+        tickers = get_tickers(exchange_api, Pairs.USDT)
+        asyncio.run(measure(KlineStreamer(Exchange(stream), tickers)))
+
+
+if __name__ == "__main__":
+    main()
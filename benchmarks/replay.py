@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from requests.adapters import BaseAdapter
+from requests.models import PreparedRequest, Response
+
+from .fixtures import ExchangeFixture
+
+
+def route(fixtures: Dict[str, ExchangeFixture], url: str) -> Optional[bytes]:
+    """Payload of the exchange endpoint requested by `url`, if any"""
+    parsed = urlparse(url)
+    query: Dict[str, str] = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+    path: str = parsed.path
+
+    if path.endswith("/api/v3/ticker/price"):
+        return fixtures["binance"].universe
+    if path.endswith("/api/v3/klines"):
+        return fixtures["binance"].klines(query["symbol"])
+    if path.endswith("/api/v5/market/tickers"):
+        return fixtures["okex"].universe
+    if path.endswith("/api/v5/market/history-candles"):
+        return fixtures["okex"].klines(query["instId"])
+    if path.endswith("/api/v1/symbols"):
+        return fixtures["kucoin"].universe
+    if path.endswith("/api/v1/market/candles"):
+        return fixtures["kucoin"].klines(query["symbol"])
+    if path.endswith("/api/market/symbols"):
+        return fixtures["bitkub"].universe
+    if path.endswith("/tradingview/history"):
+        return fixtures["bitkub"].klines(query["symbol"])
+    if path.endswith("/markets"):
+        return fixtures["ftx"].universe
+    if path.endswith("/candles") and "/markets/" in path:
+        market: str = unquote(path.split("/markets/", 1)[1][: -len("/candles")])
+        return fixtures["ftx"].klines(market)
+    return None
+
+
+class ReplayTransport(BaseAdapter):
+    """
+    Serve exchange requests from fixtures instead of the network.
+    Mount it with `HttpClient(transport=ReplayTransport(...))`
+    """
+
+    def __init__(self, fixtures: Dict[str, ExchangeFixture]) -> None:
+        super().__init__()
+        self.fixtures: Dict[str, ExchangeFixture] = fixtures
+        self.n_requests: int = 0
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        self.n_requests += 1
+        body: Optional[bytes] = route(self.fixtures, request.url)
+
+        response = Response()
+        response.status_code = 404 if body is None else 200
+        response._content = b"{}" if body is None else body
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self) -> None:
+        pass
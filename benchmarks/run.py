@@ -0,0 +1,305 @@
+"""
+Offline benchmark of the CDC scan pipeline.
+
+Exchange requests are served from fixtures (see `benchmarks.fixtures`)
+so every stage can be timed reproducibly without network access:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Results are written as JSON with min/median/mean milliseconds per stage.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
+
+import click
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app import (
+    alerts,
+    callback,
+    candle_store,
+    charts,
+    indicator_state,
+    report_cache,
+)
+from app.enums.exchange import Exchange
+from app.enums.pairs import Pairs
+from app.exchanges import ExchangeAPI
+from app.exchanges.exchange_provider import ExchangeProvider
+from app.http_client import HttpClient, get_http_client, set_http_client
+from app.indicators import stack_close_prices
+from app.solver import Solver
+
+from .fixtures import EXCHANGES, ExchangeFixture, load_fixture
+from .replay import ReplayTransport
+
+PAIRS: Dict[str, Pairs] = {
+    "binance": Pairs.USDT,
+    "okex": Pairs.USDT,
+    "kucoin": Pairs.USDT,
+    "bitkub": Pairs.THB,
+    "ftx": Pairs.USDT,
+}
+
+
+def timeit(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run `func` `repeat` times and summarize wall time in milliseconds"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "mean_ms": statistics.fmean(timings),
+        "repeat": repeat,
+    }
+
+
+@contextmanager
+def replay(fixtures: Dict[str, ExchangeFixture]) -> Iterator[ReplayTransport]:
+    """Route every exchange request to `fixtures`"""
+    previous_client = get_http_client()
+    transport = ReplayTransport(fixtures)
+    set_http_client(HttpClient(transport=transport))
+    try:
+        yield transport
+    finally:
+        set_http_client(previous_client)
+
+
+@contextmanager
+def environ(**values: str) -> Iterator[None]:
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def reset_caches() -> None:
+    """Forget cached universes, stores, indicator state, alerts and reports"""
+    ExchangeAPI._universe = None
+    for exchange in ExchangeProvider.exchangeMapper:
+        ExchangeProvider.provide(exchange)._universe = None
+    candle_store._candle_store = None
+    indicator_state._indicator_engine = None
+    alerts._alert_engine = None
+    report_cache._report_cache = None
+
+
+def tickers_of(exchange: str, n_symbols: int) -> List[str]:
+    exchange_api = ExchangeProvider.provide(Exchange(exchange))
+    return callback.get_tickers(exchange_api, PAIRS[exchange])[:n_symbols]
+
+
+def decode(exchange_api: ExchangeAPI, tickers: List[str]) -> None:
+    for ticker in tickers:
+        exchange_api.generate_candle_data(ticker)
+
+
+def cold_cdc_template(pair: Pairs, exchange: Exchange) -> None:
+    reset_caches()
+    callback.get_cdc_template(pair, exchange)
+
+
+def warm_cdc_template(pair: Pairs, exchange: Exchange) -> None:
+    report_cache.get_report_cache().clear()
+    callback.get_cdc_template(pair, exchange)
+
+
+def render_uncached(data: pd.DataFrame) -> None:
+    charts.get_chart_cache().clear()
+    charts.render_dashboard(data)
+
+
+def dashboard_data(n_days: int = 300) -> pd.DataFrame:
+    """Synthetic input of `render_dashboard` shaped like the live dashboard"""
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2023-01-01", periods=n_days, freq="1D")
+    return pd.DataFrame(
+        {
+            "Altcoin Season Index": rng.uniform(0, 100, n_days),
+            "Fear and Greed Index": rng.uniform(0, 100, n_days),
+            "Aggregated Open Interest": rng.uniform(1e10, 2e10, n_days),
+            "close": 20000 * np.exp(np.cumsum(rng.normal(0, 0.03, n_days))),
+        },
+        index=index,
+    )
+
+
+def run_benchmarks(
+    exchanges: List[str], n_symbols: int, repeat: int
+) -> Dict[str, Dict[str, float]]:
+    fixtures: Dict[str, ExchangeFixture] = {
+        exchange: load_fixture(exchange, n_symbols) for exchange in EXCHANGES
+    }
+    results: Dict[str, Dict[str, float]] = {}
+
+    with replay(fixtures):
+        reset_caches()
+        closes: List[pd.Series] = []
+        for exchange in exchanges:
+            exchange_api = ExchangeProvider.provide(Exchange(exchange))
+            tickers = tickers_of(exchange, n_symbols)
+
+            results[f"decode.{exchange}"] = timeit(
+                partial(decode, exchange_api, tickers), repeat
+            )
+            if exchange == "binance":
+                closes = [
+                    exchange_api.generate_candle_data(ticker)["close"]
+                    for ticker in tickers
+                ]
+
+        if len(closes) == 0:
+            exchange_api = ExchangeProvider.provide(Exchange(exchanges[0]))
+            closes = [
+                exchange_api.generate_candle_data(ticker)["close"]
+                for ticker in tickers_of(exchanges[0], n_symbols)
+            ]
+
+        results["solver.get_cdc_signal"] = timeit(
+            lambda: [Solver.get_cdc_signal(close) for close in closes], repeat
+        )
+        close_matrix = stack_close_prices(closes)
+        results["solver.get_cdc_signals"] = timeit(
+            lambda: Solver.get_cdc_signals(close_matrix), repeat
+        )
+        results["solver.solve_cdc_cross"] = timeit(
+            lambda: [Solver.solve_cdc_cross(close) for close in closes], repeat
+        )
+
+        for exchange in exchanges:
+            pair, exchange_enum = PAIRS[exchange], Exchange(exchange)
+
+            # cold: nothing cached, every candle fetched and replayed in full
+            with environ(
+                CANDLE_STORE_PATH="", INDICATOR_STATE_PATH="", ALERT_STORE_PATH=""
+            ):
+                results[f"cdc_template.cold.{exchange}"] = timeit(
+                    partial(cold_cdc_template, pair, exchange_enum), repeat
+                )
+
+            # warm: candle store and indicator state are already up to date
+            with tempfile.TemporaryDirectory() as data_dir, environ(DATA_DIR=data_dir):
+                os.environ.pop("CANDLE_STORE_PATH", None)
+                os.environ.pop("INDICATOR_STATE_PATH", None)
+                os.environ.pop("ALERT_STORE_PATH", None)
+                reset_caches()
+                callback.get_cdc_template(pair, exchange_enum)
+                results[f"cdc_template.warm.{exchange}"] = timeit(
+                    partial(warm_cdc_template, pair, exchange_enum), repeat
+                )
+                # cached: the report is served from the report cache
+                results[f"cdc_template.cached.{exchange}"] = timeit(
+                    partial(callback.get_cdc_template, pair, exchange_enum), repeat
+                )
+                reset_caches()
+
+    data = dashboard_data()
+    results["render_dashboard"] = timeit(partial(render_uncached, data), repeat)
+    results["render_dashboard.cached"] = timeit(
+        partial(charts.render_dashboard, data), repeat
+    )
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Stages whose median is `threshold` times slower than `baseline`"""
+    regressions: List[str] = []
+    for stage, timing in results.items():
+        if stage not in baseline:
+            continue
+        ratio = timing["median_ms"] / max(baseline[stage]["median_ms"], 1e-9)
+        click.echo(
+            f"{stage:<36} {baseline[stage]['median_ms']:>10.2f} ms"
+            f" -> {timing['median_ms']:>10.2f} ms ({ratio:.2f}x)"
+        )
+        if ratio > threshold:
+            regressions.append(stage)
+    return regressions
+
+
+@click.command()
+@click.option(
+    "--exchange",
+    "exchanges",
+    type=click.Choice(EXCHANGES),
+    multiple=True,
+    help="exchanges to benchmark (default to all)",
+)
+@click.option("--symbols", default=100, help="number of symbols per exchange")
+@click.option("--repeat", default=5, help="number of timed runs per stage")
+@click.option("--output", default=None, help="write results to this JSON file")
+@click.option("--compare", "baseline_path", default=None, help="previous results")
+@click.option("--threshold", default=1.2, help="slowdown ratio flagged as regression")
+def main(
+    exchanges: List[str],
+    symbols: int,
+    repeat: int,
+    output: Optional[str],
+    baseline_path: Optional[str],
+    threshold: float,
+) -> None:
+    logger.disable("app")
+    exchanges = list(exchanges) or EXCHANGES
+    results = run_benchmarks(exchanges, symbols, repeat)
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {"exchanges": exchanges, "symbols": symbols, "repeat": repeat},
+        "results": results,
+    }
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline_path is None:
+        click.echo(json.dumps(report, indent=2))
+        return
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], threshold)
+    if len(regressions) > 0:
+        click.echo(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
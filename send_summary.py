@@ -2,50 +2,95 @@ import asyncio
 import os
 import os.path
 import sys
+from typing import Dict, List
 
 import click
 from dotenv import load_dotenv
 from loguru import logger
 
-from app.bot import Bot
-from app.callback import get_cdc_template
+from app.bot import Bot, Destinations, report_pairs
 from app.enums.exchange import Exchange
 from app.enums.pairs import Pairs
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
 
+EXCHANGES = ["binance", "okex", "kucoin", "bitkub"]
+
+
+def parse_chat_ids(value: str) -> List[str]:
+    return [chat_id.strip() for chat_id in value.split(",") if chat_id.strip() != ""]
+
+
+def chat_destinations(name: str) -> Destinations:
+    """
+    Destination chats of the `name` exchange report. Chats listed in
+    `<EXCHANGE>_CHAT_ID` (comma separated) receive every pair, chats
+    listed in `<EXCHANGE>_<PAIR>_CHAT_ID` only that pair
+    """
+    pairs: List[Pairs] = report_pairs(Exchange(name))
+    destinations: Dict[str, List[Pairs]] = {
+        chat_id: list(pairs)
+        for chat_id in parse_chat_ids(os.getenv(f"{name.upper()}_CHAT_ID", ""))
+    }
+    for pair in pairs:
+        env: str = f"{name.upper()}_{pair.upper()}_CHAT_ID"
+        for chat_id in parse_chat_ids(os.getenv(env, "")):
+            chat_pairs = destinations.setdefault(chat_id, [])
+            if pair not in chat_pairs:
+                chat_pairs.append(pair)
+    return destinations
+
+
 def init_dotenv():
     load_dotenv()
 
     token = os.getenv("TOKEN", "TOKEN")
-    binance_chat_id = os.getenv("BINANCE_CHAT_ID", "BINANCE_CHAT_ID")
-    okex_chat_id = os.getenv("OKEX_CHAT_ID", "OKEX_CHAT_ID")
-    kucoin_chat_id = os.getenv("KUCOIN_CHAT_ID", "KUCOIN_CHAT_ID")
-    bitkub_chat_id = os.getenv("BITKUB_CHAT_ID", "BITKUB_CHAT_ID")
     return {
         "token": token,
-        "chat_id": {
-            "binance": binance_chat_id,
-            "okex": okex_chat_id,
-            "kucoin": kucoin_chat_id,
-            "bitkub": bitkub_chat_id,
-        },
+        "chat_id": {name: chat_destinations(name) for name in EXCHANGES},
     }
 
 
+def select_chat_ids(
+    exchange: str, chat_ids: Dict[str, Destinations]
+) -> Dict[Exchange, Destinations]:
+    """
+    Map each exchange of `exchange` (a name, a comma separated list of
+    names or "all" for every exchange with a chat id) to its destinations
+    """
+    if exchange == "all":
+        names = [name for name, chats in chat_ids.items() if len(chats) > 0]
+    else:
+        names = [name.strip() for name in exchange.split(",") if name.strip() != ""]
+
+    unknown = [name for name in names if name not in chat_ids]
+    if len(unknown) > 0:
+        raise click.BadParameter(f"Unknown exchange: {', '.join(unknown)}")
+    missing = [name for name in names if len(chat_ids[name]) == 0]
+    if len(missing) > 0:
+        raise click.BadParameter(f"No chat id set for: {', '.join(missing)}")
+    return {Exchange(name): chat_ids[name] for name in names}
+
+
 @click.command()
-@click.option("--exchange", default="binance", help="pair binance/okex")
+@click.option(
+    "--exchange",
+    default="binance",
+    help="binance/okex/kucoin/bitkub, a comma separated list or all",
+)
 def main(exchange: str):
     # load .env and unpack
     env = init_dotenv()
     exchange = exchange.lower().strip()
+    chat_ids = select_chat_ids(exchange, env["chat_id"])
 
-    logger.info(f"sending summary from {exchange}")
+    n_chats = sum(len(chats) for chats in chat_ids.values())
+    logger.info(f"sending summary from {', '.join(chat_ids)} to {n_chats} chats")
 
     bot = Bot(token=env["token"])
 
-    asyncio.run(bot.send_message_to_chat(env["chat_id"][exchange], exchange))
+    asyncio.run(bot.send_reports(chat_ids))
 
 
 if __name__ == "__main__":